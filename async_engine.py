@@ -0,0 +1,309 @@
+"""
+Asyncio Scraping Pipeline
+Runs hundreds of in-flight student sessions over aiohttp under a semaphore
+"""
+
+import time
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple, Union
+from urllib.parse import urljoin
+
+import aiohttp
+
+from http_session import USER_AGENT
+from portal_parser import (
+    build_student_record,
+    is_profile_page,
+    is_results_page,
+    login_error_kind,
+    login_error_text,
+    parse_login_form,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncPortalScraper:
+    """Scrape students concurrently with asyncio, producing process_student records"""
+
+    def __init__(self, automation, concurrency: int = 50, captcha_threads: int = 8):
+        """
+        Initialize pipeline
+
+        Args:
+            automation: KITPortalAutomation providing config, password, photo dir and CAPTCHA solvers
+            concurrency: Maximum number of student sessions in flight
+            captcha_threads: Threads used for the blocking CAPTCHA solvers
+        """
+        self.automation = automation
+        self.concurrency = max(1, int(concurrency))
+        self.captcha_threads = max(1, int(captcha_threads))
+        self.timeout = aiohttp.ClientTimeout(total=30)
+
+        self.root_url = automation.portal_root
+        self.login_url = automation.base_url
+        self.results_url = automation.results_url
+        self.profile_url = automation.profile_url
+        self.logout_url = automation.logout_url
+
+        self._connector: Optional[aiohttp.TCPConnector] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def _new_session(self) -> aiohttp.ClientSession:
+        """Cookie-isolated session on the shared connector"""
+        return aiohttp.ClientSession(
+            connector=self._connector,
+            connector_owner=False,
+            cookie_jar=aiohttp.CookieJar(unsafe=True),
+            headers={'User-Agent': USER_AGENT},
+            timeout=self.timeout,
+        )
+
+    async def _get(self, session: aiohttp.ClientSession, url: str,
+                   binary: bool = False) -> Tuple[int, str, Union[str, bytes]]:
+        """
+        Idempotent GET retried like the requests sessions of HTTPSessionPool
+
+        Uses the same retry statuses, attempt count and backoff (none before the
+        first retry, then backoff_factor * 2^n) and also retries connection errors
+        and timeouts. Never used for the login POST.
+
+        Returns:
+            (status, final URL, body text or bytes) of the last attempt
+        """
+        retry = self.automation.http.session_retry
+        retries = retry.total if 'GET' in (retry.allowed_methods or {'GET'}) else 0
+        for attempt in range(retries + 1):
+            if attempt > 1:
+                await asyncio.sleep(retry.backoff_factor * 2 ** (attempt - 1))
+            try:
+                async with session.get(url) as response:
+                    body = await (response.read() if binary else response.text())
+                    if response.status not in retry.status_forcelist or attempt == retries:
+                        return response.status, str(response.url), body
+                    logger.warning(f"⚠️ GET {url} returned {response.status}, "
+                                   f"retrying ({attempt + 1}/{retries})")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt == retries:
+                    raise
+                logger.warning(f"⚠️ GET {url} failed: {e!r}, retrying ({attempt + 1}/{retries})")
+
+    # ------------------------------------------------------------------
+    # Stages
+    # ------------------------------------------------------------------
+
+    async def fetch_captcha(self, session: aiohttp.ClientSession) -> Optional[Dict]:
+        """GET the login form and download its CAPTCHA image"""
+        status, form_page_url, page_html = await self._get(session, self.login_url)
+        if status != 200:
+            logger.warning(f"⚠️ Login page returned {status}")
+            return None
+        form_info = parse_login_form(page_html)
+
+        if not form_info['captcha_src']:
+            logger.warning("⚠️ CAPTCHA image not found")
+            return None
+
+        status, _, image = await self._get(session, urljoin(form_page_url, form_info['captcha_src']), binary=True)
+        if status != 200:
+            logger.warning(f"⚠️ CAPTCHA download failed: {status}")
+            return None
+        form_info['image'] = image
+
+        form_info['page_url'] = form_page_url
+        return form_info
+
+    async def solve_captcha(self, image: bytes, roll_number: str) -> Optional[str]:
+        """Run the blocking Vision/EasyOCR solvers in a worker thread"""
+        def _solve():
+            self.automation.save_debug_captcha(image, f"captcha_async_{roll_number}.png")
+            return self.automation.solve_captcha_image(image)
+
+        return await asyncio.get_running_loop().run_in_executor(self._executor, _solve)
+
+    async def login(self, session: aiohttp.ClientSession, roll_number: str,
+                    max_retries: int = 3) -> Tuple[Optional[str], int]:
+        """
+        Solve CAPTCHA and POST the login form
+
+        A rejected login is retried on a fresh login form (new CAPTCHA) up to
+        captcha.max_login_cycles submissions, as in the browser path. A
+        username/password error ends the login at once.
+
+        Returns:
+            (Results HTML or None, number of login cycles used)
+        """
+        cycles = 0
+        success = False
+        try:
+            while cycles < self.automation.max_login_cycles:
+                form_info = None
+                captcha_text = None
+                for attempt in range(max_retries):
+                    form_info = await self.fetch_captcha(session)
+                    if form_info:
+                        captcha_text = await self.solve_captcha(form_info['image'], roll_number)
+                        if captcha_text:
+                            break
+                    logger.warning(f"⚠️ Attempt {attempt + 1} failed, retrying...")
+
+                if not captcha_text:
+                    logger.error(f"CAPTCHA solving failed for {roll_number}")
+                    break
+
+                cycles += 1
+                page_html, error_kind = await self._submit_login(session, roll_number, form_info, captcha_text)
+                if page_html is not None:
+                    success = True
+                    logger.info(f"SUCCESS! Login successful for {roll_number}"
+                                f"{f' (cycle {cycles})' if cycles > 1 else ''}")
+                    return page_html, cycles
+                if error_kind == 'credentials':
+                    logger.error(f"Username or password rejected for {roll_number} - not retrying")
+                    break
+
+                if cycles < self.automation.max_login_cycles:
+                    logger.warning(f"⚠️ Login cycle {cycles}/{self.automation.max_login_cycles} rejected "
+                                   f"for {roll_number}, retrying with a new CAPTCHA")
+                    self.automation.login_cycles.record_refresh('reload')
+
+            logger.error(f"Login failed for {roll_number} after {cycles} cycle(s)")
+            return None, cycles
+        finally:
+            if cycles:
+                self.automation.login_cycles.record(cycles, success)
+
+    async def _submit_login(self, session: aiohttp.ClientSession, roll_number: str,
+                            form_info: Dict, captcha_text: str) -> Tuple[Optional[str], Optional[str]]:
+        """
+        POST the login form once
+
+        Returns:
+            (Results HTML or None if the portal rejected it,
+             login_error_kind() of the rejection message or None)
+        """
+        payload = dict(form_info['hidden'])
+        payload.update({
+            'username': roll_number,
+            'password1': self.automation.password,
+            'captcha': captcha_text,
+        })
+        action_url = urljoin(form_info['page_url'], form_info['action'] or self.login_url)
+
+        async with session.post(action_url, data=payload) as response:
+            final_url = str(response.url)
+            page_html = await response.text()
+
+        error_text = ''
+        success = "Results" in final_url or is_results_page(page_html)
+        if not success:
+            error_text = login_error_text(page_html)
+            page_html = await self.fetch_results(session)
+            success = is_results_page(page_html)
+
+        error_kind = None if success else login_error_kind(error_text)
+        # Confirm the answer in the CAPTCHA cache, or evict it on a CAPTCHA error
+        # (a credential error says nothing about the answer)
+        if success or error_kind == 'captcha':
+            await asyncio.get_running_loop().run_in_executor(
+                self._executor, self.automation.record_captcha_outcome,
+                form_info['image'], captcha_text, success)
+
+        if not success:
+            logger.warning(f"Login rejected for {roll_number}{f': {error_text}' if error_text else ''}")
+        return (page_html, None) if success else (None, error_kind)
+
+    async def fetch_results(self, session: aiohttp.ClientSession) -> str:
+        """GET the Results page"""
+        _, _, page_html = await self._get(session, self.results_url)
+        return page_html
+
+    async def fetch_profile(self, session: aiohttp.ClientSession) -> Optional[str]:
+        """GET the Usersprofile page; None if it is not the Edit User form"""
+        status, _, page_html = await self._get(session, self.profile_url)
+        if status == 200 and is_profile_page(page_html):
+            return page_html
+        return None
+
+    async def logout(self, session: aiohttp.ClientSession):
+        """GET the logout URL"""
+        try:
+            async with session.get(self.logout_url) as response:
+                await response.read()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.warning(f"Logout error: {e}")
+
+    # ------------------------------------------------------------------
+    # Pipeline
+    # ------------------------------------------------------------------
+
+    async def process_student(self, roll_number: str) -> Dict:
+        """Process single student (same record shape as KITPortalAutomation.process_student)"""
+        student_data = {'roll_number': roll_number}
+
+        async with self._semaphore:
+            try:
+                async with self._new_session() as session:
+                    results_html, student_data['login_cycles'] = await self.login(session, roll_number)
+                    if results_html is None:
+                        student_data['status'] = 'Login Failed'
+                        return student_data
+
+                    loop = asyncio.get_running_loop()
+                    loop.run_in_executor(None, self.automation.archive_page, roll_number, 'results', results_html)
+
+                    profile_html = await self.fetch_profile(session)
+                    if profile_html:
+                        loop.run_in_executor(None, self.automation.archive_page, roll_number, 'profile', profile_html)
+
+                    student_data.update(build_student_record(roll_number, results_html, profile_html, self.root_url))
+                    cookies = {cookie.key: cookie.value for cookie in session.cookie_jar}
+                    if not self.automation.hand_off_photo(roll_number, student_data.get('photo_url'), cookies):
+                        await self.logout(session)
+
+                logger.info(f"✅ Processed {roll_number}: {student_data['status']}")
+
+            except Exception as e:
+                logger.error(f"❌ Error processing {roll_number}: {e}")
+                student_data['status'] = f'Error: {str(e)}'
+
+        return student_data
+
+    async def run_async(self, roll_numbers: List[str],
+                        on_result: Optional[Callable[[Dict], None]] = None) -> List[Dict]:
+        """Process all roll numbers concurrently, returning records in roll-number order"""
+        async def _process(roll_number):
+            student_data = await self.process_student(roll_number)
+            if on_result:
+                await asyncio.get_running_loop().run_in_executor(None, on_result, student_data)
+            return student_data
+
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=self.captcha_threads, thread_name_prefix='captcha')
+
+        try:
+            return await asyncio.gather(*(_process(r) for r in roll_numbers))
+        finally:
+            await self._connector.close()
+            self._executor.shutdown(wait=False)
+
+    def run(self, roll_numbers: List[str],
+            on_result: Optional[Callable[[Dict], None]] = None) -> List[Dict]:
+        """
+        Blocking entry point used by KITPortalAutomation.run
+
+        Args:
+            roll_numbers: Roll numbers to process
+            on_result: Optional callback invoked with each finished student record
+        """
+        logger.info(f"⚡ Async engine: {len(roll_numbers)} students, {self.concurrency} in flight")
+        start = time.time()
+
+        all_data = asyncio.run(self.run_async(roll_numbers, on_result))
+
+        logger.info(f"⏱️ Async engine finished in {time.time() - start:.1f}s")
+        return all_data
@@ -4,78 +4,240 @@ Now uses Google Cloud Vision for 90%+ CAPTCHA accuracy
 """
 
 import time
-import os
+import copy
 import json
 import logging
+import threading
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional
-import re
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Union
+from urllib.parse import urlparse
 
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import NoSuchElementException
 from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.action_chains import ActionChains
 
 # Google Vision CAPTCHA solver
-from google_vision_captcha import GoogleVisionCaptchaSolver
+from google_vision_captcha import GoogleVisionCaptchaSolver, VisionBatchCollector
+from captcha_cache import CaptchaCache
+from captcha_solvers import HedgedCaptchaSolver, LoginCycleStats, easyocr_solver, local_model_solver, vision_solver
+from captcha_model import load_model
+from captcha_dataset import CaptchaRecorder
+from captcha_preprocess import preprocess as preprocess_captcha
+from http_session import HTTPSessionPool
+from worker_pool import BrowserWorkerPool
+from progress_journal import ProgressJournal
+from waits import LOGIN_ERROR_XPATH, WaitEngine, WaitStats, any_of, image_loaded, login_outcome
+from http_engine import HTTPPortalScraper
+from async_engine import AsyncPortalScraper
+from hybrid_engine import HybridPortalScraper
+from portal_parser import (
+    MARKSHEET_FIELDS,
+    PROFILE_FIELDS,
+    absolute_url,
+    login_error_kind,
+    parse_marksheet_html,
+    parse_profile_html,
+    profile_belongs_to,
+)
+from page_archive import PageArchive
+from dom_scripts import extract_marksheet_script, extract_profile_script, refresh_captcha_script
 
-# Fallback OCR
-import easyocr
-import pandas as pd
-from openpyxl import load_workbook
-from openpyxl.drawing.image import Image as XLImage
-from PIL import Image
-import requests
-from io import BytesIO
+# Fallback OCR (EasyOCR is imported lazily by LazyEasyOCRReader)
+from startup import LazyEasyOCRReader, StartupReport
+from photo_store import PhotoDownloader, PhotoStore
+from excel_writer import StreamingExcelWriter, ThumbnailBuilder, max_course_count
 
-# Setup logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('automation.log', encoding='utf-8'),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger(__name__)
 
 
+def configure_logging(log_file: Optional[str] = 'automation.log', level: int = logging.INFO):
+    """
+    Log to the console and, unless log_file is None, to log_file
+    
+    Called by the command-line entry points; importing this module leaves
+    logging alone.
+    """
+    handlers = [logging.StreamHandler()]
+    if log_file:
+        handlers.insert(0, logging.FileHandler(log_file, encoding='utf-8'))
+    logging.basicConfig(
+        level=level,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=handlers
+    )
+
+
 class KITPortalAutomation:
     """Main automation class with Google Vision CAPTCHA solving"""
     
     def __init__(self, config_path: str = "config.json"):
         """Initialize automation with configuration"""
-        self.config = self.load_config(config_path)
+        self.startup = StartupReport()  # Shared by all workers
+        with self.startup.phase('config_load'):
+            self.config = self.load_config(config_path)
         self.driver = None
+        self.worker_id = None  # Set on workers spawned by BrowserWorkerPool
+        self.waits = None
+        self.wait_stats = WaitStats()  # Shared by all workers
+        
+        # Pooled keep-alive connections for all outbound HTTP (Vision, photos, HTTP engine)
+        self.http = HTTPSessionPool.from_config(self.config.get('http', {}))
         
         # Initialize Google Vision CAPTCHA solver
         self.google_vision_solver = None
         if 'captcha' in self.config and 'google_vision_api_key' in self.config['captcha']:
             api_key = self.config['captcha']['google_vision_api_key']
-            self.google_vision_solver = GoogleVisionCaptchaSolver(api_key)
+            self.google_vision_solver = GoogleVisionCaptchaSolver(
+                api_key, endpoint=self.config['captcha'].get('vision_endpoint'), session=self.http.session())
             logger.info("🎯 Google Vision CAPTCHA solver initialized")
             
-            # Test API key
-            if not self.google_vision_solver.test_api_key():
-                logger.error("❌ Google Vision API key test failed!")
-                logger.error("Check if Cloud Vision API is enabled and billing is set up")
+            # Test API key in the background while the browser launches
+            self.startup.run_in_background('key_validation', self._validate_api_key)
+            
+            # Coalesce CAPTCHAs from concurrent workers into batched calls
+            batch_window_ms = self.config['captcha'].get('batch_window_ms', 0)
+            if batch_window_ms > 0:
+                self.google_vision_solver = VisionBatchCollector(
+                    self.google_vision_solver, window=batch_window_ms / 1000)
+                logger.info(f"📦 Google Vision batching enabled ({batch_window_ms} ms window)")
         else:
             logger.warning("⚠️ No Google Vision API key found in config")
         
-        # Fallback EasyOCR reader
-        self.reader = easyocr.Reader(['en'], gpu=False)
+        # EasyOCR reader (shared by all workers), loaded lazily or warmed in background
+        captcha_config = self.config.get('captcha', {})
+        hedge = captcha_config.get('hedge', True)
+        self.reader = LazyEasyOCRReader(['en'], gpu=False)
+        use_easyocr = captcha_config.get('easyocr', True)  # Still the fallback if no other solver
+        default_warmup = 'lazy' if (self.google_vision_solver and not hedge) or not use_easyocr else 'background'
+        if self.config.get('ocr', {}).get('warmup', default_warmup) == 'background':
+            self.startup.run_in_background('ocr_warmup', self.reader.load)
         
-        self.base_url = "https://portal.kitcbe.com/index.php/Login"
+        # Hedged solving: local model, Vision and EasyOCR race on the same
+        # (preprocessed) image, first valid answer wins (a local model answer
+        # only once another solver agrees, unless local_requires_agreement is off)
+        solvers = []
+        if captcha_config.get('local_model'):
+            local_model = load_model(captcha_config['local_model'],
+                                     captcha_config.get('local_min_margin', 0.02))
+            if local_model:
+                solvers.append(local_model_solver(
+                    local_model, needs_agreement=captcha_config.get('local_requires_agreement', True)))
+        if self.google_vision_solver:
+            solvers.append(vision_solver(self.google_vision_solver))
+        if use_easyocr or not solvers:
+            # Behind Vision, a busy (serialized) EasyOCR sits out races instead of queueing
+            solvers.append(easyocr_solver(self.reader, skip_when_busy=self.google_vision_solver is not None))
+        self.captcha_solver = HedgedCaptchaSolver(
+            solvers,
+            hedge=hedge,
+            agreement_window=captcha_config.get('agreement_window_ms', 250) / 1000,
+            # Off until a labelled set shows it helps (python captcha_preprocess.py <dataset_dir> <key>)
+            preprocess=preprocess_captcha if captcha_config.get('preprocess', False) else None
+        )
+        
+        # Retries get a new CAPTCHA on the filled-in form ('in_place') or by reloading
+        # the login page ('reload'); a rejected login is retried up to max_login_cycles
+        self.captcha_refresh = captcha_config.get('refresh', 'in_place')
+        self.max_login_cycles = max(1, int(captcha_config.get('max_login_cycles', 3)))
+        self.login_cycles = LoginCycleStats()  # Shared by all workers
+        self.last_login_cycles = 0
+        
+        # Optional labelled dataset: every CAPTCHA, each solver's answer, login outcome
+        dataset_dir = captcha_config.get('dataset_dir')
+        self.captcha_recorder = CaptchaRecorder(dataset_dir) if dataset_dir else None
+        
+        portal = self.config['portal']
+        self.portal_root = portal.get('root_url', "https://portal.kitcbe.com").rstrip('/')
+        self.base_url = portal.get('login_url', f"{self.portal_root}/index.php/Login")
+        self.results_url = portal.get('results_url', f"{self.portal_root}/index.php/Results")
+        self.profile_url = portal.get('profile_url', f"{self.portal_root}/index.php/Usersprofile")
+        self.logout_url = portal.get('logout_url', f"{self.portal_root}/index.php/Login/logout")
         self.password = self.config['portal']['password']
         self.output_dir = Path(self.config['output']['directory'])
         self.output_dir.mkdir(exist_ok=True)
         self.photos_dir = self.output_dir / "photos"
         self.photos_dir.mkdir(exist_ok=True)
         
+        # Profile page is opened directly; a URL learned from the menu click path
+        # is cached across runs (an explicit portal.profile_url always wins)
+        self.direct_profile = portal.get('direct_profile', True)
+        self.learned_urls_path = self.output_dir / "learned_urls.json"
+        if 'profile_url' not in portal:
+            learned_profile_url = self._load_learned_urls().get('profile_url')
+            if learned_profile_url and self._is_learnable_profile_url(learned_profile_url):
+                self.profile_url = learned_profile_url
+        self.profile_nav_stats = {'direct': 0, 'fallback': 0}
+        # After this many fallbacks in a row the direct attempt is switched off
+        # (shared by all workers) so students stop paying its timeout
+        self.direct_profile_max_fallbacks = max(1, int(portal.get('direct_profile_max_fallbacks', 3)))
+        self._direct_profile_state = {'consecutive_fallbacks': 0, 'disabled': False}
+        self._stats_lock = threading.Lock()
+        
+        self._captcha_image = None
+        self._captcha_src = None  # src of the CAPTCHA last solved (a used CAPTCHA is never resubmitted)
+        self.save_debug_images = self.config.get('captcha', {}).get('save_debug_images', False)
+        
+        # Page extraction: script (one execute_script), elements (find_element per field)
+        # or html (page_source parsed with lxml on a worker thread)
+        extraction_config = self.config.get('extraction', {})
+        self.extraction_mode = extraction_config.get('mode', 'script')
+        
+        # Raw Results/profile HTML kept for offline re-parsing
+        self.page_archive = None
+        if extraction_config.get('archive_pages', False):
+            self.page_archive = PageArchive(self.output_dir / "pages")
+        
+        # Photo downloads, CAPTCHA cache and parse threads: released by close()
+        # at the end of every run() and opened again by the next one
+        self._open_resources()
+    
+    def _open_resources(self):
+        """Create the thread pools and on-disk stores that close() releases"""
+        # Background photo downloads into a content-addressed store
+        photos_config = self.config.get('photos', {})
+        self.photos = PhotoDownloader(
+            PhotoStore(self.photos_dir),
+            self.http,
+            workers=photos_config.get('download_workers', 4),
+            timeout=photos_config.get('timeout', 10)
+        )
+        
+        # Confirmed CAPTCHA answers, shared across runs and workers
+        self.captcha_cache = None
+        cache_config = self.config.get('captcha', {}).get('cache', {})
+        if cache_config.get('enabled', True):
+            self.captcha_cache = CaptchaCache(
+                cache_config.get('path', self.output_dir / "captcha_cache.sqlite"),
+                max_entries=cache_config.get('max_entries', 2048),
+                use_perceptual=cache_config.get('perceptual', False),
+                max_distance=cache_config.get('max_distance', 8)
+            )
+        
+        self.parse_executor = None
+        if self.extraction_mode == 'html':
+            self.parse_executor = ThreadPoolExecutor(
+                max_workers=self.config.get('extraction', {}).get('parse_workers', 2),
+                thread_name_prefix='parse')
+        
+        # The CAPTCHA solver starts its threads on first use
+        if isinstance(self.google_vision_solver, VisionBatchCollector):
+            self.google_vision_solver.open()
+        self._closed = False
+        
+    def _validate_api_key(self):
+        """Startup check of the Google Vision API key (runs in a background thread)"""
+        solver = self.google_vision_solver
+        if isinstance(solver, VisionBatchCollector):
+            solver = solver.solver
+        if not solver.test_api_key():
+            logger.error("❌ Google Vision API key test failed!")
+            logger.error("Check if Cloud Vision API is enabled and billing is set up")
+    
     def load_config(self, config_path: str) -> Dict:
         """Load configuration from JSON file"""
         try:
@@ -85,6 +247,24 @@ class KITPortalAutomation:
             logger.error(f"Config file not found: {config_path}")
             raise
     
+    def spawn_worker(self, worker_id: int) -> 'KITPortalAutomation':
+        """
+        Create an independent worker sharing config and CAPTCHA solvers
+        
+        Each worker gets its own driver, debug CAPTCHA file and screenshot names.
+        """
+        worker = copy.copy(self)
+        worker.driver = None
+        worker.waits = None
+        worker.worker_id = worker_id
+        return worker
+    
+    def _artifact_name(self, stem: str, extension: str = 'png') -> str:
+        """Build a file name that is unique to this worker"""
+        if self.worker_id is None:
+            return f"{stem}.{extension}"
+        return f"{stem}_w{self.worker_id}.{extension}"
+    
     def setup_driver(self):
         """Setup Selenium WebDriver with Chrome"""
         options = Options()
@@ -99,65 +279,130 @@ class KITPortalAutomation:
         options.add_experimental_option("excludeSwitches", ["enable-automation"])
         options.add_experimental_option('useAutomationExtension', False)
         
-        self.driver = webdriver.Chrome(options=options)
+        with self.startup.phase('driver_launch' if self.worker_id is None else f'driver_launch_w{self.worker_id}'):
+            self.driver = webdriver.Chrome(options=options)
         self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-        self.driver.implicitly_wait(10)
+        
+        wait_config = dict(self.config.get('waits', {}))
+        poll_frequency = wait_config.pop('poll_frequency', 0.1)
+        wait_config.pop('between_students', None)
+        # Explicit waits cover every page transition; a missing optional field
+        # should cost nothing (the element-by-element mode keeps the old 10s)
+        implicit_wait = wait_config.pop('implicit', 10 if self.extraction_mode == 'elements' else 0)
+        self.driver.implicitly_wait(implicit_wait)
+        self.waits = WaitEngine(self.driver, wait_config, self.wait_stats, poll_frequency)
+        self.startup.mark_ready()
         logger.info("✓ WebDriver initialized successfully")
     
-    def solve_captcha(self, max_retries: int = 3) -> Optional[str]:
+    def solve_captcha(self, roll_number: str, max_retries: int = 3) -> Optional[str]:
         """
-        Solve CAPTCHA using Google Vision (primary) or EasyOCR (fallback)
+        Solve the CAPTCHA on the login form (Google Vision and EasyOCR)
+        
+        An unreadable CAPTCHA is replaced by a new one before the next attempt;
+        the same image would only give the same wrong answer.
         """
         for attempt in range(max_retries):
+            if attempt:
+                self.refresh_captcha(roll_number)
             try:
-                time.sleep(1)
-                
-                # Find CAPTCHA image
-                captcha_img = self.driver.find_element(By.XPATH, 
-                    "//img[contains(@src, 'captcha_images')]")
+                # Wait for CAPTCHA image to finish loading
+                captcha_img = self.waits.until('captcha_image',
+                    image_loaded((By.XPATH, "//img[contains(@src, 'captcha_images')]")))
                 
                 if not captcha_img:
                     logger.warning(f"⚠️ CAPTCHA image not found (attempt {attempt + 1})")
                     continue
                 
-                # Save CAPTCHA screenshot
-                captcha_filename = 'captcha_temp.png'
-                captcha_img.screenshot(captcha_filename)
-                logger.info(f"📸 CAPTCHA screenshot saved")
+                # Capture CAPTCHA in memory (no temp file)
+                self._captcha_image = captcha_img.screenshot_as_png
+                self._captcha_src = captcha_img.get_attribute('src')
+                logger.info(f"📸 CAPTCHA captured ({len(self._captcha_image)} bytes)")
+                self.save_debug_captcha(self._captcha_image, self._artifact_name('captcha_temp'))
                 
-                # Method 1: Try Google Vision (if available)
-                if self.google_vision_solver:
-                    logger.info("🔍 Trying Google Vision API...")
-                    captcha_text = self.google_vision_solver.solve_captcha(captcha_filename)
-                    
-                    if captcha_text:
-                        logger.info(f"✅ Google Vision solved: '{captcha_text}'")
-                        return captcha_text
-                    else:
-                        logger.warning("⚠️ Google Vision failed, falling back to EasyOCR...")
+                captcha_text = self.solve_captcha_image(self._captcha_image)
+                if captcha_text:
+                    return captcha_text
                 
-                # Method 2: Fallback to EasyOCR
-                logger.info("🔍 Trying EasyOCR fallback...")
-                result = self.reader.readtext(captcha_filename, detail=0)
-                
-                if result:
-                    captcha_text = ''.join(result).strip()
-                    captcha_text = re.sub(r'[^A-Za-z0-9]', '', captcha_text)
-                    
-                    if 3 <= len(captcha_text) <= 7:
-                        logger.info(f"✅ EasyOCR solved: '{captcha_text}'")
-                        return captcha_text
-                
-                logger.warning(f"⚠️ Attempt {attempt + 1} failed, retrying...")
-                time.sleep(1)
+                logger.warning(f"⚠️ Attempt {attempt + 1} failed, retrying with a new CAPTCHA...")
                 
             except Exception as e:
                 logger.warning(f"⚠️ CAPTCHA solve attempt {attempt + 1} failed: {e}")
-                time.sleep(1)
         
         logger.error("❌ Failed to solve CAPTCHA after all retries")
         return None
     
+    def refresh_captcha(self, roll_number: str) -> bool:
+        """
+        Get a new CAPTCHA, keeping the entered username and password
+        
+        In 'in_place' mode only the CAPTCHA image (and hidden form tokens) is
+        replaced; otherwise, or if that fails, the login page is reloaded and
+        the credentials are typed again.
+        """
+        if self.captcha_refresh == 'in_place':
+            try:
+                if refresh_captcha_script(self.driver, self.base_url):
+                    self.login_cycles.record_refresh('in_place')
+                    logger.info("🔄 CAPTCHA refreshed in place")
+                    return True
+                logger.warning("⚠️ In-place CAPTCHA refresh returned no new image")
+            except Exception as e:
+                logger.warning(f"⚠️ In-place CAPTCHA refresh failed: {e}")
+        
+        self.login_cycles.record_refresh('reload')
+        logger.info("🔄 Reloading the login page for a new CAPTCHA")
+        return self.open_login_form(roll_number)
+    
+    def save_debug_captcha(self, image_bytes: bytes, filename: str):
+        """Write a CAPTCHA image to disk only when captcha.save_debug_images is on"""
+        if self.save_debug_images:
+            with open(filename, 'wb') as f:
+                f.write(image_bytes)
+            logger.debug(f"CAPTCHA debug image saved: {filename}")
+    
+    def solve_captcha_image(self, image_bytes: bytes) -> Optional[str]:
+        """
+        Solve a CAPTCHA image: cached answer, else the local model, Google Vision and EasyOCR hedged
+        
+        Args:
+            image_bytes: Raw CAPTCHA image (PNG/JPEG bytes)
+            
+        Returns:
+            CAPTCHA text or None if every solver failed
+        """
+        answers = self.captcha_recorder.track(image_bytes) if self.captcha_recorder else None
+        
+        # Method 0: Answer confirmed by an earlier successful login
+        if self.captcha_cache:
+            cached_text = self.captcha_cache.lookup(image_bytes)
+            if cached_text:
+                logger.info(f"⚡ CAPTCHA cache hit: '{cached_text}'")
+                if answers is not None:
+                    answers['cache'] = cached_text
+                return cached_text
+        
+        # Method 1: all solvers together (or in order with captcha.hedge off)
+        captcha_text = self.captcha_solver.solve(image_bytes, answers)
+        if captcha_text is None and self.captcha_recorder:
+            self.captcha_recorder.record(image_bytes, None, None)
+        return captcha_text
+    
+    def record_captcha_outcome(self, image_bytes: Optional[bytes], captcha_text: str, success: bool):
+        """
+        Keep answers that logged in, evict answers that did not (and record the attempt)
+        
+        Only call with success=False when the portal reported a CAPTCHA error
+        (login_error_kind() == 'captcha'), never for a wrong username or password.
+        """
+        if self.captcha_recorder and image_bytes:
+            self.captcha_recorder.record(image_bytes, captcha_text, success)
+        if not self.captcha_cache or not image_bytes:
+            return
+        if success:
+            self.captcha_cache.record_success(image_bytes, captcha_text)
+        else:
+            self.captcha_cache.evict(image_bytes, captcha_text)
+    
     def click_login_button(self) -> bool:
         """Try multiple methods to click login button - FASTER"""
         try:
@@ -202,179 +447,211 @@ class KITPortalAutomation:
             logger.error(f"Error in click_login_button: {e}")
             return False
     
+    def fill_credentials(self, roll_number: str):
+        """Type the username and password, skipping fields that already hold them"""
+        for field_id, value, label in (("username", roll_number, "Roll number"),
+                                       ("password1", self.password, "Password")):
+            field = WebDriverWait(self.driver, 10).until(
+                EC.element_to_be_clickable((By.ID, field_id))
+            )
+            if field.get_attribute('value') == value:
+                continue
+            field.clear()
+            field.send_keys(value)
+            logger.info(f"{label} entered")
+    
+    def open_login_form(self, roll_number: str) -> bool:
+        """Load the login page and enter the credentials"""
+        self.driver.get(self.base_url)
+        
+        # Wait for login form
+        if not self.waits.element_present('login_form', (By.ID, "username")):
+            logger.error("Login form did not load")
+            return False
+        
+        self.fill_credentials(roll_number)
+        return True
+    
     def login(self, roll_number: str) -> bool:
-        """Login to portal"""
+        """
+        Login to portal
+        
+        A rejected login is retried on the new CAPTCHA of the login form the
+        portal sends back (credentials re-entered only if the form lost them),
+        up to captcha.max_login_cycles submissions. If the form still shows the
+        CAPTCHA that was just used (error without a reload), it is refreshed first.
+        A username/password error ends the login at once.
+        """
+        cycles = 0
+        success = False
         try:
-            self.driver.get(self.base_url)
-            time.sleep(3)
-            
-            # Wait for login form
-            WebDriverWait(self.driver, 15).until(
-                EC.presence_of_element_located((By.ID, "username"))
-            )
-            
-            # Enter username
-            logger.info("Entering username...")
-            roll_input = WebDriverWait(self.driver, 10).until(
-                EC.element_to_be_clickable((By.ID, "username"))
-            )
-            roll_input.clear()
-            time.sleep(0.3)
-            roll_input.send_keys(roll_number)
-            logger.info(f"Roll number entered: {roll_number}")
-            
-            # Enter password
-            logger.info("Entering password...")
-            password_input = WebDriverWait(self.driver, 10).until(
-                EC.element_to_be_clickable((By.ID, "password1"))
-            )
-            password_input.clear()
-            time.sleep(0.3)
-            password_input.send_keys(self.password)
-            logger.info("Password entered")
-            
-            # Solve CAPTCHA
-            captcha_text = self.solve_captcha()
-            if not captcha_text:
-                logger.error("CAPTCHA solving failed")
+            if not self.open_login_form(roll_number):
                 return False
             
-            # Enter CAPTCHA
-            logger.info("Entering CAPTCHA...")
-            captcha_input = WebDriverWait(self.driver, 10).until(
-                EC.element_to_be_clickable((By.ID, "captcha"))
-            )
-            captcha_input.clear()
-            time.sleep(0.3)
-            captcha_input.send_keys(captcha_text)
-            logger.info(f"CAPTCHA entered: {captcha_text}")
-            
-            # Click login (no extra delay)
-            if not self.click_login_button():
-                logger.error("Failed to click login button")
-                return False
-            
-            # Wait longer for page load and check multiple times
-            logger.info("Waiting for login to complete...")
-            
-            # Wait and check every 2 seconds for up to 15 seconds
-            for attempt in range(8):
-                time.sleep(2)
-                
-                current_url = self.driver.current_url
-                logger.info(f"Current URL (attempt {attempt + 1}): {current_url}")
-                
-                # Check for success indicators
-                if "Results" in current_url:
-                    logger.info(f"SUCCESS! Login successful for {roll_number}")
+            while cycles < self.max_login_cycles:
+                cycles += 1
+                outcome = self._submit_login(roll_number, final=cycles == self.max_login_cycles)
+                if outcome == 'success':
+                    success = True
+                    logger.info(f"SUCCESS! Login successful for {roll_number}"
+                                f"{f' (cycle {cycles})' if cycles > 1 else ''}")
                     return True
+                if outcome is None or cycles == self.max_login_cycles:
+                    break
+                if outcome == 'credentials':
+                    logger.error(f"Username or password rejected for {roll_number} - not retrying")
+                    break
                 
-                # Check page source for results page
-                page_source = self.driver.page_source
-                if any(keyword in page_source for keyword in ["PROVISIONAL RESULTS", "RESULT", "Register Number", "Regulation"]):
-                    logger.info(f"SUCCESS! Login successful for {roll_number} (detected in page)")
-                    return True
-                
-                # Check if stuck on error page
-                if "Userlogin" in current_url or "Login" in current_url:
-                    # Still on login page - might be wrong CAPTCHA
-                    if attempt < 3:
-                        logger.warning(f"Still on login page (attempt {attempt + 1}) - might be wrong CAPTCHA")
-                        continue
-                    else:
+                logger.warning(f"⚠️ Login cycle {cycles}/{self.max_login_cycles} rejected for "
+                               f"{roll_number}, retrying with a new CAPTCHA")
+                if outcome == 'login_form':
+                    # An error shown without a reload leaves the spent CAPTCHA on the form
+                    if self._captcha_unchanged() and not self.refresh_captcha(roll_number):
                         break
+                    self.fill_credentials(roll_number)
+                elif not self.open_login_form(roll_number):
+                    break
             
-            # Login failed
-            logger.error(f"Login failed for {roll_number}")
-            logger.error(f"Final URL: {self.driver.current_url}")
-            
-            # Save screenshot
-            self.driver.save_screenshot(f"login_failed_{roll_number}.png")
-            logger.error(f"Screenshot saved: login_failed_{roll_number}.png")
-            
-            # Check for error messages
-            try:
-                error_elem = self.driver.find_element(By.XPATH, 
-                    "//*[contains(text(), 'Invalid') or contains(text(), 'incorrect') or contains(text(), 'wrong')]")
-                logger.error(f"Error message: {error_elem.text}")
-            except:
-                pass
-            
+            logger.error(f"Login failed for {roll_number} after {cycles} cycle(s)")
             return False
                 
         except Exception as e:
             logger.error(f"Login error for {roll_number}: {e}")
             return False
+        finally:
+            self.last_login_cycles = cycles
+            if cycles:
+                self.login_cycles.record(cycles, success)
     
-    def extract_marksheet_data(self) -> Dict:
-        """Extract data from marksheet/results page"""
+    def _captcha_unchanged(self) -> bool:
+        """True if the form still shows the CAPTCHA that was just submitted (or none at all)"""
+        captcha_img = self.waits.find_optional('captcha after rejection',
+            (By.XPATH, "//img[contains(@src, 'captcha_images')]"))
+        return captcha_img is None or captcha_img.get_attribute('src') == self._captcha_src
+    
+    def _submit_login(self, roll_number: str, final: bool = True) -> Optional[str]:
+        """
+        Solve the CAPTCHA on the filled-in form and submit it once
+        
+        Returns:
+            'success', 'credentials' (username/password error), 'login_form'
+            (rejected, portal showed the form again), 'rejected' (any other
+            failure page) or None if nothing was submitted
+        """
+        # Solve CAPTCHA
+        captcha_text = self.solve_captcha(roll_number)
+        if not captcha_text:
+            logger.error("CAPTCHA solving failed")
+            return None
+        
+        # Enter CAPTCHA
+        logger.info("Entering CAPTCHA...")
+        captcha_input = WebDriverWait(self.driver, 10).until(
+            EC.element_to_be_clickable((By.ID, "captcha"))
+        )
+        captcha_input.clear()
+        captcha_input.send_keys(captcha_text)
+        logger.info(f"CAPTCHA entered: {captcha_text}")
+        
+        # Click login (no extra delay)
+        outcome_condition = login_outcome()
+        outcome_condition.arm(self.driver)
+        if not self.click_login_button():
+            logger.error("Failed to click login button")
+            return None
+        
+        # Whichever comes first: Results URL, Register Number cell, error message, login form again
+        logger.info("Waiting for login to complete...")
+        start = time.monotonic()
+        outcome = self.waits.until('login_result', outcome_condition)
+        logger.info(f"Login outcome: {outcome or 'timeout'} after {(time.monotonic() - start) * 1000:.0f}ms")
+        
+        if outcome in ('results_url', 'results_page'):
+            self.record_captcha_outcome(self._captcha_image, captcha_text, True)
+            return 'success'
+        
+        if not outcome:
+            # Timed out without a recognisable page - last look at the page source
+            self.waits.document_ready('login_result')
+            page_source = self.driver.page_source
+            if any(keyword in page_source for keyword in ["PROVISIONAL RESULTS", "RESULT", "Register Number", "Regulation"]):
+                logger.info(f"Login detected in page source for {roll_number}")
+                self.record_captcha_outcome(self._captcha_image, captcha_text, True)
+                return 'success'
+        
+        logger.warning(f"Login rejected for {roll_number}")
+        logger.warning(f"Final URL: {self.driver.current_url}")
+        
+        # Check for error messages
+        error_text = outcome_condition.error_text
+        if not error_text and outcome != 'login_form':
+            error_elem = self.waits.find_optional('login error message', (By.XPATH, LOGIN_ERROR_XPATH))
+            if error_elem:
+                error_text = error_elem.text
+        if error_text:
+            logger.warning(f"Error message: {error_text}")
+        
+        # Only a CAPTCHA error says the answer was wrong; a credential error says nothing about it
+        error_kind = login_error_kind(error_text)
+        if error_kind == 'captcha':
+            self.record_captcha_outcome(self._captcha_image, captcha_text, False)
+        
+        # Screenshot only for the last rejected cycle
+        if final or error_kind == 'credentials':
+            screenshot_name = self._artifact_name(f"login_failed_{roll_number}")
+            self.driver.save_screenshot(screenshot_name)
+            logger.error(f"Screenshot saved: {screenshot_name}")
+        
+        if error_kind == 'credentials':
+            return 'credentials'
+        if outcome == 'login_form' or self.waits.find_optional('login form after rejection', (By.ID, "username")):
+            return 'login_form'
+        return 'rejected'
+    
+    def archive_page(self, roll_number: str, kind: str, page_html: str):
+        """Store raw page HTML when extraction.archive_pages is on"""
+        if self.page_archive is None or page_html is None:
+            return
+        try:
+            self.page_archive.save(roll_number, kind, page_html)
+        except OSError as e:
+            logger.warning(f"Could not archive {kind} page for {roll_number}: {e}")
+    
+    def _resolve(self, extracted: Union[Dict, Future]) -> Dict:
+        """Wait for an html-mode parse (plain dicts pass through)"""
+        if not isinstance(extracted, Future):
+            return extracted
+        try:
+            return extracted.result()
+        except Exception as e:
+            logger.error(f"Error parsing page: {e}")
+            return {}
+    
+    def extract_marksheet_data(self, roll_number: Optional[str] = None) -> Union[Dict, Future]:
+        """
+        Extract data from marksheet/results page
+        
+        Returns:
+            Marksheet dict, or a Future of it in html mode (parsed off the browser thread)
+        """
         data = {}
         try:
-            time.sleep(2)
+            # Wait for the results header to render
+            self.waits.element_present('results_page',
+                (By.XPATH, "//td[contains(text(), 'Register Number')]"))
             
-            # Extract basic info
-            try:
-                data['name'] = self.driver.find_element(By.XPATH, 
-                    "//td[contains(text(), 'Name')]/following-sibling::td").text.strip()
-            except:
-                data['name'] = ''
-            
-            try:
-                data['register_number'] = self.driver.find_element(By.XPATH, 
-                    "//td[contains(text(), 'Register Number')]/following-sibling::td").text.strip()
-            except:
-                data['register_number'] = ''
+            if self.page_archive is not None or self.extraction_mode == 'html':
+                page_html = self.driver.page_source
+                self.archive_page(roll_number, 'results', page_html)
+                if self.extraction_mode == 'html':
+                    return self.parse_executor.submit(parse_marksheet_html, page_html)
             
-            try:
-                data['regulation'] = self.driver.find_element(By.XPATH, 
-                    "//td[contains(text(), 'Regulation')]/following-sibling::td").text.strip()
-            except:
-                data['regulation'] = ''
-            
-            try:
-                data['gender'] = self.driver.find_element(By.XPATH, 
-                    "//td[contains(text(), 'Gender')]/following-sibling::td").text.strip()
-            except:
-                data['gender'] = ''
-            
-            try:
-                data['dob'] = self.driver.find_element(By.XPATH, 
-                    "//td[contains(text(), 'Date of Birth')]/following-sibling::td").text.strip()
-            except:
-                data['dob'] = ''
-            
-            try:
-                data['branch'] = self.driver.find_element(By.XPATH, 
-                    "//td[contains(text(), 'Branch')]/following-sibling::td").text.strip()
-            except:
-                data['branch'] = ''
-            
-            # Extract courses
-            courses = []
-            try:
-                marks_table = self.driver.find_element(By.XPATH, 
-                    "//table[.//th[contains(text(), 'COURSE NAME') or contains(text(), 'Course Name')]]")
-                rows = marks_table.find_elements(By.TAG_NAME, "tr")[1:]
-                
-                for row in rows:
-                    cols = row.find_elements(By.TAG_NAME, "td")
-                    if len(cols) >= 4:
-                        course_data = {
-                            'semester': cols[0].text.strip() if len(cols) > 0 else '',
-                            'course_code': cols[1].text.strip() if len(cols) > 1 else '',
-                            'course_name': cols[2].text.strip() if len(cols) > 2 else '',
-                            'grade': cols[3].text.strip() if len(cols) > 3 else '',
-                            'gp': cols[4].text.strip() if len(cols) > 4 else '',
-                            'result': cols[5].text.strip() if len(cols) > 5 else ''
-                        }
-                        if course_data['course_name']:
-                            courses.append(course_data)
-                
-                logger.info(f"✓ Extracted {len(courses)} courses")
-            except Exception as e:
-                logger.warning(f"Could not extract courses: {e}")
-            
-            data['courses'] = courses
+            if self.extraction_mode == 'script':
+                # Header fields and course table in one round trip
+                data = extract_marksheet_script(self.driver)
+                logger.info(f"✓ Extracted {len(data['courses'])} courses")
+            else:
+                data = self._extract_marksheet_elements()
             logger.info(f"✓ Extracted marksheet data")
             
         except Exception as e:
@@ -382,42 +659,182 @@ class KITPortalAutomation:
         
         return data
     
-    def navigate_to_profile(self) -> bool:
-        """Navigate to profile details page"""
+    def _extract_marksheet_elements(self) -> Dict:
+        """Element-by-element marksheet extraction (one WebDriver call per field and cell)"""
+        data = {}
+        # Extract basic info
+        for key, label in MARKSHEET_FIELDS.items():
+            elem = self.waits.find_optional(f"marksheet {label}", (By.XPATH,
+                f"//td[contains(text(), '{label}')]/following-sibling::td"))
+            data[key] = elem.text.strip() if elem else ''
+        
+        # Extract courses
+        courses = []
         try:
-            time.sleep(2)
+            marks_table = self.waits.find_optional('course table', (By.XPATH,
+                "//table[.//th[contains(text(), 'COURSE NAME') or contains(text(), 'Course Name')]]"))
+            if not marks_table:
+                raise NoSuchElementException("course table not found")
+            rows = marks_table.find_elements(By.TAG_NAME, "tr")[1:]
             
-            # Click profile area
+            for row in rows:
+                cols = row.find_elements(By.TAG_NAME, "td")
+                if len(cols) >= 4:
+                    course_data = {
+                        'semester': cols[0].text.strip() if len(cols) > 0 else '',
+                        'course_code': cols[1].text.strip() if len(cols) > 1 else '',
+                        'course_name': cols[2].text.strip() if len(cols) > 2 else '',
+                        'grade': cols[3].text.strip() if len(cols) > 3 else '',
+                        'gp': cols[4].text.strip() if len(cols) > 4 else '',
+                        'result': cols[5].text.strip() if len(cols) > 5 else ''
+                    }
+                    if course_data['course_name']:
+                        courses.append(course_data)
+            
+            logger.info(f"✓ Extracted {len(courses)} courses")
+        except Exception as e:
+            logger.warning(f"Could not extract courses: {e}")
+        
+        data['courses'] = courses
+        return data
+    
+    def compare_marksheet_extraction(self, repeats: int = 3) -> Dict[str, float]:
+        """
+        Time script vs element-by-element extraction on the current Results page
+        
+        Returns:
+            Average seconds per extraction for each mode
+        """
+        timings = {}
+        results = {}
+        for mode, extract in (('elements', self._extract_marksheet_elements),
+                              ('script', lambda: extract_marksheet_script(self.driver))):
+            start = time.perf_counter()
+            for _ in range(repeats):
+                results[mode] = extract()
+            timings[mode] = (time.perf_counter() - start) / repeats
+        
+        courses = len(results['script'].get('courses', []))
+        logger.info(f"⏱️ Marksheet extraction ({courses} courses, {repeats} runs): "
+                    f"elements {timings['elements'] * 1000:.0f}ms, script {timings['script'] * 1000:.0f}ms "
+                    f"({timings['elements'] / max(timings['script'], 1e-9):.1f}x)")
+        if results['script'] != results['elements']:
+            logger.warning("⚠️ Script and element extraction returned different data")
+        return timings
+    
+    def _load_learned_urls(self) -> Dict:
+        """Portal URLs learned in earlier runs"""
+        try:
+            with open(self.learned_urls_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def _is_learnable_profile_url(self, url: str) -> bool:
+        """
+        Only a plain Usersprofile URL on the portal host is reused for other students:
+        a query, path parameters or anything after Usersprofile could name one user
+        """
+        parsed = urlparse(url)
+        return (parsed.netloc == urlparse(self.portal_root).netloc
+                and not (parsed.query or parsed.params or parsed.fragment)
+                and parsed.path.rstrip('/').endswith('/Usersprofile'))
+    
+    def _learn_profile_url(self, url: str):
+        """Remember where the click path landed so later students (and runs) go there directly"""
+        if url == self.profile_url:
+            return
+        if not self._is_learnable_profile_url(url):
+            logger.info(f"Not remembering profile URL {url} (query or path parameters)")
+            return
+        logger.info(f"📌 Learned profile URL: {url}")
+        self.profile_url = url
+        learned = self._load_learned_urls()
+        learned['profile_url'] = url
+        try:
+            with open(self.learned_urls_path, 'w') as f:
+                json.dump(learned, f, indent=2)
+        except OSError as e:
+            logger.warning(f"Could not save learned URLs: {e}")
+    
+    def _count_profile_nav(self, kind: str):
+        with self._stats_lock:
+            self.profile_nav_stats[kind] += 1
+            state = self._direct_profile_state
+            if kind == 'direct':
+                state['consecutive_fallbacks'] = 0
+                return
+            state['consecutive_fallbacks'] += 1
+            if state['consecutive_fallbacks'] >= self.direct_profile_max_fallbacks and not state['disabled']:
+                state['disabled'] = True
+                logger.warning(f"⚠️ Direct profile URL failed {state['consecutive_fallbacks']} times in a row - "
+                               f"using the menu for the rest of the run")
+    
+    def _use_direct_profile(self) -> bool:
+        with self._stats_lock:
+            return self.direct_profile and not self._direct_profile_state['disabled']
+    
+    def navigate_to_profile(self, roll_number: Optional[str] = None) -> bool:
+        """
+        Navigate to profile details page (direct URL, menu clicks as fallback)
+        
+        Args:
+            roll_number: Logged-in student; a direct load is only accepted if the
+                profile page shows this roll number
+        """
+        if self._use_direct_profile():
+            problem = "did not show the Edit User form"
             try:
-                profile_elem = WebDriverWait(self.driver, 10).until(
-                    EC.element_to_be_clickable((By.XPATH, 
-                        "//*[contains(@class, 'profile') or contains(text(), 'STUDENTS')]"))
-                )
-                self.driver.execute_script("arguments[0].click();", profile_elem)
-                logger.info("✓ Clicked profile area")
-            except:
+                self.driver.get(self.profile_url)
+                if self.waits.element_present('profile_page',
+                        (By.XPATH, "//*[contains(text(), 'Edit User')]")):
+                    if roll_number is None or profile_belongs_to(self.driver.page_source, roll_number):
+                        self._count_profile_nav('direct')
+                        logger.info("✓ Profile page loaded (direct)")
+                        return True
+                    problem = f"showed a profile without {roll_number}"
+            except Exception as e:
+                logger.warning(f"Direct profile load failed: {e}")
+            
+            self._count_profile_nav('fallback')
+            logger.warning(f"⚠️ {self.profile_url} {problem} - using the menu")
+            self.driver.get(self.results_url)
+        
+        return self._navigate_to_profile_clicks()
+    
+    def _navigate_to_profile_clicks(self) -> bool:
+        """Navigate to profile details page through the profile menu"""
+        try:
+            # Click profile area
+            profile_elem = self.waits.element_clickable('profile_menu',
+                (By.XPATH, "//*[contains(@class, 'profile') or contains(text(), 'STUDENTS')]"))
+            if not profile_elem:
                 logger.error("❌ Could not click profile")
                 return False
+            self.driver.execute_script("arguments[0].click();", profile_elem)
+            logger.info("✓ Clicked profile area")
             
-            time.sleep(2)
-            
-            # Click Profile Details
-            try:
-                profile_link = WebDriverWait(self.driver, 10).until(
-                    EC.element_to_be_clickable((By.XPATH, 
-                        "//a[contains(text(), 'Profile Details')]"))
-                )
-                self.driver.execute_script("arguments[0].click();", profile_link)
-                logger.info("✓ Clicked Profile Details")
-            except:
+            # Click Profile Details (appears once the menu opens)
+            profile_link = self.waits.element_clickable('profile_menu',
+                (By.XPATH, "//a[contains(text(), 'Profile Details')]"))
+            if not profile_link:
                 logger.error("❌ Could not click Profile Details")
                 return False
+            self.driver.execute_script("arguments[0].click();", profile_link)
+            logger.info("✓ Clicked Profile Details")
             
-            time.sleep(3)
+            # Wait for the profile page instead of sleeping
+            self.waits.until('profile_page', any_of(
+                EC.url_contains("Usersprofile"),
+                EC.presence_of_element_located((By.XPATH, "//*[contains(text(), 'Edit User')]"))
+            ))
+            self.waits.document_ready('profile_page')
             
             # Verify profile page loaded
             if "Usersprofile" in self.driver.current_url or "Edit User" in self.driver.page_source:
                 logger.info("✓ Profile page loaded")
+                if self._use_direct_profile() and "Usersprofile" in self.driver.current_url:
+                    self._learn_profile_url(self.driver.current_url)
                 return True
             else:
                 logger.error("❌ Profile page not loaded")
@@ -427,57 +844,65 @@ class KITPortalAutomation:
             logger.error(f"Error navigating to profile: {e}")
             return False
     
-    def extract_profile_data(self, roll_number: str) -> Dict:
-        """Extract profile data and download photo"""
+    def _parse_profile_page(self, roll_number: str, page_html: str, cookies: Dict[str, str]) -> Dict:
+        """Parse a profile page_source and queue the photo download (html mode, worker thread)"""
+        data = parse_profile_html(page_html)
+        data['photo_url'] = absolute_url(self.portal_root, data['photo_url'])
+        self.hand_off_photo(roll_number, data['photo_url'], cookies)
+        return data
+    
+    def hand_off_photo(self, roll_number: str, photo_url: Optional[str], cookies: Dict[str, str]) -> bool:
+        """
+        Queue a student's photo download; the background stage then logs that
+        portal session out with the same cookies (download -> logout), so the
+        caller moves on to the next student without waiting for either
+        
+        Returns:
+            True if queued - the caller drops its session instead of logging out
+        """
+        if not photo_url:
+            return False
+        self.photos.submit(roll_number, photo_url, cookies, logout_url=self.logout_url)
+        return True
+    
+    def extract_profile_data(self, roll_number: str) -> Union[Dict, Future]:
+        """
+        Extract profile data and queue the photo download
+        
+        Returns:
+            Profile dict, or a Future of it in html mode (parsed off the browser thread)
+        """
         data = {}
         try:
-            time.sleep(2)
+            # Wait for the profile form inputs to render
+            self.waits.element_present('profile_page', (By.XPATH, "//input[preceding-sibling::label]"))
             
-            # Download photo
-            try:
-                photo_elem = self.driver.find_element(By.XPATH, 
-                    "//img[contains(@src, 'upload') or contains(@class, 'profile')]")
-                photo_url = photo_elem.get_attribute('src')
-                
-                if not photo_url.startswith('http'):
-                    base = 'https://portal.kitcbe.com'
-                    photo_url = base + ('/' if not photo_url.startswith('/') else '') + photo_url
+            if self.page_archive is not None or self.extraction_mode == 'html':
+                page_html = self.driver.page_source
+                self.archive_page(roll_number, 'profile', page_html)
+                if self.extraction_mode == 'html':
+                    cookies = {c['name']: c['value'] for c in self.driver.get_cookies()}
+                    return self.parse_executor.submit(self._parse_profile_page, roll_number, page_html, cookies)
+            
+            if self.extraction_mode == 'script':
+                # All form fields and the photo src in one round trip
+                data = extract_profile_script(self.driver)
+            else:
+                photo_elem = self.waits.find_optional('profile photo', (By.XPATH,
+                    "//img[contains(@src, 'upload') or contains(@class, 'profile')]"))
+                data['photo_url'] = photo_elem.get_attribute('src') if photo_elem else None
                 
-                response = requests.get(photo_url, timeout=10)
-                if response.status_code == 200:
-                    photo_path = self.photos_dir / f"{roll_number}.jpg"
-                    with open(photo_path, 'wb') as f:
-                        f.write(response.content)
-                    data['photo_path'] = str(photo_path)
-                    logger.info(f"✓ Photo downloaded")
-                else:
-                    data['photo_path'] = None
-            except:
-                data['photo_path'] = None
-            
-            # Extract form fields
-            form_fields = {
-                'first_name': "First Name",
-                'last_name': "Last Name",
-                'blood_group': "Blood Group",
-                'mobile': "Mobile Number",
-                'email': "Email",
-                'alternative_mobile': "Alternative Mobile Number",
-                'alternative_email': "Alternative Email",
-                'community': "Community",
-                'caste': "Caste",
-                'religion': "Religion",
-                'nationality': "Nationality",
-            }
-            
-            for key, label in form_fields.items():
-                try:
-                    elem = self.driver.find_element(By.XPATH, 
-                        f"//input[preceding-sibling::label[contains(text(), '{label}')]]")
-                    value = elem.get_attribute('value')
+                for key, label in PROFILE_FIELDS.items():
+                    elem = self.waits.find_optional(f"profile {label}", (By.XPATH,
+                        f"//input[preceding-sibling::label[contains(text(), '{label}')]]"))
+                    value = elem.get_attribute('value') if elem else None
                     data[key] = value.strip() if value else ''
-                except:
-                    data[key] = ''
+            
+            data['photo_url'] = absolute_url(self.portal_root, data['photo_url'])
+            if data['photo_url']:
+                cookies = {c['name']: c['value'] for c in self.driver.get_cookies()}
+                self.hand_off_photo(roll_number, data['photo_url'], cookies)
+                logger.info(f"✓ Photo download queued")
             
             logger.info(f"✓ Profile data extracted")
             
@@ -489,25 +914,21 @@ class KITPortalAutomation:
     def logout(self):
         """Logout from portal"""
         try:
-            time.sleep(1)
-            
-            try:
-                profile_elem = self.driver.find_element(By.XPATH, 
-                    "//*[contains(@class, 'profile')]")
+            profile_elem = self.waits.find_optional('logout profile menu', (By.XPATH,
+                "//*[contains(@class, 'profile')]"))
+            if profile_elem:
                 self.driver.execute_script("arguments[0].click();", profile_elem)
-                time.sleep(1)
-            except:
-                pass
             
-            try:
-                logout_link = self.driver.find_element(By.XPATH, 
-                    "//a[contains(text(), 'Logout')]")
+            logged_in_url = self.driver.current_url
+            logout_link = self.waits.element_clickable('logout',
+                (By.XPATH, "//a[contains(text(), 'Logout')]"))
+            if logout_link:
                 self.driver.execute_script("arguments[0].click();", logout_link)
-                time.sleep(2)
+                self.waits.url_changes('logout', logged_in_url)
                 logger.info("✓ Logged out")
-            except:
-                self.driver.get("https://portal.kitcbe.com/index.php/Login/logout")
-                time.sleep(2)
+            else:
+                self.driver.get(self.logout_url)
+            self.waits.document_ready('logout')
             
         except Exception as e:
             logger.warning(f"Logout error: {e}")
@@ -522,24 +943,35 @@ class KITPortalAutomation:
         
         try:
             # Login
-            if not self.login(roll_number):
+            logged_in = self.login(roll_number)
+            student_data['login_cycles'] = self.last_login_cycles
+            if not logged_in:
                 student_data['status'] = 'Login Failed'
                 return student_data
             
             # Extract marksheet
-            marksheet_data = self.extract_marksheet_data()
-            student_data.update(marksheet_data)
+            marksheet_data = self.extract_marksheet_data(roll_number)
             
             # Navigate to profile
-            if self.navigate_to_profile():
+            profile_data = {}
+            if self.navigate_to_profile(roll_number):
                 profile_data = self.extract_profile_data(roll_number)
-                student_data.update(profile_data)
                 student_data['status'] = 'Success'
             else:
                 student_data['status'] = 'Profile Navigation Failed'
             
-            # Logout
-            self.logout()
+            # Logout: with a photo queued (in html mode by the profile parse) the
+            # download stage logs this session out over HTTP once the photo is in,
+            # so the browser only drops its cookies and moves on to the next login
+            profile_data = self._resolve(profile_data)
+            if profile_data.get('photo_url'):
+                self.driver.delete_all_cookies()
+            else:
+                self.logout()
+            
+            # In html mode the Results page was parsed while the browser navigated and logged out
+            student_data.update(self._resolve(marksheet_data))
+            student_data.update(profile_data)
             
             logger.info(f"✅ Successfully processed {roll_number}")
             
@@ -559,122 +991,162 @@ class KITPortalAutomation:
         logger.info(f"Generated {len(roll_numbers)} roll numbers")
         return roll_numbers
     
-    def save_to_excel(self, all_data: List[Dict], output_file: str):
-        """Save data to Excel with photos"""
+    def thumbnail_builder(self) -> ThumbnailBuilder:
+        """ThumbnailBuilder configured from the "excel" section"""
+        excel_config = self.config.get('excel', {})
+        return ThumbnailBuilder(
+            excel_config.get('thumbnail_cache', self.output_dir / "thumbnail_cache"),
+            workers=excel_config.get('thumbnail_workers')
+        )
+    
+    def save_to_excel(self, all_data: List[Dict], output_file: str,
+                      thumbnails: Optional[ThumbnailBuilder] = None):
+        """
+        Save data to Excel with photos (one write-only pass over all_data)
+        
+        Args:
+            all_data: Student records
+            output_file: Workbook file name inside the output directory
+            thumbnails: Builder already fed during the run (photos not yet
+                submitted to it are added now)
+        """
         logger.info("Saving to Excel...")
         
-        rows = []
-        for student in all_data:
-            row = {
-                'Roll Number': student.get('roll_number', ''),
-                'Status': student.get('status', ''),
-                'Name': student.get('name', ''),
-                'Register Number': student.get('register_number', ''),
-                'First Name': student.get('first_name', ''),
-                'Last Name': student.get('last_name', ''),
-                'Gender': student.get('gender', ''),
-                'DOB': student.get('dob', ''),
-                'Blood Group': student.get('blood_group', ''),
-                'Branch': student.get('branch', ''),
-                'Regulation': student.get('regulation', ''),
-                'Mobile': student.get('mobile', ''),
-                'Email': student.get('email', ''),
-                'Alternative Mobile': student.get('alternative_mobile', ''),
-                'Alternative Email': student.get('alternative_email', ''),
-                'Community': student.get('community', ''),
-                'Caste': student.get('caste', ''),
-                'Religion': student.get('religion', ''),
-                'Nationality': student.get('nationality', ''),
-                'Photo Path': student.get('photo_path', ''),
-            }
-            
-            # Add courses
-            courses = student.get('courses', [])
-            for idx, course in enumerate(courses, 1):
-                row[f'Course {idx} Name'] = course.get('course_name', '')
-                row[f'Course {idx} Code'] = course.get('course_code', '')
-                row[f'Course {idx} Grade'] = course.get('grade', '')
-            
-            rows.append(row)
-        
-        df = pd.DataFrame(rows)
-        output_path = self.output_dir / output_file
+        owned = thumbnails is None
+        if owned:
+            thumbnails = self.thumbnail_builder()
+        try:
+            photos = thumbnails.build(student.get('photo_path') for student in all_data)
+        finally:
+            if owned:
+                thumbnails.close()
+        thumbnails.log_report()
         
-        df.to_excel(output_path, index=False, engine='openpyxl')
-        logger.info(f"✓ Excel file created")
+        output_path = self.output_dir / output_file
+        writer = StreamingExcelWriter(output_path, max_course_count(all_data))
+        for student in all_data:
+            writer.write_record(student, photos.get(student.get('photo_path')))
+        writer.close()
         
-        # Embed photos
-        try:
-            wb = load_workbook(output_path)
-            ws = wb.active
-            
-            ws.insert_cols(1)
-            ws.cell(1, 1, 'Photo')
-            ws.column_dimensions['A'].width = 15
-            
-            for idx, student in enumerate(all_data, start=2):
-                photo_path = student.get('photo_path')
-                if photo_path and os.path.exists(photo_path):
-                    try:
-                        img = Image.open(photo_path)
-                        img.thumbnail((100, 100))
-                        temp_path = f"temp_{idx}.jpg"
-                        img.save(temp_path)
-                        
-                        xl_img = XLImage(temp_path)
-                        xl_img.width = 80
-                        xl_img.height = 80
-                        
-                        ws.add_image(xl_img, f'A{idx}')
-                        ws.row_dimensions[idx].height = 60
-                        
-                        os.remove(temp_path)
-                    except:
-                        pass
-            
-            wb.save(output_path)
-            logger.info(f"✓ Photos embedded")
-        except Exception as e:
-            logger.warning(f"Could not embed photos: {e}")
+        logger.info(f"✓ Excel file created ({writer.rows_written} rows, {writer.photos_embedded} photos embedded)")
         
         logger.info(f"✓ Saved to {output_path}")
         success = sum(1 for s in all_data if s.get('status') == 'Success')
         logger.info(f"✓ Successful: {success}/{len(all_data)}")
     
-    def run(self, department_key: str):
-        """Main execution"""
+    def run(self, department_key: str, resume: Optional[bool] = None):
+        """
+        Main execution
+        
+        Args:
+            department_key: Department to process
+            resume: Skip students already completed in the progress journal and retry
+                only the failed ones (default: config "resume", else False)
+        """
+        if resume is None:
+            resume = self.config.get('resume', False)
+        if self._closed:
+            # The previous run() closed them
+            self._open_resources()
+        
         logger.info("="*80)
         logger.info(f"KIT PORTAL AUTOMATION STARTED")
         logger.info(f"Department: {department_key}")
         logger.info(f"Time: {datetime.now()}")
         logger.info("="*80)
         
+        thumbnails = None
         try:
-            self.setup_driver()
-            
             dept_config = self.config['departments'][department_key]
             roll_numbers = self.generate_roll_numbers(dept_config)
             
-            all_data = []
-            success_count = 0
-            failed_count = 0
+            # Durable progress journal, written after every student; each photo
+            # is thumbnailed as soon as its record is journaled
+            journal = ProgressJournal(self.output_dir / f"{department_key}_progress.jsonl", resume=resume)
+            thumbnails = self.thumbnail_builder()
+            self.photos.on_photo = thumbnails.submit  # Photos land after their records
             
-            for idx, roll_number in enumerate(roll_numbers, 1):
-                logger.info(f"\nProgress: {idx}/{len(roll_numbers)}")
-                
-                student_data = self.process_student(roll_number)
-                all_data.append(student_data)
-                
-                if student_data.get('status') == 'Success':
-                    success_count += 1
-                else:
-                    failed_count += 1
+            def on_result(record: Dict):
+                journal.append(record)
+                thumbnails.submit(record.get('photo_path'))
+            completed = journal.completed() if resume else set()
+            pending = [roll for roll in roll_numbers if roll not in completed]
+            if resume:
+                logger.info(f"♻️ Resuming: {len(completed)} already completed, {len(pending)} to process")
+            
+            parallel = self.config.get('parallel', {})
+            workers = parallel.get('workers', 1)
+            engine = self.config.get('engine', 'selenium')
+            delay_between_students = self.config.get('waits', {}).get('between_students', 0)
+            
+            if engine in ('http', 'async'):
+                # No browser to launch - ready as soon as config is loaded
+                self.startup.mark_ready()
+            
+            if not pending:
+                logger.info("✓ Nothing left to process")
+            elif engine == 'http':
+                # No browser: pooled HTTP sessions
+                HTTPPortalScraper(self, workers).run(pending, on_result=on_result)
+            elif engine == 'async':
+                # No browser: asyncio sessions under a semaphore
+                scraper = AsyncPortalScraper(
+                    self,
+                    concurrency=parallel.get('concurrency', 50),
+                    captcha_threads=parallel.get('captcha_threads', 8)
+                )
+                scraper.run(pending, on_result=on_result)
+            elif engine == 'hybrid':
+                # Browser only for the CAPTCHA login; pages scraped over HTTP in the background
+                self.setup_driver()
+                scraper = HybridPortalScraper(self, fetch_workers=parallel.get('fetch_workers', 4))
+                scraper.run(pending, on_result=on_result)
+            elif workers > 1:
+                # Parallel: N independent Chrome workers on a shared queue
+                pool = BrowserWorkerPool(self, workers, delay_between_students)
+                pool.run(pending, on_result=on_result)
+            else:
+                self.setup_driver()
                 
-                time.sleep(2)
+                for idx, roll_number in enumerate(pending, 1):
+                    logger.info(f"\nProgress: {idx}/{len(pending)}")
+                    
+                    student_data = self.process_student(roll_number)
+                    on_result(student_data)
+                    
+                    if delay_between_students:
+                        time.sleep(delay_between_students)
+            
+            # Final workbook is built from the journal (includes earlier runs when resuming)
+            all_data = journal.records(roll_numbers)
+            
+            # Retry failed photo downloads and journal the new photo paths
+            for record in self.photos.collect(all_data):
+                on_result(record)
+            
+            self.startup.log_report()
+            self.wait_stats.log_report()
+            self.http.log_report()
+            self.photos.log_report()
+            if any(self.profile_nav_stats.values()):
+                logger.info(f"👤 Profile page: {self.profile_nav_stats['direct']} direct, "
+                            f"{self.profile_nav_stats['fallback']} menu fallbacks"
+                            f"{' (direct URL switched off)' if self._direct_profile_state['disabled'] else ''}")
+            self.captcha_solver.log_report()
+            self.login_cycles.log_report()
+            if self.captcha_recorder:
+                self.captcha_recorder.log_report()
+            if self.captcha_cache:
+                self.captcha_cache.log_report()
+            if isinstance(self.google_vision_solver, VisionBatchCollector):
+                self.google_vision_solver.log_report()
+            
+            success_count = sum(1 for s in all_data if s.get('status') == 'Success')
+            failed_count = len(all_data) - success_count
             
             # Save to Excel
             output_filename = f"{department_key}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-            self.save_to_excel(all_data, output_filename)
+            self.save_to_excel(all_data, output_filename, thumbnails)
             
             # Summary
             logger.info("\n" + "="*80)
@@ -688,9 +1160,33 @@ class KITPortalAutomation:
         finally:
             if self.driver:
                 self.driver.quit()
+                self.driver = None
                 logger.info("Browser closed")
+            if thumbnails is not None:
+                self.photos.on_photo = None
+                thumbnails.close()
+            self.close()
+    
+    def close(self):
+        """
+        Stop background threads and close the on-disk caches (end of run)
+        
+        Safe to call more than once; the next run() opens everything again.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        if self.parse_executor:
+            self.parse_executor.shutdown(wait=True)
+        self.photos.close()
+        if self.captcha_cache:
+            self.captcha_cache.close()
+        self.captcha_solver.close()
+        if isinstance(self.google_vision_solver, VisionBatchCollector):
+            self.google_vision_solver.close()
 
 
 if __name__ == "__main__":
+    configure_logging()
     automation = KITPortalAutomation("config.json")
     automation.run("aids")  # Change to "cse" for other departments
\ No newline at end of file
@@ -0,0 +1,195 @@
+"""
+CAPTCHA Answer Cache
+Content-hash cache of CAPTCHA answers that led to a successful login.
+Bounded LRU in memory, SQLite on disk (shared across runs and workers).
+"""
+
+import io
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Union
+
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+
+def content_hash(image_bytes: bytes) -> str:
+    """SHA-256 of the raw image bytes"""
+    return hashlib.sha256(image_bytes).hexdigest()
+
+
+def perceptual_hash(image_bytes: bytes) -> Optional[str]:
+    """
+    256-bit difference hash (dHash) of the text area, as hex - stable across
+    re-encodes and small rendering differences of the same CAPTCHA
+    """
+    try:
+        img = Image.open(io.BytesIO(image_bytes)).convert('L')
+    except Exception:
+        return None
+
+    # Crop to the drawn content so mostly-blank images don't all hash alike
+    bbox = ImageOps.autocontrast(ImageOps.invert(img)).point(lambda p: 255 if p > 128 else 0).getbbox()
+    if bbox:
+        img = img.crop(bbox)
+    img = img.resize((17, 16), Image.BILINEAR)
+
+    pixels = list(img.getdata())
+    value = 0
+    for row in range(16):
+        for col in range(16):
+            left = pixels[row * 17 + col]
+            right = pixels[row * 17 + col + 1]
+            value = (value << 1) | (1 if left > right else 0)
+    return f"{value:064x}"
+
+
+def hamming_distance(a: str, b: str) -> int:
+    """Number of differing bits between two hex hashes"""
+    return bin(int(a, 16) ^ int(b, 16)).count('1')
+
+
+class CaptchaCache:
+    """Cache of confirmed CAPTCHA answers keyed on image content"""
+
+    def __init__(self, db_path: Union[str, Path] = "captcha_cache.sqlite", max_entries: int = 2048,
+                 use_perceptual: bool = False, max_distance: int = 8):
+        """
+        Args:
+            db_path: SQLite file shared across runs
+            max_entries: Size of the in-memory LRU
+            use_perceptual: Also match near-duplicate renders by perceptual hash
+            max_distance: Maximum dHash Hamming distance (of 256 bits) for a near-duplicate match
+        """
+        self.max_entries = max_entries
+        self.use_perceptual = use_perceptual
+        self.max_distance = max_distance
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._memory: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(db_path), check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS answers (
+                hash TEXT PRIMARY KEY,
+                phash TEXT,
+                answer TEXT NOT NULL,
+                successes INTEGER NOT NULL DEFAULT 1,
+                updated REAL NOT NULL
+            )
+        """)
+        self._db.commit()
+
+    def _remember(self, key: str, answer: str):
+        """Insert into the in-memory LRU (caller holds the lock)"""
+        self._memory[key] = answer
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def lookup(self, image_bytes: bytes) -> Optional[str]:
+        """
+        Find a confirmed answer for this image
+
+        Returns:
+            Cached answer or None
+        """
+        key = content_hash(image_bytes)
+
+        with self._lock:
+            answer = self._memory.get(key)
+            if answer is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return answer
+
+            row = self._db.execute("SELECT answer FROM answers WHERE hash = ?", (key,)).fetchone()
+            if row:
+                self._remember(key, row[0])
+                self.hits += 1
+                return row[0]
+
+            if self.use_perceptual:
+                phash = perceptual_hash(image_bytes)
+                if phash is not None:
+                    best = None
+                    for answer, other in self._db.execute(
+                            "SELECT answer, phash FROM answers WHERE phash IS NOT NULL"):
+                        distance = hamming_distance(phash, other)
+                        if distance <= self.max_distance and (best is None or distance < best[0]):
+                            best = (distance, answer)
+                    if best:
+                        self.near_hits += 1
+                        return best[1]
+
+            self.misses += 1
+            return None
+
+    def record_success(self, image_bytes: bytes, answer: str):
+        """Store an answer that led to a successful login"""
+        key = content_hash(image_bytes)
+        phash = perceptual_hash(image_bytes) if self.use_perceptual else None
+
+        with self._lock:
+            self._remember(key, answer)
+            self._db.execute("""
+                INSERT INTO answers (hash, phash, answer, successes, updated) VALUES (?, ?, ?, 1, ?)
+                ON CONFLICT(hash) DO UPDATE SET
+                    answer = excluded.answer, successes = successes + 1, updated = excluded.updated
+            """, (key, phash, answer, time.time()))
+            self._db.commit()
+
+    def evict(self, image_bytes: bytes, answer: Optional[str] = None):
+        """
+        Drop an answer that failed to log in
+
+        Args:
+            image_bytes: CAPTCHA image
+            answer: Wrong answer; near-duplicate entries with this answer are dropped too
+        """
+        key = content_hash(image_bytes)
+
+        with self._lock:
+            removed = self._memory.pop(key, None) is not None
+            cursor = self._db.execute("DELETE FROM answers WHERE hash = ?", (key,))
+            removed = removed or cursor.rowcount > 0
+
+            if answer and self.use_perceptual:
+                phash = perceptual_hash(image_bytes)
+                if phash is not None:
+                    for other_key, other in self._db.execute(
+                            "SELECT hash, phash FROM answers WHERE answer = ? AND phash IS NOT NULL",
+                            (answer,)).fetchall():
+                        if hamming_distance(phash, other) <= self.max_distance:
+                            self._db.execute("DELETE FROM answers WHERE hash = ?", (other_key,))
+                            self._memory.pop(other_key, None)
+                            removed = True
+
+            self._db.commit()
+            if removed:
+                self.evictions += 1
+
+    def size(self) -> int:
+        """Number of answers on disk"""
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+
+    def log_report(self):
+        """Log hit/miss counters"""
+        logger.info(f"🗃️ CAPTCHA cache: {self.hits} hits, {self.near_hits} near-duplicate hits, "
+                    f"{self.misses} misses, {self.evictions} evictions, {self.size()} answers stored")
+
+    def close(self):
+        """Close the SQLite connection"""
+        with self._lock:
+            self._db.close()
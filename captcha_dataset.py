@@ -0,0 +1,267 @@
+"""
+CAPTCHA Dataset Recorder & Solver Benchmark
+Records every CAPTCHA seen during a run (image, each solver's answer, login
+outcome) as a labelled dataset, and replays datasets through every solver
+to compare accuracy, latency and throughput
+"""
+
+import sys
+import json
+import time
+import hashlib
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Union
+
+from captcha_solvers import CaptchaSolver, percentile
+
+logger = logging.getLogger(__name__)
+
+
+def _extension(image_bytes: bytes) -> str:
+    if image_bytes.startswith(b'\x89PNG'):
+        return 'png'
+    if image_bytes.startswith(b'\xff\xd8'):
+        return 'jpg'
+    return 'img'
+
+
+class CaptchaRecorder:
+    """
+    Append-only CAPTCHA dataset: images plus a labels.jsonl manifest
+
+    Each manifest line is one solve attempt:
+        {"file", "label", "submitted", "success", "answers": {solver: answer}, "recorded"}
+    `label` is only set when the submitted answer logged in, so the manifest
+    can be read directly by captcha_preprocess.load_labelled_images and used
+    to train captcha_model.
+    """
+
+    def __init__(self, directory: Union[str, Path]):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.manifest_path = self.directory / "labels.jsonl"
+        self.recorded = 0
+        self.labelled = 0
+        self._pending: Dict[str, Dict[str, Optional[str]]] = {}
+        self._lock = threading.Lock()
+
+    def track(self, image_bytes: bytes) -> Dict[str, Optional[str]]:
+        """
+        Start an attempt; solvers fill the returned dict with their answers
+
+        Slower solvers may still be adding answers when the outcome is recorded.
+        """
+        answers: Dict[str, Optional[str]] = {}
+        with self._lock:
+            self._pending[hashlib.sha256(image_bytes).hexdigest()] = answers
+        return answers
+
+    def record(self, image_bytes: bytes, submitted: Optional[str], success: Optional[bool]):
+        """
+        Finish an attempt
+
+        Args:
+            image_bytes: CAPTCHA image as solved
+            submitted: Answer sent to the portal (None if nothing was submitted)
+            success: Login outcome (None if nothing was submitted)
+        """
+        digest = hashlib.sha256(image_bytes).hexdigest()
+        filename = f"{digest[:20]}.{_extension(image_bytes)}"
+        with self._lock:
+            answers = dict(self._pending.pop(digest, {}))
+            image_path = self.directory / filename
+            if not image_path.exists():
+                image_path.write_bytes(image_bytes)
+            entry = {
+                'file': filename,
+                'label': submitted if success else None,
+                'submitted': submitted,
+                'success': success,
+                'answers': answers,
+                'recorded': datetime.now().isoformat(timespec='seconds'),
+            }
+            with open(self.manifest_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry) + "\n")
+            self.recorded += 1
+            self.labelled += int(bool(success))
+
+    def log_report(self):
+        if self.recorded:
+            logger.info(f"🗂️ CAPTCHA dataset: {self.recorded} attempts recorded "
+                        f"({self.labelled} labelled by a successful login) in {self.directory}")
+
+
+def load_dataset(directory: Union[str, Path], labelled_only: bool = True) -> List[Dict]:
+    """
+    Read a recorded dataset, one entry per image
+
+    Returns:
+        Dicts with 'label', 'image' (bytes) and 'answers' (recorded solver answers);
+        a labelled attempt wins over unlabelled attempts of the same image
+    """
+    directory = Path(directory)
+    entries: Dict[str, Dict] = {}
+    with open(directory / "labels.jsonl", 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if entry['file'] in entries and not entry.get('label'):
+                continue
+            entries[entry['file']] = entry
+
+    samples = []
+    for filename, entry in entries.items():
+        if labelled_only and not entry.get('label'):
+            continue
+        samples.append({
+            'label': entry.get('label'),
+            'image': (directory / filename).read_bytes(),
+            'answers': entry.get('answers') or {},
+        })
+    return samples
+
+
+def benchmark_solvers(samples: List[Dict], solvers: List[CaptchaSolver], threads: int = 1,
+                      preprocess: Optional[Callable[[bytes], bytes]] = None,
+                      scored_on: Optional[Dict[str, List[int]]] = None) -> Dict[str, Dict]:
+    """
+    Replay labelled samples through each solver
+
+    Args:
+        samples: load_dataset() entries (label and image)
+        solvers: Solvers to compare
+        threads: Concurrent solves per solver (throughput under load)
+        preprocess: Image clean-up applied once up front (as with captcha.preprocess on)
+        scored_on: Sample indices per solver name (default: all samples), e.g. only
+            the samples with a recorded answer for a replayed solver
+
+    Returns:
+        Per solver: images (scored on), answered, correct, accuracy (None if no
+        images), p50/p95 seconds, solves per second
+    """
+    images = [preprocess(sample['image']) if preprocess else sample['image'] for sample in samples]
+    results = {}
+    for solver in solvers:
+        indices = (scored_on or {}).get(solver.name, range(len(samples)))
+        latencies = {idx: 0.0 for idx in indices}
+        answers: Dict[int, Optional[str]] = {idx: None for idx in indices}
+
+        def _solve(idx):
+            start = time.perf_counter()
+            try:
+                answers[idx] = solver.solve(images[idx])
+            except Exception as e:
+                logger.warning(f"⚠️ {solver.name} error: {e}")
+            latencies[idx] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(1, threads), thread_name_prefix='bench') as executor:
+            list(executor.map(_solve, answers))
+        wall = time.perf_counter() - start
+
+        correct = sum(1 for idx, answer in answers.items()
+                      if answer and answer.lower() == samples[idx]['label'].lower())
+        answered = sum(1 for answer in answers.values() if answer)
+        results[solver.name] = {
+            'images': len(answers),
+            'answered': answered,
+            'correct': correct,
+            'accuracy': correct / len(answers) if answers else None,
+            'p50': percentile(list(latencies.values()), 50),
+            'p95': percentile(list(latencies.values()), 95),
+            'throughput': len(answers) / wall if answers and wall else 0.0,
+        }
+    return results
+
+
+def log_benchmark(results: Dict[str, Dict], threads: int = 1):
+    """Log a benchmark_solvers() table (each solver's accuracy is over the images it was scored on)"""
+    if not results:
+        logger.warning("⚠️ No solvers benchmarked")
+        return
+    logger.info(f"📊 CAPTCHA solver benchmark: {threads} concurrent")
+    logger.info(f"   {'solver':<10}{'scored on':>10}{'answered':>10}{'correct':>9}{'accuracy':>10}"
+                f"{'p50 ms':>9}{'p95 ms':>9}{'solves/s':>10}")
+    ranked = sorted(results.items(), key=lambda item: -1 if item[1]['accuracy'] is None else item[1]['accuracy'],
+                    reverse=True)
+    for name, entry in ranked:
+        if not entry['images']:
+            logger.info(f"   {name:<10}{0:>10}{'n/a':>10}{'n/a':>9}{'n/a':>10}{'n/a':>9}{'n/a':>9}{'n/a':>10}")
+            continue
+        logger.info(f"   {name:<10}{entry['images']:>10}{entry['answered']:>10}{entry['correct']:>9}"
+                    f"{entry['accuracy'] * 100:>9.1f}%{entry['p50'] * 1000:>9.1f}{entry['p95'] * 1000:>9.1f}"
+                    f"{entry['throughput']:>10.1f}")
+
+
+def _option(name: str, default: Optional[str] = None) -> Optional[str]:
+    """Value following --name on the command line"""
+    if name in sys.argv:
+        index = sys.argv.index(name)
+        if index + 1 < len(sys.argv):
+            return sys.argv[index + 1]
+    return default
+
+
+if __name__ == "__main__":
+    # Usage: python captcha_dataset.py <dataset_dir> [--model captcha_model.npz] [--threads 4]
+    #                                  [--vision-latency-ms 300] [--synthetic 200] [--preprocess] [--no-easyocr]
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if len(sys.argv) < 2:
+        print("Usage: python captcha_dataset.py <dataset_dir> [--model captcha_model.npz] [--threads N] "
+              "[--vision-latency-ms MS] [--synthetic N] [--preprocess] [--no-easyocr]")
+        sys.exit(1)
+
+    from captcha_preprocess import preprocess as preprocess_captcha
+    from captcha_solvers import easyocr_solver, local_model_solver, vision_solver
+    from google_vision_captcha import GoogleVisionCaptchaSolver
+    from mock_vision_server import MockVisionServer
+
+    threads = int(_option('--threads', '1'))
+    preprocess = preprocess_captcha if '--preprocess' in sys.argv else None
+
+    if _option('--synthetic'):
+        from captcha_synth import generate_samples
+        samples = [{'label': label, 'image': image, 'answers': {}}
+                   for label, image in generate_samples(int(_option('--synthetic')), seed=2)]
+    else:
+        samples = load_dataset(sys.argv[1])
+    if not samples:
+        print("No labelled CAPTCHAs in the dataset")
+        sys.exit(1)
+
+    # Vision stand-in replays recorded Vision answers only; Vision is scored on just
+    # those samples (n/a on synthetic sets) - never on the label itself
+    vision_answers = {}
+    vision_scored = []
+    for idx, sample in enumerate(samples):
+        if sample['answers'].get('vision'):
+            image = preprocess(sample['image']) if preprocess else sample['image']
+            vision_answers[hashlib.sha256(image).hexdigest()] = sample['answers']['vision']
+            vision_scored.append(idx)
+
+    solvers = []
+    model_path = _option('--model')
+    if model_path:
+        from captcha_model import load_model
+        model = load_model(model_path)
+        if model:
+            solvers.append(local_model_solver(model))
+    if '--no-easyocr' not in sys.argv:
+        try:
+            import easyocr  # noqa: F401
+            from startup import LazyEasyOCRReader
+            solvers.append(easyocr_solver(LazyEasyOCRReader(['en'], gpu=False)))
+        except ImportError:
+            logger.warning("⚠️ EasyOCR not installed - skipping it")
+
+    latency = float(_option('--vision-latency-ms', '300')) / 1000
+    with MockVisionServer(answers=vision_answers, latency=latency) as server:
+        solvers.append(vision_solver(GoogleVisionCaptchaSolver("benchmark", endpoint=server.endpoint)))
+        logging.getLogger('google_vision_captcha').setLevel(logging.WARNING)
+        log_benchmark(benchmark_solvers(samples, solvers, threads, preprocess,
+                                        scored_on={'vision': vision_scored}), threads)
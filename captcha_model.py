@@ -0,0 +1,226 @@
+"""
+Local CAPTCHA Model
+Per-character template matching trained on this portal's CAPTCHA style.
+Solves on CPU in a few milliseconds with no network access.
+"""
+
+import sys
+import time
+import random
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+from PIL import Image
+
+from captcha_preprocess import load_labelled_images, preprocess_array
+
+logger = logging.getLogger(__name__)
+
+GLYPH_SIZE = 16
+
+
+def _runs(mask: np.ndarray) -> List[Tuple[int, int]]:
+    """[start, end) spans of consecutive True values"""
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return list(zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)))
+
+
+def segment(ink: np.ndarray, char_width: float) -> List[np.ndarray]:
+    """
+    Split an ink mask into character masks
+
+    Columns with ink form runs; runs wider than one character (touching
+    glyphs) are cut at the emptiest column near each expected boundary.
+    """
+    projection = ink.sum(axis=0)
+    glyphs = []
+    for start, end in _runs(projection > 0):
+        if end - start < 2 or projection[start:end].sum() < 8:
+            continue  # Leftover speckle
+        pieces = max(1, int(round((end - start) / char_width)))
+        cuts = [start]
+        slack = max(1, int(char_width / 4))
+        for k in range(1, pieces):
+            target = int(start + k * (end - start) / pieces)
+            lo, hi = max(cuts[-1] + 1, target - slack), min(end - 1, target + slack + 1)
+            cuts.append(lo + int(np.argmin(projection[lo:hi])) if hi > lo else target)
+        cuts.append(end)
+        for left, right in zip(cuts, cuts[1:]):
+            glyph = ink[:, left:right]
+            rows = np.flatnonzero(glyph.any(axis=1))
+            if rows.size:
+                glyphs.append(glyph[rows[0]:rows[-1] + 1])
+    return glyphs
+
+
+def glyph_vector(glyph: np.ndarray) -> np.ndarray:
+    """Pad to square, resize to GLYPH_SIZE and normalise to a zero-mean unit vector"""
+    h, w = glyph.shape
+    side = max(h, w)
+    square = np.zeros((side, side), dtype=np.uint8)
+    top, left = (side - h) // 2, (side - w) // 2
+    square[top:top + h, left:left + w] = glyph * 255
+    resized = Image.fromarray(square).resize((GLYPH_SIZE, GLYPH_SIZE), Image.BILINEAR)
+    vector = np.asarray(resized, dtype=np.float32).ravel()
+    vector -= vector.mean()
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class CaptchaTemplateModel:
+    """
+    Nearest-template character classifier
+
+    Each character of a training CAPTCHA becomes a template; a new glyph is
+    labelled with its most similar template (cosine similarity). Confidence is
+    the margin between the best and the runner-up character; an answer is only
+    returned when every character clears `min_margin`, so doubtful images fall
+    through to the other solvers.
+    """
+
+    def __init__(self, templates: np.ndarray, labels: np.ndarray, char_width: float,
+                 min_margin: float = 0.02):
+        # Templates are grouped by character (labels sorted)
+        order = np.argsort(labels, kind='stable')
+        self.templates = templates[order].astype(np.float32)
+        self.labels = labels[order]
+        self.char_width = float(char_width)
+        self.min_margin = min_margin
+        self.classes, self._class_starts = np.unique(self.labels, return_index=True)
+
+    @classmethod
+    def train(cls, samples: List[Tuple[str, bytes]], max_templates_per_char: int = 400,
+              seed: int = 0, min_margin: float = 0.02) -> 'CaptchaTemplateModel':
+        """
+        Build templates from labelled CAPTCHAs
+
+        Images whose segmentation doesn't yield one glyph per label character
+        are skipped.
+        """
+        masks = []
+        for label, image in samples:
+            try:
+                masks.append((label.upper(), preprocess_array(image)))
+            except Exception as e:
+                logger.warning(f"⚠️ Skipping unreadable training image ({label}): {e}")
+
+        # Typical character width: inked columns per character
+        widths = [mask.any(axis=0).sum() / len(label) for label, mask in masks if label]
+        if not widths:
+            raise ValueError("No usable training images")
+        char_width = float(np.median(widths))
+
+        per_char: Dict[str, List[np.ndarray]] = {}
+        used = 0
+        for label, mask in masks:
+            glyphs = segment(mask, char_width)
+            if len(glyphs) != len(label):
+                continue
+            used += 1
+            for char, glyph in zip(label, glyphs):
+                per_char.setdefault(char, []).append(glyph_vector(glyph))
+
+        rng = random.Random(seed)
+        templates, labels = [], []
+        for char, vectors in sorted(per_char.items()):
+            if len(vectors) > max_templates_per_char:
+                vectors = rng.sample(vectors, max_templates_per_char)
+            templates.extend(vectors)
+            labels.extend(char * len(vectors))
+
+        logger.info(f"🧠 Trained on {used}/{len(samples)} images: {len(templates)} templates, "
+                    f"{len(per_char)} characters, char width {char_width:.1f}px")
+        return cls(np.array(templates), np.array(labels), char_width, min_margin)
+
+    @classmethod
+    def load(cls, path: Union[str, Path], min_margin: float = 0.02) -> 'CaptchaTemplateModel':
+        with np.load(path) as data:
+            return cls(data['templates'], data['labels'], float(data['char_width']), min_margin)
+
+    def save(self, path: Union[str, Path]):
+        np.savez_compressed(path, templates=self.templates, labels=self.labels,
+                            char_width=np.float32(self.char_width))
+        logger.info(f"💾 Model saved to {path}")
+
+    def predict(self, image_bytes: bytes) -> Tuple[str, float]:
+        """
+        Returns:
+            (answer, smallest best-vs-runner-up margin over its characters)
+        """
+        glyphs = segment(preprocess_array(image_bytes), self.char_width)
+        if not glyphs:
+            return '', 0.0
+        scores = np.stack([glyph_vector(glyph) for glyph in glyphs]) @ self.templates.T
+        # Best template score per character class
+        class_scores = np.maximum.reduceat(scores, self._class_starts, axis=1)
+        ranked = np.sort(class_scores, axis=1)
+        answer = ''.join(self.classes[class_scores.argmax(axis=1)])
+        margin = float((ranked[:, -1] - ranked[:, -2]).min()) if len(self.classes) > 1 else 1.0
+        return answer, margin
+
+    def solve(self, image_bytes: bytes) -> Optional[str]:
+        """Answer, or None if any character is below min_margin"""
+        answer, margin = self.predict(image_bytes)
+        return answer if answer and margin >= self.min_margin else None
+
+    def evaluate(self, samples: List[Tuple[str, bytes]]) -> Dict[str, float]:
+        """Accuracy (over all images), answer rate, precision of answers and ms per solve"""
+        correct = answered = 0
+        start = time.perf_counter()
+        for label, image in samples:
+            answer = self.solve(image)
+            answered += int(answer is not None)
+            correct += int(answer is not None and answer.upper() == label.upper())
+        elapsed = time.perf_counter() - start
+        total = max(1, len(samples))
+        return {
+            'accuracy': correct / total,
+            'answered': answered / total,
+            'precision': correct / max(1, answered),
+            'ms_per_solve': elapsed * 1000 / total,
+        }
+
+
+def load_model(path: Union[str, Path], min_margin: float = 0.02) -> Optional[CaptchaTemplateModel]:
+    """Load a trained model, or None (with a warning) if the file is missing"""
+    if not Path(path).exists():
+        logger.warning(f"⚠️ Local CAPTCHA model not found: {path}")
+        return None
+    model = CaptchaTemplateModel.load(path, min_margin)
+    logger.info(f"🧠 Local CAPTCHA model loaded ({len(model.labels)} templates)")
+    return model
+
+
+if __name__ == "__main__":
+    # Usage:
+    #   python captcha_model.py train <model.npz> <labelled_dir> [<labelled_dir> ...]
+    #   python captcha_model.py test <model.npz> <labelled_dir>
+    #   python captcha_model.py synthetic <model.npz> [train_count] [test_count]
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if len(sys.argv) < 3 or sys.argv[1] not in ('train', 'test', 'synthetic'):
+        print("Usage: python captcha_model.py train|test|synthetic <model.npz> [args]")
+        sys.exit(1)
+
+    command, model_path = sys.argv[1], sys.argv[2]
+    if command == 'train':
+        samples = [sample for directory in sys.argv[3:] for sample in load_labelled_images(directory)]
+        CaptchaTemplateModel.train(samples).save(model_path)
+        sys.exit(0)
+
+    if command == 'synthetic':
+        from captcha_synth import generate_samples
+        train_count = int(sys.argv[3]) if len(sys.argv) > 3 else 3000
+        test_count = int(sys.argv[4]) if len(sys.argv) > 4 else 200
+        model = CaptchaTemplateModel.train(generate_samples(train_count, seed=1))
+        model.save(model_path)
+        test_samples = generate_samples(test_count, seed=2)
+    else:
+        model = CaptchaTemplateModel.load(model_path)
+        test_samples = load_labelled_images(sys.argv[3])
+
+    result = model.evaluate(test_samples)
+    logger.info(f"🧪 {len(test_samples)} images: accuracy {result['accuracy'] * 100:.1f}%, "
+                f"answered {result['answered'] * 100:.1f}%, precision {result['precision'] * 100:.1f}%, "
+                f"{result['ms_per_solve']:.2f} ms per solve")
@@ -0,0 +1,202 @@
+"""
+CAPTCHA Image Preprocessing
+NumPy clean-up applied before every OCR solver: grayscale, adaptive
+threshold, noise-line removal and crop to the text
+"""
+
+import io
+import sys
+import json
+import time
+import logging
+from pathlib import Path
+from typing import Dict, List, Tuple, Union
+
+import numpy as np
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+
+def _box_mean(values: np.ndarray, radius: int) -> np.ndarray:
+    """Mean over a (2r+1)x(2r+1) window using an integral image (edges replicated)"""
+    padded = np.pad(values, radius + 1, mode='edge').astype(np.float64)
+    integral = padded.cumsum(axis=0).cumsum(axis=1)
+    size = 2 * radius + 1
+    total = (integral[size:, size:] - integral[:-size, size:]
+             - integral[size:, :-size] + integral[:-size, :-size])
+    return total[:values.shape[0], :values.shape[1]] / (size * size)
+
+
+def _neighbour_count(mask: np.ndarray) -> np.ndarray:
+    """Number of set pixels in each 3x3 neighbourhood (including the pixel itself)"""
+    padded = np.pad(mask.astype(np.uint8), 1)
+    h, w = mask.shape
+    return sum(padded[dy:dy + h, dx:dx + w] for dy in range(3) for dx in range(3))
+
+
+def binarize(gray: np.ndarray, radius: int = 7, offset: float = 10) -> np.ndarray:
+    """
+    Adaptive threshold: ink is darker than its local mean by more than `offset`
+
+    Light-on-dark images are inverted first, so ink is always True.
+    """
+    gray = gray.astype(np.float64)
+    if np.median(gray) < 128:
+        gray = 255 - gray
+    return gray < _box_mean(gray, radius) - offset
+
+
+def remove_noise_lines(ink: np.ndarray, min_neighbours: int = 4, passes: int = 2) -> np.ndarray:
+    """
+    Drop thin strokes and speckles
+
+    Pixels of a 1px line have at most 3 set pixels in their 3x3 neighbourhood;
+    glyph strokes are thicker and keep 5+.
+    """
+    for _ in range(passes):
+        ink = ink & (_neighbour_count(ink) >= min_neighbours)
+    return ink
+
+
+def crop_to_text(ink: np.ndarray, padding: int = 4, min_fraction: float = 0.02) -> np.ndarray:
+    """Crop to rows/columns holding a meaningful amount of ink, plus padding"""
+    rows = np.flatnonzero(ink.sum(axis=1) > max(1, min_fraction * ink.shape[1]))
+    cols = np.flatnonzero(ink.sum(axis=0) > max(1, min_fraction * ink.shape[0]))
+    if rows.size == 0 or cols.size == 0:
+        return ink
+    top, bottom = max(0, rows[0] - padding), min(ink.shape[0], rows[-1] + padding + 1)
+    left, right = max(0, cols[0] - padding), min(ink.shape[1], cols[-1] + padding + 1)
+    return ink[top:bottom, left:right]
+
+
+def preprocess_array(image_bytes: bytes) -> np.ndarray:
+    """Decode and clean a CAPTCHA; returns the boolean ink mask (True = text)"""
+    gray = np.asarray(Image.open(io.BytesIO(image_bytes)).convert('L'))
+    if ((gray == 0) | (gray == 255)).all():
+        # Already cleaned by preprocess() (solvers may receive either form)
+        return crop_to_text(gray < 128)
+    ink = remove_noise_lines(binarize(gray))
+    return crop_to_text(ink)
+
+
+def preprocess(image_bytes: bytes) -> bytes:
+    """
+    Clean a CAPTCHA for OCR
+
+    Returns:
+        Black-on-white 1-bit PNG bytes (the original bytes if the image can't be decoded)
+    """
+    try:
+        ink = preprocess_array(image_bytes)
+    except Exception as e:
+        logger.warning(f"⚠️ CAPTCHA preprocessing failed, using raw image: {e}")
+        return image_bytes
+
+    img = Image.fromarray(np.where(ink, 0, 255).astype(np.uint8)).convert('1')
+    buffer = io.BytesIO()
+    img.save(buffer, format='PNG', optimize=True)
+    return buffer.getvalue()
+
+
+def load_labelled_images(directory: Union[str, Path]) -> List[Tuple[str, bytes]]:
+    """
+    Load a labelled CAPTCHA set
+
+    Uses labels.jsonl ({"file": ..., "label": ...} per line) when present,
+    otherwise the file name up to the first underscore is the label
+    (e.g. AB12C_0007.png).
+    """
+    directory = Path(directory)
+    manifest = directory / "labels.jsonl"
+    samples = []
+    if manifest.exists():
+        with open(manifest, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    if entry.get('label'):
+                        samples.append((entry['label'], (directory / entry['file']).read_bytes()))
+        return samples
+
+    for path in sorted(directory.iterdir()):
+        if path.suffix.lower() in ('.png', '.jpg', '.jpeg'):
+            samples.append((path.stem.split('_')[0], path.read_bytes()))
+    return samples
+
+
+def benchmark(samples: List[Tuple[str, bytes]], solvers: List) -> Dict[str, Dict]:
+    """
+    First-try accuracy and payload size, raw vs preprocessed
+
+    Args:
+        samples: (label, image bytes) pairs
+        solvers: captcha_solvers.CaptchaSolver instances
+
+    Returns:
+        {"<solver>/<raw|preprocessed>": {"accuracy", "correct", "total"}, "payload": {...}}
+    """
+    prepared = [(label, image, preprocess(image)) for label, image in samples]
+    results: Dict[str, Dict] = {
+        'payload': {
+            'raw_bytes': sum(len(raw) for _, raw, _ in prepared) / max(1, len(prepared)),
+            'preprocessed_bytes': sum(len(clean) for _, _, clean in prepared) / max(1, len(prepared)),
+        }
+    }
+
+    for solver in solvers:
+        for variant, index in (('raw', 1), ('preprocessed', 2)):
+            correct = 0
+            start = time.monotonic()
+            for sample in prepared:
+                try:
+                    answer = solver.solve(sample[index])
+                except Exception as e:
+                    logger.warning(f"⚠️ {solver.name} error: {e}")
+                    answer = None
+                correct += int(bool(answer) and answer.lower() == sample[0].lower())
+            results[f"{solver.name}/{variant}"] = {
+                'correct': correct,
+                'total': len(prepared),
+                'accuracy': correct / max(1, len(prepared)),
+                'seconds': time.monotonic() - start,
+            }
+    return results
+
+
+def log_benchmark(results: Dict[str, Dict]):
+    """Log a benchmark() result table"""
+    payload = results['payload']
+    saved = 1 - payload['preprocessed_bytes'] / max(1, payload['raw_bytes'])
+    logger.info(f"📦 Payload: raw {payload['raw_bytes']:.0f} B, preprocessed "
+                f"{payload['preprocessed_bytes']:.0f} B ({saved * 100:.0f}% smaller)")
+    for name, entry in results.items():
+        if name == 'payload':
+            continue
+        logger.info(f"   {name:<24}{entry['correct']:>5}/{entry['total']:<5}"
+                    f"{entry['accuracy'] * 100:>6.1f}%  {entry['seconds']:.1f}s")
+
+
+if __name__ == "__main__":
+    # Usage: python captcha_preprocess.py <labelled_dir> [google_vision_api_key]
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if len(sys.argv) < 2:
+        print("Usage: python captcha_preprocess.py <labelled_dir> [google_vision_api_key]")
+        sys.exit(1)
+
+    from captcha_solvers import easyocr_solver, vision_solver
+    from startup import LazyEasyOCRReader
+
+    solvers = []
+    if len(sys.argv) > 2:
+        from google_vision_captcha import GoogleVisionCaptchaSolver
+        solvers.append(vision_solver(GoogleVisionCaptchaSolver(sys.argv[2])))
+    try:
+        import easyocr  # noqa: F401
+        solvers.append(easyocr_solver(LazyEasyOCRReader(['en'], gpu=False)))
+    except ImportError:
+        logger.warning("⚠️ EasyOCR not installed - skipping it")
+
+    samples = load_labelled_images(sys.argv[1])
+    logger.info(f"🧪 Benchmarking preprocessing on {len(samples)} labelled CAPTCHAs")
+    log_benchmark(benchmark(samples, solvers))
@@ -0,0 +1,399 @@
+"""
+CAPTCHA Solver Orchestration
+Runs the local model, Google Vision and EasyOCR side by side on the same image
+bytes; the first valid answer wins. Keeps per-solver latency, validity and win-rate stats.
+"""
+
+import re
+import time
+import logging
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def clean_answer(text: Optional[str]) -> Optional[str]:
+    """Strip everything but letters and digits; None unless 3-7 characters remain"""
+    if not text:
+        return None
+    text = re.sub(r'[^A-Za-z0-9]', '', text)
+    return text if 3 <= len(text) <= 7 else None
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile (0 for an empty list)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+class CaptchaSolver:
+    """
+    A named solver: callable taking image bytes and returning a cleaned answer or None
+
+    `max_concurrency` sizes its own thread pool in HedgedCaptchaSolver. A
+    `skip_when_busy` solver sits out a race when all its threads are already
+    working rather than queueing behind them. A `needs_agreement` solver's
+    answer only wins once another solver confirms it (or no other solver
+    produced an answer at all).
+    """
+
+    def __init__(self, name: str, solve: Callable[[bytes], Optional[str]],
+                 max_concurrency: int = 4, skip_when_busy: bool = False,
+                 needs_agreement: bool = False):
+        self.name = name
+        self._solve = solve
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.skip_when_busy = skip_when_busy
+        self.needs_agreement = needs_agreement
+
+    def solve(self, image_bytes: bytes) -> Optional[str]:
+        return clean_answer(self._solve(image_bytes))
+
+
+def vision_solver(vision) -> CaptchaSolver:
+    """Wrap a GoogleVisionCaptchaSolver (or VisionBatchCollector); network bound, so many in flight"""
+    return CaptchaSolver('vision', vision.solve_captcha, max_concurrency=16)
+
+
+def local_model_solver(model, needs_agreement: bool = True) -> CaptchaSolver:
+    """
+    Wrap a trained captcha_model.CaptchaTemplateModel
+
+    Args:
+        needs_agreement: Only trust its answer once another solver gives the same
+            one (the template model answers first but is far less precise)
+    """
+    return CaptchaSolver('local', model.solve, max_concurrency=2, needs_agreement=needs_agreement)
+
+
+def easyocr_solver(reader, skip_when_busy: bool = True) -> CaptchaSolver:
+    """
+    Wrap an EasyOCR reader (LazyEasyOCRReader serializes reads, so one at a time)
+
+    Args:
+        skip_when_busy: Sit out races while a read is running (turn off when
+            EasyOCR is the only real solver, e.g. without a Vision key)
+    """
+    return CaptchaSolver('easyocr', lambda image: ''.join(reader.readtext(image, detail=0)).strip(),
+                         max_concurrency=1, skip_when_busy=skip_when_busy)
+
+
+class SolverStats:
+    """Thread-safe per-solver call, validity, win and latency counters"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._solvers: Dict[str, Dict] = {}
+        self.agreements = 0
+        self.disagreements = 0
+        self.unconfirmed = 0
+
+    def record(self, name: str, elapsed: float, valid: bool):
+        with self._lock:
+            entry = self._entry(name)
+            entry['calls'] += 1
+            entry['valid'] += int(valid)
+            entry['latencies'].append(elapsed)
+
+    def _entry(self, name: str) -> Dict:
+        return self._solvers.setdefault(name, {'calls': 0, 'valid': 0, 'wins': 0, 'skipped': 0,
+                                               'cancelled': 0, 'latencies': []})
+
+    def record_win(self, name: str):
+        with self._lock:
+            self._entry(name)['wins'] += 1
+
+    def record_skip(self, name: str):
+        """Solver left out of a race because its threads were all busy"""
+        with self._lock:
+            self._entry(name)['skipped'] += 1
+
+    def record_cancel(self, name: str):
+        """Queued solve dropped because another solver had already won"""
+        with self._lock:
+            self._entry(name)['cancelled'] += 1
+
+    def record_unconfirmed(self):
+        """needs_agreement answer used because no other solver answered"""
+        with self._lock:
+            self.unconfirmed += 1
+
+    def record_agreement(self, agreed: bool):
+        with self._lock:
+            if agreed:
+                self.agreements += 1
+            else:
+                self.disagreements += 1
+
+    def summary(self) -> Dict[str, Dict]:
+        """Per-solver calls, valid answers, wins, win rate, skips, cancellations and p50/p95 latency"""
+        with self._lock:
+            solvers = {name: dict(entry, latencies=list(entry['latencies']))
+                       for name, entry in self._solvers.items()}
+        total_wins = sum(entry['wins'] for entry in solvers.values())
+        summary = {}
+        for name, entry in solvers.items():
+            summary[name] = {
+                'calls': entry['calls'],
+                'valid': entry['valid'],
+                'wins': entry['wins'],
+                'win_rate': entry['wins'] / total_wins if total_wins else 0.0,
+                'skipped': entry['skipped'],
+                'cancelled': entry['cancelled'],
+                'p50': percentile(entry['latencies'], 50),
+                'p95': percentile(entry['latencies'], 95),
+            }
+        return summary
+
+    def log_report(self):
+        """Log per-solver latency and win rate"""
+        summary = self.summary()
+        if not summary:
+            return
+        logger.info("🧩 CAPTCHA solvers:")
+        logger.info(f"   {'solver':<10}{'calls':>7}{'valid':>7}{'wins':>7}{'win %':>7}{'p50 ms':>9}{'p95 ms':>9}"
+                    f"{'skipped':>9}{'cancelled':>11}")
+        for name, entry in sorted(summary.items(), key=lambda item: item[1]['wins'], reverse=True):
+            logger.info(f"   {name:<10}{entry['calls']:>7}{entry['valid']:>7}{entry['wins']:>7}"
+                        f"{entry['win_rate'] * 100:>7.0f}{entry['p50'] * 1000:>9.0f}{entry['p95'] * 1000:>9.0f}"
+                        f"{entry['skipped']:>9}{entry['cancelled']:>11}")
+        if self.agreements or self.disagreements:
+            logger.info(f"   Both answered within the agreement window: {self.agreements} agreed, "
+                        f"{self.disagreements} disagreed")
+        if self.unconfirmed:
+            logger.info(f"   Unconfirmed answers used (no other solver answered): {self.unconfirmed}")
+
+
+class LoginCycleStats:
+    """Thread-safe count of login cycles (CAPTCHA submissions) per student and CAPTCHA refreshes"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.cycles_per_success: Dict[int, int] = {}
+        self.failed = 0
+        self.failed_cycles = 0
+        self.refreshes = {'in_place': 0, 'reload': 0}
+
+    def record(self, cycles: int, success: bool):
+        with self._lock:
+            if success:
+                self.cycles_per_success[cycles] = self.cycles_per_success.get(cycles, 0) + 1
+            else:
+                self.failed += 1
+                self.failed_cycles += cycles
+
+    def record_refresh(self, kind: str):
+        with self._lock:
+            self.refreshes[kind] += 1
+
+    def log_report(self):
+        """Log the cycles-per-success histogram and refresh counts"""
+        with self._lock:
+            histogram = dict(self.cycles_per_success)
+            failed, failed_cycles = self.failed, self.failed_cycles
+            refreshes = dict(self.refreshes)
+        successes = sum(histogram.values())
+        if not successes and not failed:
+            return
+        average = sum(cycles * count for cycles, count in histogram.items()) / max(1, successes)
+        breakdown = ', '.join(f"{cycles}: {count}" for cycles, count in sorted(histogram.items()))
+        logger.info(f"🔁 Login cycles per success: avg {average:.2f} ({breakdown or 'none'}); "
+                    f"{failed} students failed after {failed_cycles} cycles")
+        if any(refreshes.values()):
+            logger.info(f"   CAPTCHA refreshes: {refreshes['in_place']} in place, "
+                        f"{refreshes['reload']} page reloads")
+
+
+class HedgedCaptchaSolver:
+    """
+    Run every solver concurrently on the same image; first valid answer wins
+
+    A valid answer from a `needs_agreement` solver (the local model) is held
+    rather than winning: the first valid answer from any other solver wins
+    instead (the two are compared as usual), and the held answer is only used
+    when no other solver produces one.
+
+    Each solver has its own small thread pool (started on first use, so the
+    solver can be used again after close()), so a slow or serialized solver
+    (EasyOCR) can never hold the threads a fast one needs. Once a winner is
+    known, losers still queued are cancelled; losers already running finish
+    in the background so their latency and validity are still recorded. A
+    `skip_when_busy` solver whose threads are all working is left out of the
+    race instead of queueing. If another solver answers within
+    `agreement_window` seconds of the winner, the answers are compared
+    (without delaying the winning answer).
+    With hedge=False the solvers are tried one after another in order.
+    An optional `preprocess` callable cleans the image once before any solver sees it.
+    """
+
+    def __init__(self, solvers: List[CaptchaSolver], hedge: bool = True,
+                 agreement_window: float = 0.25,
+                 preprocess: Optional[Callable[[bytes], bytes]] = None):
+        """
+        Args:
+            solvers: Solvers in preference order
+            hedge: Run all solvers at once (False: sequential fallback)
+            agreement_window: Seconds to wait after the winner for a second opinion
+            preprocess: Image clean-up applied before solving (e.g. captcha_preprocess.preprocess)
+        """
+        self.solvers = solvers
+        self.hedge = hedge and len(solvers) > 1
+        self.agreement_window = agreement_window
+        self.preprocess = preprocess
+        self.stats = SolverStats()
+        self._executors: Dict[str, ThreadPoolExecutor] = {}
+        self._in_flight = {solver.name: 0 for solver in solvers}
+        self._lock = threading.Lock()
+
+    def _run(self, solver: CaptchaSolver, image_bytes: bytes,
+             answers: Optional[Dict[str, Optional[str]]] = None) -> Optional[str]:
+        start = time.monotonic()
+        try:
+            answer = solver.solve(image_bytes)
+        except Exception as e:
+            logger.warning(f"⚠️ {solver.name} error: {e}")
+            answer = None
+        self.stats.record(solver.name, time.monotonic() - start, answer is not None)
+        if answers is not None:
+            answers[solver.name] = answer
+        return answer
+
+    def _submit(self, solver: CaptchaSolver, image_bytes: bytes,
+                answers: Optional[Dict[str, Optional[str]]]) -> Future:
+        """Queue one solve on the solver's own pool, tracking how many are queued or running"""
+        with self._lock:
+            self._in_flight[solver.name] += 1
+            executor = self._executors.get(solver.name)
+            if executor is None:
+                executor = self._executors[solver.name] = ThreadPoolExecutor(
+                    max_workers=solver.max_concurrency, thread_name_prefix=f'captcha-{solver.name}')
+
+        def _release(_future):
+            with self._lock:
+                self._in_flight[solver.name] -= 1
+
+        future = executor.submit(self._run, solver, image_bytes, answers)
+        future.add_done_callback(_release)
+        return future
+
+    def _racers(self) -> List[CaptchaSolver]:
+        """Solvers taking part in this race (busy skip_when_busy solvers sit out, unless none would be left)"""
+        with self._lock:
+            racers = [solver for solver in self.solvers
+                      if not (solver.skip_when_busy and self._in_flight[solver.name] >= solver.max_concurrency)]
+        if not racers:
+            return list(self.solvers)
+        for solver in self.solvers:
+            if solver not in racers:
+                self.stats.record_skip(solver.name)
+        return racers
+
+    def solve(self, image_bytes: bytes, answers: Optional[Dict[str, Optional[str]]] = None) -> Optional[str]:
+        """
+        Solve one CAPTCHA
+
+        Args:
+            image_bytes: CAPTCHA image
+            answers: Optional dict that receives every solver's answer by name,
+                including solvers that finish after the winner
+
+        Returns:
+            Winning answer or None if no solver produced a valid one
+        """
+        if self.preprocess:
+            image_bytes = self.preprocess(image_bytes)
+
+        if not self.hedge:
+            held = None
+            for solver in self.solvers:
+                answer = self._run(solver, image_bytes, answers)
+                if answer and solver.needs_agreement:
+                    held = held or (solver.name, answer)
+                elif answer:
+                    self.stats.record_win(solver.name)
+                    if held:
+                        agreed = held[1].lower() == answer.lower()
+                        self.stats.record_agreement(agreed)
+                        if not agreed:
+                            logger.warning(f"⚠️ Solvers disagree: {solver.name} '{answer}' vs {held[0]} '{held[1]}'")
+                    logger.info(f"✅ {solver.name} solved: '{answer}'")
+                    return answer
+                else:
+                    logger.warning(f"⚠️ {solver.name} gave no valid answer")
+            return self._use_unconfirmed(held)
+
+        futures = {self._submit(solver, image_bytes, answers): solver for solver in self._racers()}
+        results = {}
+        pending = set(futures)
+        winner = None
+        while pending and winner is None:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[future] = future.result()
+            # Same-tick finishers: prefer the solver listed first
+            valid = [future for future in futures
+                     if future in done and results[future] and not futures[future].needs_agreement]
+            if valid:
+                winner = valid[0]
+
+        if winner is None:
+            held = next(((futures[future].name, results[future])
+                         for future in futures if results.get(future)), None)
+            return self._use_unconfirmed(held)
+
+        name, answer = futures[winner].name, results[winner]
+        self.stats.record_win(name)
+        logger.info(f"✅ {name} solved first: '{answer}'")
+
+        # Losers that haven't started yet would only hold a thread for a decided race
+        for future in pending:
+            if future.cancel():
+                self.stats.record_cancel(futures[future].name)
+
+        # Second opinion from solvers that finished in the same tick or finish
+        # within the agreement window (checked in callbacks, so nothing waits)
+        won_at = time.monotonic()
+
+        def _compare(future, late=True):
+            if future.cancelled():
+                return
+            other = future.result()
+            if not other or (late and time.monotonic() - won_at > self.agreement_window):
+                return
+            agreed = other.lower() == answer.lower()
+            self.stats.record_agreement(agreed)
+            if not agreed:
+                logger.warning(f"⚠️ Solvers disagree: {name} '{answer}' vs {futures[future].name} '{other}'")
+
+        for future in results:
+            if future is not winner:
+                _compare(future, late=False)
+        for future in pending:
+            future.add_done_callback(_compare)
+        return answer
+
+    def _use_unconfirmed(self, held) -> Optional[str]:
+        """Fall back to a held needs_agreement (name, answer) when no other solver answered"""
+        if not held:
+            logger.warning("⚠️ No solver produced a valid CAPTCHA answer")
+            return None
+        name, answer = held
+        self.stats.record_win(name)
+        self.stats.record_unconfirmed()
+        logger.info(f"✅ {name} solved (unconfirmed - no other solver answered): '{answer}'")
+        return answer
+
+    def close(self):
+        """Drop queued solves and stop the solver threads (the next solve starts new ones)"""
+        with self._lock:
+            executors, self._executors = list(self._executors.values()), {}
+        for executor in executors:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def log_report(self):
+        self.stats.log_report()
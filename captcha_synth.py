@@ -0,0 +1,99 @@
+"""
+Synthetic CAPTCHA Generator
+Portal-style CAPTCHAs (random text, jitter, noise lines and speckles) for
+offline benchmarking and training without touching the live portal
+"""
+
+import io
+import sys
+import json
+import random
+import string
+import logging
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+from PIL import Image, ImageDraw, ImageFont
+
+logger = logging.getLogger(__name__)
+
+# Characters the portal uses (no easily confused 0/O, 1/l/I)
+ALPHABET = ''.join(c for c in string.ascii_uppercase + string.digits if c not in '0O1I')
+
+IMAGE_SIZE = (150, 50)
+
+
+def random_text(rng: random.Random, min_length: int = 5, max_length: int = 6) -> str:
+    return ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(min_length, max_length)))
+
+
+def render_captcha(text: str, seed: Optional[int] = None, noise_lines: int = 3,
+                   speckles: int = 120, font_size: int = 28) -> bytes:
+    """
+    Render one CAPTCHA
+
+    Returns:
+        PNG bytes
+    """
+    rng = random.Random(seed)
+    width, height = IMAGE_SIZE
+    background = rng.randint(215, 250)
+    img = Image.new('L', IMAGE_SIZE, background)
+    draw = ImageDraw.Draw(img)
+    font = ImageFont.load_default(size=font_size)
+
+    x = rng.randint(4, 12)
+    for char in text:
+        glyph = Image.new('L', (font_size + 8, font_size + 12), 0)
+        ImageDraw.Draw(glyph).text((4, 2), char, fill=255, font=font,
+                                   stroke_width=1, stroke_fill=255)
+        glyph = glyph.rotate(rng.uniform(-15, 15), resample=Image.BILINEAR, expand=False)
+        ink = rng.randint(20, 90)
+        y = rng.randint(0, max(0, height - glyph.height + 4))
+        img.paste(Image.new('L', glyph.size, ink), (x, y), glyph)
+        x += int(font_size * 0.62) + rng.randint(-2, 2)
+
+    for _ in range(noise_lines):
+        draw.line([(rng.randint(0, width), rng.randint(0, height)),
+                   (rng.randint(0, width), rng.randint(0, height))],
+                  fill=rng.randint(40, 120), width=1)
+    for _ in range(speckles):
+        draw.point((rng.randrange(width), rng.randrange(height)), fill=rng.randint(0, 160))
+
+    buffer = io.BytesIO()
+    img.convert('RGB').save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def generate_samples(count: int, seed: int = 0) -> List[Tuple[str, bytes]]:
+    """(label, PNG bytes) pairs, reproducible for a given seed"""
+    rng = random.Random(seed)
+    samples = []
+    for _ in range(count):
+        text = random_text(rng)
+        samples.append((text, render_captcha(text, seed=rng.getrandbits(32))))
+    return samples
+
+
+def write_dataset(directory: Union[str, Path], count: int, seed: int = 0) -> Path:
+    """Write a labelled set (images plus labels.jsonl) readable by captcha_preprocess.load_labelled_images"""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    with open(directory / "labels.jsonl", 'w', encoding='utf-8') as manifest:
+        for idx, (label, image) in enumerate(generate_samples(count, seed)):
+            filename = f"{label}_{idx:05d}.png"
+            (directory / filename).write_bytes(image)
+            manifest.write(json.dumps({'file': filename, 'label': label}) + "\n")
+    logger.info(f"🖼️ Wrote {count} synthetic CAPTCHAs to {directory}")
+    return directory
+
+
+if __name__ == "__main__":
+    # Usage: python captcha_synth.py <out_dir> [count] [seed]
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if len(sys.argv) < 2:
+        print("Usage: python captcha_synth.py <out_dir> [count] [seed]")
+        sys.exit(1)
+    write_dataset(sys.argv[1],
+                  int(sys.argv[2]) if len(sys.argv) > 2 else 200,
+                  int(sys.argv[3]) if len(sys.argv) > 3 else 0)
@@ -0,0 +1,138 @@
+"""
+In-Browser Extraction Scripts
+Pull a whole page's data out of Chrome in one execute_script round trip,
+with no implicit-wait penalty for fields that are missing
+"""
+
+import logging
+from typing import Dict, Optional
+
+from portal_parser import COURSE_COLUMNS, MARKSHEET_FIELDS, PROFILE_FIELDS
+
+logger = logging.getLogger(__name__)
+
+
+# Same XPath selectors as the find_element path, evaluated inside the page.
+# innerText is what WebElement.text returns.
+MARKSHEET_SCRIPT = """
+const fields = arguments[0];
+const columns = arguments[1];
+
+function first(xpath) {
+    return document.evaluate(xpath, document, null,
+        XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+}
+function text(node) {
+    return node ? (node.innerText || '').trim() : '';
+}
+
+const data = {};
+for (const [key, label] of Object.entries(fields)) {
+    data[key] = text(first(`//td[contains(text(), '${label}')]/following-sibling::td`));
+}
+
+const table = first("//table[.//th[contains(text(), 'COURSE NAME') or contains(text(), 'Course Name')]]");
+const courses = [];
+if (table) {
+    const rows = Array.from(table.getElementsByTagName('tr')).slice(1);
+    for (const row of rows) {
+        const cells = Array.from(row.getElementsByTagName('td')).map(text);
+        if (cells.length < 4) continue;
+        const course = {};
+        columns.forEach((column, idx) => { course[column] = idx < cells.length ? cells[idx] : ''; });
+        if (course.course_name) courses.push(course);
+    }
+}
+return {fields: data, courses: courses, table_found: !!table};
+"""
+
+
+# Profile form fields and the photo src, same selectors as the find_element path.
+# Missing fields come back empty immediately (no implicit wait).
+PROFILE_SCRIPT = """
+const fields = arguments[0];
+
+function first(xpath) {
+    return document.evaluate(xpath, document, null,
+        XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+}
+
+const data = {};
+for (const [key, label] of Object.entries(fields)) {
+    const input = first(`//input[preceding-sibling::label[contains(text(), '${label}')]]`);
+    data[key] = input && input.value ? input.value.trim() : '';
+}
+const photo = first("//img[contains(@src, 'upload') or contains(@class, 'profile')]");
+return {fields: data, photo_src: photo ? photo.src : null};
+"""
+
+
+# Fetch a fresh login page with the browser's session cookies (which makes the
+# portal issue a new CAPTCHA for this session) and swap its CAPTCHA image and
+# hidden tokens into the current form. Username and password stay as typed.
+REFRESH_CAPTCHA_SCRIPT = """
+const loginUrl = arguments[0];
+const done = arguments[arguments.length - 1];
+const selector = "img[src*='captcha_images']";
+
+fetch(loginUrl, {credentials: 'same-origin', cache: 'no-store'})
+    .then(response => response.text())
+    .then(html => {
+        const fresh = new DOMParser().parseFromString(html, 'text/html');
+        const freshImg = fresh.querySelector(selector);
+        const img = document.querySelector(selector);
+        if (!freshImg || !img) { done(null); return; }
+        const src = new URL(freshImg.getAttribute('src'), loginUrl).href;
+        if (src === img.src) { done(null); return; }
+
+        for (const input of fresh.querySelectorAll("input[type='hidden'][name]")) {
+            const current = document.querySelector(`input[type='hidden'][name='${input.name}']`);
+            if (current) current.value = input.value;
+        }
+        const answer = document.getElementById('captcha');
+        if (answer) answer.value = '';
+
+        img.onload = () => done(img.src);
+        img.onerror = () => done(null);
+        img.src = src;
+    })
+    .catch(() => done(null));
+"""
+
+
+def extract_marksheet_script(driver) -> Dict:
+    """
+    Extract the Results page in a single execute_script call
+
+    Returns:
+        Dict with header fields and a 'courses' list, same shape as extract_marksheet_data
+    """
+    result = driver.execute_script(MARKSHEET_SCRIPT, MARKSHEET_FIELDS, COURSE_COLUMNS)
+    data = dict(result['fields'])
+    data['courses'] = result['courses']
+    if not result['table_found']:
+        logger.warning("Could not extract courses: course table not found")
+    return data
+
+
+def extract_profile_script(driver) -> Dict:
+    """
+    Extract the Usersprofile form in a single execute_script call
+
+    Returns:
+        Dict with profile fields and 'photo_url' (absolute, or None)
+    """
+    result = driver.execute_script(PROFILE_SCRIPT, PROFILE_FIELDS)
+    data = {'photo_url': result['photo_src'] or None}
+    data.update(result['fields'])
+    return data
+
+
+def refresh_captcha_script(driver, login_url: str) -> Optional[str]:
+    """
+    Replace the CAPTCHA on the current login form without reloading the page
+
+    Returns:
+        New CAPTCHA image URL once it has loaded, or None if it could not be refreshed
+    """
+    return driver.execute_async_script(REFRESH_CAPTCHA_SCRIPT, login_url)
@@ -0,0 +1,273 @@
+"""
+Streaming Excel Writer
+Single-pass openpyxl write-only workbook with the photo column, bounded memory,
+and parallel in-memory photo thumbnailing (as records arrive) with an on-disk resize cache
+"""
+
+import os
+import hashlib
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from openpyxl import Workbook
+from openpyxl.drawing.image import Image as XLImage
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+
+# (header, record key) in workbook column order, after the Photo column
+BASE_COLUMNS: List[Tuple[str, str]] = [
+    ('Roll Number', 'roll_number'),
+    ('Status', 'status'),
+    ('Name', 'name'),
+    ('Register Number', 'register_number'),
+    ('First Name', 'first_name'),
+    ('Last Name', 'last_name'),
+    ('Gender', 'gender'),
+    ('DOB', 'dob'),
+    ('Blood Group', 'blood_group'),
+    ('Branch', 'branch'),
+    ('Regulation', 'regulation'),
+    ('Mobile', 'mobile'),
+    ('Email', 'email'),
+    ('Alternative Mobile', 'alternative_mobile'),
+    ('Alternative Email', 'alternative_email'),
+    ('Community', 'community'),
+    ('Caste', 'caste'),
+    ('Religion', 'religion'),
+    ('Nationality', 'nationality'),
+    ('Photo Path', 'photo_path'),
+]
+
+# (header suffix, course key) repeated for each course
+COURSE_COLUMNS: List[Tuple[str, str]] = [
+    ('Name', 'course_name'),
+    ('Code', 'course_code'),
+    ('Grade', 'grade'),
+]
+
+THUMBNAIL_SIZE = (100, 100)
+PHOTO_CELL_SIZE = 80
+PHOTO_ROW_HEIGHT = 60
+
+
+def max_course_count(records: Iterable[Dict]) -> int:
+    """Largest number of courses on any record (sizes the course columns)"""
+    return max((len(record.get('courses') or []) for record in records), default=0)
+
+
+def make_thumbnail(photo_bytes: bytes) -> bytes:
+    """Resize a photo into in-memory JPEG bytes (runs in worker processes)"""
+    with Image.open(BytesIO(photo_bytes)) as img:
+        img = img.convert('RGB')
+        img.thumbnail(THUMBNAIL_SIZE)
+        buffer = BytesIO()
+        img.save(buffer, format='JPEG')
+    return buffer.getvalue()
+
+
+class ThumbnailBuilder:
+    """
+    Build photo thumbnails for the workbook as records arrive
+
+    submit() queues each photo as soon as its record is journaled, so resizing
+    overlaps the scrape; results() collects them when the workbook is written.
+    Resizing runs in a process pool (Pillow decode/encode is CPU bound) started
+    with the "spawn" method - forking once the downloader, solver and SQLite
+    threads are running can deadlock the children. Results are cached on disk
+    by the SHA-256 of the original photo, so unchanged photos are not
+    re-encoded on the next run.
+    """
+
+    def __init__(self, cache_dir: Union[str, Path], workers: Optional[int] = None):
+        """
+        Args:
+            cache_dir: Directory for cached thumbnails ({photo hash}.jpg)
+            workers: Resize processes (default: CPU count; 1 resizes inline)
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.workers = workers or os.cpu_count() or 1
+        self.cache_hits = 0
+        self.encoded = 0
+        self.failures: List[Tuple[str, str]] = []
+
+        self._thumbnails: Dict[str, bytes] = {}
+        self._pending: Dict[str, List[str]] = {}   # digest -> paths needing that thumbnail
+        self._futures: Dict[str, Future] = {}
+        self._seen: Set[str] = set()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _cache_path(self, digest: str) -> Path:
+        return self.cache_dir / f"{digest}.jpg"
+
+    def _store(self, digest: str, thumbnail: bytes):
+        """Write a cache entry atomically (safe if two runs overlap)"""
+        path = self._cache_path(digest)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_bytes(thumbnail)
+        os.replace(tmp_path, path)
+
+    def submit(self, photo_path: Optional[str]):
+        """Queue one photo (cache hits and repeats are resolved immediately; thread-safe)"""
+        if not photo_path:
+            return
+        with self._lock:
+            if photo_path in self._seen:
+                return
+            self._seen.add(photo_path)
+
+        try:
+            data = Path(photo_path).read_bytes()
+        except OSError as e:
+            with self._lock:
+                self.failures.append((photo_path, str(e)))
+            return
+
+        digest = hashlib.sha256(data).hexdigest()
+        cached = self._cache_path(digest)
+        with self._lock:
+            if digest in self._pending:
+                self._pending[digest].append(photo_path)
+                return
+            if cached.exists():
+                self._thumbnails[photo_path] = cached.read_bytes()
+                self.cache_hits += 1
+                return
+            self._pending[digest] = [photo_path]
+            if self.workers > 1:
+                if self._pool is None:
+                    self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                                     mp_context=multiprocessing.get_context('spawn'))
+                self._futures[digest] = self._pool.submit(make_thumbnail, data)
+                return
+
+        # Inline resize (workers == 1)
+        future: Future = Future()
+        try:
+            future.set_result(make_thumbnail(data))
+        except Exception as e:
+            future.set_exception(e)
+        with self._lock:
+            self._futures[digest] = future
+
+    def results(self) -> Dict[str, bytes]:
+        """
+        Wait for every queued thumbnail
+
+        Returns:
+            {photo_path: thumbnail JPEG bytes}; failed photos are left out and
+            recorded in self.failures
+        """
+        with self._lock:
+            futures = dict(self._futures)
+            self._futures.clear()
+
+        for digest, future in futures.items():
+            try:
+                result = future.result()
+            except Exception as e:
+                with self._lock:
+                    self.failures.extend((path, str(e)) for path in self._pending.pop(digest))
+                continue
+            self._store(digest, result)
+            with self._lock:
+                self.encoded += 1
+                for path in self._pending.pop(digest):
+                    self._thumbnails[path] = result
+
+        with self._lock:
+            return dict(self._thumbnails)
+
+    def build(self, photo_paths: Iterable[str]) -> Dict[str, bytes]:
+        """Thumbnail every readable photo (submit() each, then results())"""
+        for photo_path in photo_paths:
+            self.submit(photo_path)
+        return self.results()
+
+    def close(self):
+        """Stop the resize processes"""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+    def log_report(self):
+        """Log cache hits, encodes and per-photo failures"""
+        logger.info(f"🖼️ Thumbnails: {self.encoded} encoded ({self.workers} processes), "
+                    f"{self.cache_hits} from cache, {len(self.failures)} failed")
+        for photo_path, error in self.failures:
+            logger.warning(f"   ⚠️ {photo_path}: {error}")
+
+
+class StreamingExcelWriter:
+    """
+    Write the workbook in one pass over the finished, journaled records
+
+    Rows are not written while students are still being scraped: a resumed
+    run's workbook also holds rows from earlier runs, rows are in roll-number
+    order while students finish out of order, and a record's photo path is
+    only known once its background download ends. openpyxl write-only mode
+    streams each row to a temp file instead of building the sheet in memory;
+    the photo thumbnails (a few KB each) are kept until close().
+    """
+
+    def __init__(self, output_path: Union[str, Path], max_courses: int):
+        """
+        Args:
+            output_path: Workbook to create
+            max_courses: Number of course column groups in the header
+        """
+        self.output_path = Path(output_path)
+        self.max_courses = max_courses
+        self.rows_written = 0
+        self.photos_embedded = 0
+
+        self._workbook = Workbook(write_only=True)
+        self._sheet = self._workbook.create_sheet(title='Sheet1')
+        self._sheet.column_dimensions['A'].width = 15
+        self._sheet.append(self._header())
+
+    def _header(self) -> List[str]:
+        header = ['Photo'] + [title for title, _ in BASE_COLUMNS]
+        for idx in range(1, self.max_courses + 1):
+            header.extend(f'Course {idx} {suffix}' for suffix, _ in COURSE_COLUMNS)
+        return header
+
+    def write_record(self, student: Dict, thumbnail: Optional[bytes] = None):
+        """
+        Append one student row
+
+        Args:
+            student: process_student record
+            thumbnail: JPEG bytes for the Photo column (see ThumbnailBuilder)
+        """
+        row_idx = self.rows_written + 2  # header is row 1
+
+        row = [None] + [student.get(key) or '' for _, key in BASE_COLUMNS]
+        courses = (student.get('courses') or [])[:self.max_courses]
+        for course in courses:
+            row.extend(course.get(key, '') for _, key in COURSE_COLUMNS)
+
+        if thumbnail is not None:
+            xl_img = XLImage(BytesIO(thumbnail))
+            xl_img.width = PHOTO_CELL_SIZE
+            xl_img.height = PHOTO_CELL_SIZE
+            self._sheet.add_image(xl_img, f'A{row_idx}')
+            # Row dimensions must be set before the row is streamed out
+            self._sheet.row_dimensions[row_idx].height = PHOTO_ROW_HEIGHT
+            self.photos_embedded += 1
+
+        self._sheet.append(row)
+        self.rows_written += 1
+
+    def close(self):
+        """Finish the workbook (single save)"""
+        self._workbook.save(self.output_path)
@@ -7,7 +7,14 @@ import requests
 import base64
 import logging
 import re
-from typing import Optional
+import time
+import threading
+from concurrent.futures import Future
+from queue import Queue, Empty
+from typing import List, Optional, Union
+
+# Google Vision accepts up to 16 images per images:annotate call
+MAX_BATCH_SIZE = 16
 
 logger = logging.getLogger(__name__)
 
@@ -15,22 +22,27 @@ logger = logging.getLogger(__name__)
 class GoogleVisionCaptchaSolver:
     """Solve CAPTCHA using Google Cloud Vision API"""
     
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, endpoint: Optional[str] = None,
+                 session: Optional[requests.Session] = None):
         """
         Initialize with API key
         Args:
             api_key: Google Cloud Vision API key
+            endpoint: Override annotate URL (e.g. a local stand-in server)
+            session: Shared keep-alive session (a private one is created if omitted)
         """
         self.api_key = api_key
-        self.api_url = f"https://vision.googleapis.com/v1/images:annotate?key={api_key}"
+        self.session = session or requests.Session()
+        endpoint = endpoint or "https://vision.googleapis.com/v1/images:annotate"
+        self.api_url = f"{endpoint}?key={api_key}"
         logger.info("✓ Google Vision CAPTCHA solver initialized")
     
-    def solve_captcha(self, image_path: str) -> Optional[str]:
+    def solve_captcha(self, image: Union[str, bytes]) -> Optional[str]:
         """
-        Solve CAPTCHA from image file
+        Solve CAPTCHA from an image file or in-memory image
         
         Args:
-            image_path: Path to CAPTCHA image file
+            image: Path to CAPTCHA image file, or raw image bytes
             
         Returns:
             CAPTCHA text or None if failed
@@ -38,29 +50,13 @@ class GoogleVisionCaptchaSolver:
         try:
             logger.info(f"🔍 Solving CAPTCHA with Google Vision...")
             
-            # Read and encode image to base64
-            with open(image_path, 'rb') as image_file:
-                image_content = base64.b64encode(image_file.read()).decode('utf-8')
-            
-            # Prepare API request
+            # Encode image to base64
             request_body = {
-                "requests": [
-                    {
-                        "image": {
-                            "content": image_content
-                        },
-                        "features": [
-                            {
-                                "type": "TEXT_DETECTION",
-                                "maxResults": 10
-                            }
-                        ]
-                    }
-                ]
+                "requests": [self._build_request(image)]
             }
             
             # Call Google Vision API
-            response = requests.post(
+            response = self.session.post(
                 self.api_url,
                 json=request_body,
                 timeout=30
@@ -78,24 +74,11 @@ class GoogleVisionCaptchaSolver:
                 logger.warning("⚠️ No response from Google Vision")
                 return None
             
-            response_data = result['responses'][0]
-            
-            if 'textAnnotations' not in response_data:
-                logger.warning("⚠️ No text detected in CAPTCHA")
-                return None
-            
-            # Get detected text (first annotation is the full text)
-            detected_text = response_data['textAnnotations'][0]['description']
-            
-            # Clean up the text
-            captcha_text = self._clean_captcha_text(detected_text)
+            captcha_text = self._parse_annotation(result['responses'][0])
             
             if captcha_text:
                 logger.info(f"✅ Google Vision solved: '{captcha_text}' (length: {len(captcha_text)})")
-                return captcha_text
-            else:
-                logger.warning("⚠️ Cleaned CAPTCHA text is empty")
-                return None
+            return captcha_text
             
         except requests.exceptions.Timeout:
             logger.error("❌ Google Vision API timeout")
@@ -106,6 +89,90 @@ class GoogleVisionCaptchaSolver:
             logger.debug(traceback.format_exc())
             return None
     
+    def solve_many(self, images: List[Union[str, bytes]]) -> List[Optional[str]]:
+        """
+        Solve several CAPTCHAs with as few images:annotate calls as possible
+        
+        Args:
+            images: Image file paths or raw image bytes
+            
+        Returns:
+            CAPTCHA text (or None) for each image, in input order
+        """
+        results: List[Optional[str]] = [None] * len(images)
+        
+        for offset in range(0, len(images), MAX_BATCH_SIZE):
+            chunk = images[offset:offset + MAX_BATCH_SIZE]
+            try:
+                request_body = {"requests": [self._build_request(image) for image in chunk]}
+                response = self.session.post(self.api_url, json=request_body, timeout=30)
+                
+                if response.status_code != 200:
+                    logger.error(f"❌ Google Vision batch error: {response.status_code}")
+                    logger.error(f"Response: {response.text}")
+                    continue
+                
+                responses = response.json().get('responses', [])
+                for idx, response_data in enumerate(responses[:len(chunk)]):
+                    results[offset + idx] = self._parse_annotation(response_data)
+                
+                logger.info(f"✅ Google Vision batch: {sum(1 for r in results[offset:offset + len(chunk)] if r)}"
+                            f"/{len(chunk)} solved in one call")
+                
+            except requests.exceptions.Timeout:
+                logger.error("❌ Google Vision API timeout (batch)")
+            except Exception as e:
+                logger.error(f"❌ Error solving CAPTCHA batch: {e}")
+        
+        return results
+    
+    def _build_request(self, image: Union[str, bytes]) -> dict:
+        """
+        Build one annotate request entry
+        
+        Args:
+            image: Image file path or raw image bytes
+        """
+        if isinstance(image, (bytes, bytearray)):
+            image_bytes = bytes(image)
+        else:
+            with open(image, 'rb') as image_file:
+                image_bytes = image_file.read()
+        
+        return {
+            "image": {
+                "content": base64.b64encode(image_bytes).decode('utf-8')
+            },
+            "features": [
+                {
+                    "type": "TEXT_DETECTION",
+                    "maxResults": 10
+                }
+            ]
+        }
+    
+    def _parse_annotation(self, response_data: dict) -> Optional[str]:
+        """
+        Extract cleaned CAPTCHA text from one annotate response entry
+        """
+        if 'error' in response_data:
+            logger.warning(f"⚠️ Google Vision image error: {response_data['error'].get('message')}")
+            return None
+        
+        if 'textAnnotations' not in response_data:
+            logger.warning("⚠️ No text detected in CAPTCHA")
+            return None
+        
+        # Get detected text (first annotation is the full text)
+        detected_text = response_data['textAnnotations'][0]['description']
+        
+        # Clean up the text
+        captcha_text = self._clean_captcha_text(detected_text)
+        
+        if not captcha_text:
+            logger.warning("⚠️ Cleaned CAPTCHA text is empty")
+        return captcha_text
+    
     def _clean_captcha_text(self, text: str) -> Optional[str]:
         """
         Clean and validate CAPTCHA text
@@ -152,7 +219,7 @@ class GoogleVisionCaptchaSolver:
                 }]
             }
             
-            response = requests.post(self.api_url, json=request_body, timeout=10)
+            response = self.session.post(self.api_url, json=request_body, timeout=10)
             
             if response.status_code == 200:
                 logger.info("✅ API key is valid!")
@@ -167,6 +234,122 @@ class GoogleVisionCaptchaSolver:
             return False
 
 
+class VisionBatchCollector:
+    """
+    Coalesce CAPTCHA images from many workers into batched annotate calls
+    
+    Callers block in solve_captcha() while a background thread collects every
+    image that arrives within `window` seconds and sends them in one POST.
+    """
+    
+    def __init__(self, solver: GoogleVisionCaptchaSolver, window: float = 0.05,
+                 max_batch_size: int = MAX_BATCH_SIZE):
+        """
+        Args:
+            solver: Solver used for the batched calls
+            window: Seconds to wait for more images after the first one arrives
+            max_batch_size: Flush as soon as this many images are waiting
+        """
+        self.solver = solver
+        self.window = window
+        self.max_batch_size = min(max_batch_size, MAX_BATCH_SIZE)
+        self.batches_sent = 0
+        self.images_solved = 0
+        self._queue: Queue = Queue()
+        self._closed = True
+        self._lock = threading.Lock()
+        self._thread = None
+        self.open()
+    
+    def open(self):
+        """Start the collector thread (again, after close())"""
+        with self._lock:
+            if not self._closed:
+                return
+            self._closed = False
+            self._thread = threading.Thread(target=self._collect_loop, name="vision-batcher", daemon=True)
+            self._thread.start()
+    
+    def solve_captcha(self, image: Union[str, bytes]) -> Optional[str]:
+        """
+        Drop-in replacement for GoogleVisionCaptchaSolver.solve_captcha
+        
+        Args:
+            image: Image file path or raw image bytes
+        """
+        # Read paths now - the caller may overwrite the file while we wait
+        if not isinstance(image, (bytes, bytearray)):
+            with open(image, 'rb') as image_file:
+                image = image_file.read()
+        
+        # Queued under the lock, so nothing can land behind close()'s sentinel
+        future: Optional[Future] = None
+        with self._lock:
+            if not self._closed:
+                future = Future()
+                self._queue.put((image, future))
+        if future is None:
+            # Collector already stopped: call the API directly
+            return self.solver.solve_captcha(image)
+        return future.result()
+    
+    def close(self):
+        """Stop the collector thread after flushing pending images"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        self._thread.join()
+    
+    def log_report(self):
+        """Log batches sent and images per batch"""
+        if not self.batches_sent:
+            return
+        logger.info(f"📦 Google Vision batching: {self.images_solved} images in {self.batches_sent} batches "
+                    f"({self.images_solved / self.batches_sent:.1f} images/batch)")
+    
+    def _collect_loop(self):
+        """Collect images for `window` seconds, then send them as one batch"""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            
+            batch = [item]
+            deadline = time.monotonic() + self.window
+            stop = False
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            
+            self._flush(batch)
+            if stop:
+                return
+    
+    def _flush(self, batch):
+        """Send one batch and fan results back to the waiting callers"""
+        try:
+            results = self.solver.solve_many([image for image, _ in batch])
+        except Exception as e:
+            logger.error(f"❌ Batch solve failed: {e}")
+            results = [None] * len(batch)
+        
+        self.batches_sent += 1
+        self.images_solved += len(batch)
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+
 # Test function
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
@@ -0,0 +1,227 @@
+"""
+Pure-HTTP Scraping Engine
+Logs in and scrapes students with pooled requests sessions instead of Chrome
+"""
+
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urljoin
+
+import requests
+
+from portal_parser import (
+    build_student_record,
+    is_profile_page,
+    is_results_page,
+    login_error_kind,
+    login_error_text,
+    parse_login_form,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class HTTPPortalScraper:
+    """Scrape students over plain HTTP, producing process_student records"""
+
+    def __init__(self, automation, workers: int = 1):
+        """
+        Initialize engine
+
+        Args:
+            automation: KITPortalAutomation providing config, password, photo dir and CAPTCHA solvers
+            workers: Number of students processed concurrently
+        """
+        self.automation = automation
+        self.workers = max(1, int(workers))
+
+        self.root_url = automation.portal_root
+        self.login_url = automation.base_url
+        self.results_url = automation.results_url
+        self.profile_url = automation.profile_url
+        self.logout_url = automation.logout_url
+
+    def new_session(self) -> requests.Session:
+        """Create a cookie-isolated session on the shared connection pools"""
+        return self.automation.http.new_session()
+
+    def login(self, session: requests.Session, roll_number: str,
+              max_retries: int = 3) -> Tuple[Optional[str], int]:
+        """
+        Login over HTTP
+
+        A rejected login is retried on a fresh login form (new CAPTCHA) up to
+        captcha.max_login_cycles submissions, as in the browser path. A
+        username/password error ends the login at once.
+
+        Returns:
+            (HTML of the page shown after login (Results) or None if login failed,
+             number of login cycles used)
+        """
+        cycles = 0
+        success = False
+        try:
+            while cycles < self.automation.max_login_cycles:
+                form_info = self.fetch_captcha(session, roll_number, max_retries)
+                if form_info is None:
+                    logger.error("CAPTCHA solving failed")
+                    break
+
+                cycles += 1
+                results_html, error_kind = self._submit_login(session, roll_number, form_info)
+                if results_html is not None:
+                    success = True
+                    logger.info(f"SUCCESS! Login successful for {roll_number}"
+                                f"{f' (cycle {cycles})' if cycles > 1 else ''}")
+                    return results_html, cycles
+                if error_kind == 'credentials':
+                    logger.error(f"Username or password rejected for {roll_number} - not retrying")
+                    break
+
+                if cycles < self.automation.max_login_cycles:
+                    logger.warning(f"⚠️ Login cycle {cycles}/{self.automation.max_login_cycles} rejected "
+                                   f"for {roll_number}, retrying with a new CAPTCHA")
+                    self.automation.login_cycles.record_refresh('reload')
+
+            logger.error(f"Login failed for {roll_number} after {cycles} cycle(s)")
+            return None, cycles
+        finally:
+            if cycles:
+                self.automation.login_cycles.record(cycles, success)
+
+    def fetch_captcha(self, session: requests.Session, roll_number: str,
+                      max_retries: int = 3) -> Optional[Dict]:
+        """
+        GET the login form (each GET issues a fresh CAPTCHA) and solve its CAPTCHA
+
+        Returns:
+            parse_login_form() dict plus 'page_url', 'image' and 'answer', or None
+        """
+        for attempt in range(max_retries):
+            response = session.get(self.login_url, timeout=30)
+            response.raise_for_status()
+            form_info = parse_login_form(response.text)
+
+            if not form_info['captcha_src']:
+                logger.warning(f"⚠️ CAPTCHA image not found (attempt {attempt + 1})")
+                continue
+
+            captcha_url = urljoin(response.url, form_info['captcha_src'])
+            image = session.get(captcha_url, timeout=30)
+            if image.status_code != 200:
+                logger.warning(f"⚠️ CAPTCHA download failed: {image.status_code} (attempt {attempt + 1})")
+                continue
+
+            self.automation.save_debug_captcha(image.content, f"captcha_http_{roll_number}.png")
+            captcha_text = self.automation.solve_captcha_image(image.content)
+            if captcha_text:
+                form_info.update({'page_url': response.url, 'image': image.content, 'answer': captcha_text})
+                return form_info
+            logger.warning(f"⚠️ Attempt {attempt + 1} failed, retrying...")
+
+        return None
+
+    def _submit_login(self, session: requests.Session, roll_number: str,
+                      form_info: Dict) -> Tuple[Optional[str], Optional[str]]:
+        """
+        POST the login form once
+
+        Returns:
+            (Results HTML or None if the portal rejected it,
+             login_error_kind() of the rejection message or None)
+        """
+        payload = dict(form_info['hidden'])
+        payload.update({
+            'username': roll_number,
+            'password1': self.automation.password,
+            'captcha': form_info['answer'],
+        })
+        action_url = urljoin(form_info['page_url'], form_info['action'] or self.login_url)
+        response = session.post(action_url, data=payload, timeout=30)
+
+        if "Results" in response.url or is_results_page(response.text):
+            self.automation.record_captcha_outcome(form_info['image'], form_info['answer'], True)
+            return response.text, None
+
+        error_text = login_error_text(response.text)
+        # Some portal responses land elsewhere first - check Results directly
+        response = session.get(self.results_url, timeout=30)
+        if is_results_page(response.text):
+            logger.info(f"Login for {roll_number} detected in Results page")
+            self.automation.record_captcha_outcome(form_info['image'], form_info['answer'], True)
+            return response.text, None
+
+        error_kind = login_error_kind(error_text)
+        logger.warning(f"Login rejected for {roll_number} (final URL: {response.url})"
+                       f"{f': {error_text}' if error_text else ''}")
+        # Only a CAPTCHA error says the answer was wrong; a credential error says nothing about it
+        if error_kind == 'captcha':
+            self.automation.record_captcha_outcome(form_info['image'], form_info['answer'], False)
+        return None, error_kind
+
+    def process_student(self, roll_number: str) -> Dict:
+        """Process single student over HTTP (same record shape as KITPortalAutomation.process_student)"""
+        logger.info(f"\n{'='*60}")
+        logger.info(f"Processing (HTTP): {roll_number}")
+        logger.info(f"{'='*60}")
+
+        student_data = {'roll_number': roll_number}
+        # Note: never session.close() - that would close the shared adapter pool
+        session = self.new_session()
+
+        try:
+            results_html, student_data['login_cycles'] = self.login(session, roll_number)
+            if results_html is None:
+                student_data['status'] = 'Login Failed'
+                return student_data
+
+            self.automation.archive_page(roll_number, 'results', results_html)
+
+            response = session.get(self.profile_url, timeout=30)
+            profile_html = response.text if response.status_code == 200 and is_profile_page(response.text) else None
+            if profile_html:
+                self.automation.archive_page(roll_number, 'profile', profile_html)
+
+            student_data.update(build_student_record(roll_number, results_html, profile_html, self.root_url))
+            logger.info(f"✓ Extracted {len(student_data['courses'])} courses")
+
+            if not self.automation.hand_off_photo(roll_number, student_data.get('photo_url'),
+                                                  session.cookies.get_dict()):
+                try:
+                    session.get(self.logout_url, timeout=10)
+                except requests.exceptions.RequestException as e:
+                    logger.warning(f"Logout error: {e}")
+
+            logger.info(f"✅ Successfully processed {roll_number}")
+
+        except Exception as e:
+            logger.error(f"❌ Error processing {roll_number}: {e}")
+            student_data['status'] = f'Error: {str(e)}'
+
+        return student_data
+
+    def run(self, roll_numbers: List[str],
+            on_result: Optional[Callable[[Dict], None]] = None) -> List[Dict]:
+        """
+        Process all roll numbers, returning records in roll-number order
+
+        Args:
+            roll_numbers: Roll numbers to process
+            on_result: Optional callback invoked with each finished student record
+        """
+        logger.info(f"🌐 HTTP engine: {len(roll_numbers)} students, {self.workers} concurrent")
+        start = time.time()
+
+        def _process(roll_number):
+            student_data = self.process_student(roll_number)
+            if on_result:
+                on_result(student_data)
+            return student_data
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='http') as executor:
+            all_data = list(executor.map(_process, roll_numbers))
+
+        logger.info(f"⏱️ HTTP engine finished in {time.time() - start:.1f}s")
+        return all_data
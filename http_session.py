@@ -0,0 +1,136 @@
+"""
+Shared HTTP Session Layer
+Pooled keep-alive connections with retry/backoff, per-host limits and reuse counters
+"""
+
+import logging
+import threading
+from typing import Dict, Iterable, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+              "(KHTML, like Gecko) Chrome/120.0 Safari/537.36")
+
+
+class HTTPSessionPool:
+    """
+    One set of connection pools shared by every outbound HTTP caller
+
+    `session()` is a shared keep-alive session for stateless calls (Google
+    Vision), whose POSTs are safe to retry. `new_session()` returns a
+    cookie-isolated session (one per student: portal pages, photos) whose
+    adapters only retry idempotent methods - a replayed login POST would
+    resubmit an already-used CAPTCHA answer.
+    """
+
+    def __init__(self, pool_maxsize: int = 10, max_retries: int = 3, backoff_factor: float = 0.5,
+                 status_forcelist: Iterable[int] = (429, 500, 502, 503, 504),
+                 retry_methods: Iterable[str] = ('GET', 'HEAD', 'POST'),
+                 session_retry_methods: Iterable[str] = ('GET', 'HEAD'),
+                 host_limits: Optional[Dict[str, int]] = None, pool_block: bool = False):
+        """
+        Args:
+            pool_maxsize: Keep-alive connections kept per host
+            max_retries: Retries for connection errors and retryable statuses
+            backoff_factor: Exponential backoff base between retries (seconds)
+            status_forcelist: HTTP statuses that are retried
+            retry_methods: HTTP methods that may be retried on the shared stateless session
+            session_retry_methods: HTTP methods that may be retried on new_session() sessions
+            host_limits: Per-host connection limits, e.g. {"https://vision.googleapis.com": 4}
+            pool_block: Block when a host's pool is exhausted instead of opening extra connections
+        """
+        def _retry(methods: Iterable[str]) -> Retry:
+            return Retry(
+                total=max_retries,
+                backoff_factor=backoff_factor,
+                status_forcelist=list(status_forcelist),
+                allowed_methods=frozenset(m.upper() for m in methods),
+                raise_on_status=False,
+            )
+
+        self.retry = _retry(retry_methods)
+        self.session_retry = _retry(session_retry_methods)
+        self.default_adapter = HTTPAdapter(pool_connections=16, pool_maxsize=pool_maxsize,
+                                           max_retries=self.retry, pool_block=pool_block)
+        self.session_adapter = HTTPAdapter(pool_connections=16, pool_maxsize=pool_maxsize,
+                                           max_retries=self.session_retry, pool_block=pool_block)
+
+        # Longest-prefix match wins in requests, so host-specific adapters override the default
+        # (one set per retry policy; a host is normally reached by only one kind of session)
+        self.host_adapters: Dict[str, HTTPAdapter] = {}
+        self.session_host_adapters: Dict[str, HTTPAdapter] = {}
+        for prefix, limit in (host_limits or {}).items():
+            self.host_adapters[prefix] = HTTPAdapter(pool_connections=1, pool_maxsize=limit,
+                                                     max_retries=self.retry, pool_block=True)
+            self.session_host_adapters[prefix] = HTTPAdapter(pool_connections=1, pool_maxsize=limit,
+                                                             max_retries=self.session_retry, pool_block=True)
+
+        self._shared: Optional[requests.Session] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, http_config: Dict) -> 'HTTPSessionPool':
+        """Build from the "http" section of config.json"""
+        return cls(
+            pool_maxsize=http_config.get('pool_maxsize', 10),
+            max_retries=http_config.get('max_retries', 3),
+            backoff_factor=http_config.get('backoff_factor', 0.5),
+            status_forcelist=http_config.get('retry_statuses', (429, 500, 502, 503, 504)),
+            retry_methods=http_config.get('retry_methods', ('GET', 'HEAD', 'POST')),
+            session_retry_methods=http_config.get('session_retry_methods', ('GET', 'HEAD')),
+            host_limits=http_config.get('host_limits'),
+            pool_block=http_config.get('pool_block', False),
+        )
+
+    def _mount(self, session: requests.Session, adapter: HTTPAdapter,
+               host_adapters: Dict[str, HTTPAdapter]) -> requests.Session:
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        for prefix, host_adapter in host_adapters.items():
+            session.mount(prefix, host_adapter)
+        session.headers['User-Agent'] = USER_AGENT
+        return session
+
+    def session(self) -> requests.Session:
+        """Shared keep-alive session for stateless requests (POSTs are retried)"""
+        with self._lock:
+            if self._shared is None:
+                self._shared = self._mount(requests.Session(), self.default_adapter, self.host_adapters)
+            return self._shared
+
+    def new_session(self) -> requests.Session:
+        """
+        Cookie-isolated session on the shared pools (only GET/HEAD retried by default)
+
+        Note: don't call close() on it - that closes the shared adapters.
+        """
+        return self._mount(requests.Session(), self.session_adapter, self.session_host_adapters)
+
+    def stats(self) -> Dict[str, int]:
+        """Requests sent, connections opened and connections reused, across all pools"""
+        totals = {'requests': 0, 'connections': 0, 'reused': 0}
+        for adapter in [self.default_adapter, self.session_adapter,
+                        *self.host_adapters.values(), *self.session_host_adapters.values()]:
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                totals['requests'] += pool.num_requests
+                totals['connections'] += pool.num_connections
+        totals['reused'] = max(0, totals['requests'] - totals['connections'])
+        return totals
+
+    def log_report(self):
+        """Log connection reuse counters"""
+        stats = self.stats()
+        if not stats['requests']:
+            return
+        rate = stats['reused'] / stats['requests'] * 100
+        logger.info(f"🔌 HTTP: {stats['requests']} requests over {stats['connections']} connections "
+                    f"({stats['reused']} reused, {rate:.0f}% reuse)")
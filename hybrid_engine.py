@@ -0,0 +1,186 @@
+"""
+Hybrid Engine
+Chrome only for the CAPTCHA login; pages and photos are fetched over pooled
+HTTP with the browser's cookies while the browser moves on to the next login
+"""
+
+import time
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+import requests
+
+from portal_parser import build_student_record, is_results_page
+
+logger = logging.getLogger(__name__)
+
+
+class HybridPortalScraper:
+    """Browser login + background HTTP scraping, producing process_student records"""
+
+    def __init__(self, automation, fetch_workers: int = 4):
+        """
+        Initialize engine
+
+        Args:
+            automation: KITPortalAutomation with a running driver (setup_driver)
+            fetch_workers: Students whose pages are fetched concurrently in the background
+                (at most twice as many logged-in students wait for a scrape)
+        """
+        self.automation = automation
+        self.fetch_workers = max(1, int(fetch_workers))
+
+        self.root_url = automation.portal_root
+        self.results_url = automation.results_url
+        self.profile_url = automation.profile_url
+        self.logout_url = automation.logout_url
+
+        self.browser_seconds = 0.0
+        self.browser_logins = 0
+
+    def export_session(self) -> requests.Session:
+        """Copy the driver's cookies and user agent into a pooled HTTP session"""
+        driver = self.automation.driver
+        session = self.automation.http.new_session()
+        session.headers['User-Agent'] = driver.execute_script("return navigator.userAgent")
+        for cookie in driver.get_cookies():
+            session.cookies.set(cookie['name'], cookie['value'],
+                                domain=cookie.get('domain', ''), path=cookie.get('path', '/'))
+        return session
+
+    def _get_page(self, session: requests.Session, url: str) -> Optional[str]:
+        response = session.get(url, timeout=30)
+        return response.text if response.status_code == 200 else None
+
+    def _get_results(self, session: requests.Session, roll_number: str) -> Optional[str]:
+        """
+        GET the Results page, retried while it isn't one
+
+        Error statuses are already retried by the session; this also covers a
+        200 that isn't the Results page yet and connection errors, with the
+        same attempt count and backoff as the HTTPSessionPool retry policy.
+        """
+        retry = self.automation.http.session_retry
+        for attempt in range(retry.total + 1):
+            if attempt:
+                time.sleep(retry.backoff_factor * 2 ** (attempt - 1))
+            try:
+                page_html = self._get_page(session, self.results_url)
+            except requests.exceptions.RequestException as e:
+                logger.warning(f"⚠️ Results fetch for {roll_number} failed: {e}")
+                continue
+            if page_html and is_results_page(page_html):
+                return page_html
+            logger.warning(f"⚠️ Results page not shown for {roll_number} "
+                           f"(attempt {attempt + 1}/{retry.total + 1})")
+        return None
+
+    def scrape(self, roll_number: str, session: requests.Session, page_pool: ThreadPoolExecutor,
+               login_cycles: int = 0) -> Dict:
+        """
+        Fetch and parse Results and Usersprofile concurrently, then hand the photo
+        download and logout to the background download stage
+
+        Note: never session.close() - that would close the shared adapter pool
+        """
+        student_data = {'roll_number': roll_number, 'login_cycles': login_cycles}
+        try:
+            results_future = page_pool.submit(self._get_results, session, roll_number)
+            profile_future = page_pool.submit(self._get_page, session, self.profile_url)
+            results_html = results_future.result()
+            profile_html = profile_future.result()
+
+            # The browser login succeeded, so a missing Results page is a fetch failure
+            student_data.update(build_student_record(roll_number, results_html, profile_html, self.root_url,
+                                                     no_results_status='Results Fetch Failed'))
+            if results_html:
+                self.automation.archive_page(roll_number, 'results', results_html)
+                logger.info(f"✓ Extracted {len(student_data['courses'])} courses for {roll_number}")
+            if student_data['status'] == 'Success':
+                self.automation.archive_page(roll_number, 'profile', profile_html)
+
+            if not self.automation.hand_off_photo(roll_number, student_data.get('photo_url'),
+                                                  session.cookies.get_dict()):
+                try:
+                    session.get(self.logout_url, timeout=10)
+                except requests.exceptions.RequestException as e:
+                    logger.warning(f"Logout error: {e}")
+
+            logger.info(f"✅ Successfully processed {roll_number}")
+
+        except Exception as e:
+            logger.error(f"❌ Error processing {roll_number}: {e}")
+            student_data['status'] = f'Error: {str(e)}'
+
+        return student_data
+
+    def run(self, roll_numbers: List[str],
+            on_result: Optional[Callable[[Dict], None]] = None) -> List[Dict]:
+        """
+        Log in each student in the browser, scraping the previous ones in the background
+
+        Args:
+            roll_numbers: Roll numbers to process
+            on_result: Optional callback invoked with each finished student record
+        """
+        automation = self.automation
+        logger.info(f"🔀 Hybrid engine: {len(roll_numbers)} students, "
+                    f"{self.fetch_workers} background scrapes")
+        start = time.time()
+        results: Dict[str, Future] = {}
+        # Logged-in students waiting for (or in) a scrape; the browser waits when it is full
+        backlog = threading.BoundedSemaphore(self.fetch_workers * 2)
+
+        def _scrape(roll_number, session, login_cycles):
+            try:
+                student_data = self.scrape(roll_number, session, page_pool, login_cycles)
+            finally:
+                backlog.release()
+            if on_result:
+                on_result(student_data)
+            return student_data
+
+        with ThreadPoolExecutor(max_workers=self.fetch_workers * 2, thread_name_prefix='page') as page_pool, \
+                ThreadPoolExecutor(max_workers=self.fetch_workers, thread_name_prefix='hybrid') as scrape_pool:
+            for idx, roll_number in enumerate(roll_numbers, 1):
+                logger.info(f"\n{'='*60}")
+                logger.info(f"Processing (hybrid) {idx}/{len(roll_numbers)}: {roll_number}")
+                logger.info(f"{'='*60}")
+
+                backlog.acquire()
+                browser_start = time.monotonic()
+                try:
+                    logged_in = automation.login(roll_number)
+                    session = self.export_session() if logged_in else None
+                    # Drop the browser's copy of the session (the server session stays
+                    # valid for the HTTP scrape) so the next login starts clean
+                    automation.driver.delete_all_cookies()
+                except Exception as e:
+                    logger.error(f"❌ Browser error for {roll_number}: {e}")
+                    logged_in, session = False, None
+                self.browser_seconds += time.monotonic() - browser_start
+                self.browser_logins += 1
+
+                if session is None:
+                    backlog.release()
+                    student_data = {'roll_number': roll_number, 'status': 'Login Failed',
+                                    'login_cycles': automation.last_login_cycles}
+                    if on_result:
+                        on_result(student_data)
+                    done = Future()
+                    done.set_result(student_data)
+                    results[roll_number] = done
+                    continue
+
+                results[roll_number] = scrape_pool.submit(_scrape, roll_number, session,
+                                                          automation.last_login_cycles)
+
+            all_data = [results[roll].result() for roll in roll_numbers]
+
+        elapsed = time.time() - start
+        logger.info(f"⏱️ Hybrid engine finished in {elapsed:.1f}s "
+                    f"(browser busy {self.browser_seconds:.1f}s, "
+                    f"{self.browser_seconds / max(1, self.browser_logins):.1f}s per student)")
+        return all_data
@@ -0,0 +1,474 @@
+"""
+Local Stand-in for the KIT Portal (portal.kitcbe.com)
+Login form with a real rendered CAPTCHA, Results, Usersprofile, photos and
+logout, with configurable latency and failure injection, so every engine can
+be run and benchmarked offline
+"""
+
+import io
+import sys
+import html
+import time
+import random
+import hashlib
+import logging
+import secrets
+import threading
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Union
+from urllib.parse import parse_qs, urlparse
+
+from PIL import Image, ImageDraw
+
+from captcha_preprocess import preprocess
+from captcha_synth import random_text, render_captcha
+from portal_parser import COURSE_COLUMNS, MARKSHEET_FIELDS, PROFILE_FIELDS
+
+logger = logging.getLogger(__name__)
+
+LOGIN_PATH = "/index.php/Login"
+RESULTS_PATH = "/index.php/Results"
+PROFILE_PATH = "/index.php/Usersprofile"
+LOGOUT_PATH = "/index.php/Login/logout"
+
+# Route kinds, used as keys for per-route latency and stats
+ROUTES = ('login', 'login_post', 'captcha', 'results', 'profile', 'photo', 'logout')
+
+LOGIN_PAGE = """<!DOCTYPE html>
+<html><head><title>KIT Portal - Login</title></head>
+<body>
+<h2>Student Login</h2>
+{error}
+<form action="{login_path}" method="post">
+  <input type="hidden" name="csrf_token" value="{csrf}">
+  <input type="text" id="username" name="username" placeholder="Register Number">
+  <input type="password" id="password1" name="password1" placeholder="Password">
+  <img src="{captcha_src}" alt="captcha">
+  <input type="text" id="captcha" name="captcha" placeholder="Enter CAPTCHA">
+  <button type="submit">Login</button>
+</form>
+</body></html>"""
+
+MENU = """<div class="header">
+  <span class="user-profile">STUDENTS</span>
+  <ul class="menu">
+    <li><a href="{profile_path}">Profile Details</a></li>
+    <li><a href="{logout_path}">Logout</a></li>
+  </ul>
+</div>"""
+
+
+def student_record(roll_number: str) -> Dict:
+    """Deterministic fake student for a roll number"""
+    rng = random.Random(roll_number)
+    first = rng.choice(["Arun", "Divya", "Karthik", "Meena", "Priya", "Rahul", "Sneha", "Vijay"])
+    last = rng.choice(["Kumar", "Raj", "Devi", "Sharma", "Natarajan", "Lakshmi"])
+    courses = []
+    for semester in range(1, rng.randint(2, 4) + 1):
+        for idx in range(rng.randint(4, 6)):
+            grade = rng.choice(["O", "A+", "A", "B+", "B", "C"])
+            courses.append({
+                'semester': str(semester),
+                'course_code': f"21CS{semester}{idx:02d}",
+                'course_name': f"Course {semester}.{idx + 1}",
+                'grade': grade,
+                'gp': str({"O": 10, "A+": 9, "A": 8, "B+": 7, "B": 6, "C": 5}[grade]),
+                'result': "PASS",
+            })
+    return {
+        'marksheet': {
+            'name': f"{first} {last}".upper(),
+            'register_number': roll_number,
+            'regulation': "R2021",
+            'gender': rng.choice(["MALE", "FEMALE"]),
+            'dob': f"{rng.randint(1, 28):02d}-{rng.randint(1, 12):02d}-2004",
+            'branch': "B.Tech - Artificial Intelligence and Data Science",
+        },
+        'profile': {
+            'first_name': first,
+            'last_name': last,
+            'blood_group': rng.choice(["A+", "B+", "O+", "AB+"]),
+            'mobile': f"9{rng.randint(100000000, 999999999)}",
+            'email': f"{first.lower()}.{roll_number.lower()}@example.com",
+            'alternative_mobile': f"8{rng.randint(100000000, 999999999)}",
+            'alternative_email': f"{roll_number.lower()}@example.org",
+            'community': rng.choice(["BC", "MBC", "OC", "SC"]),
+            'caste': "-",
+            'religion': "-",
+            'nationality': "Indian",
+        },
+        'courses': courses,
+    }
+
+
+def render_results(roll_number: str) -> str:
+    record = student_record(roll_number)
+    rows = ''.join(f"<tr><td>{label}</td><td>{html.escape(record['marksheet'][key])}</td></tr>"
+                   for key, label in MARKSHEET_FIELDS.items())
+    course_rows = ''.join(
+        "<tr>" + ''.join(f"<td>{html.escape(course[column])}</td>" for column in COURSE_COLUMNS) + "</tr>"
+        for course in record['courses'])
+    return f"""<!DOCTYPE html>
+<html><head><title>KIT Portal - Results</title></head>
+<body>
+{MENU.format(profile_path=PROFILE_PATH, logout_path=LOGOUT_PATH)}
+<h2>PROVISIONAL RESULTS</h2>
+<table class="student">{rows}</table>
+<table class="marks">
+  <tr><th>SEM</th><th>COURSE CODE</th><th>COURSE NAME</th><th>GRADE</th><th>GP</th><th>RESULT</th></tr>
+  {course_rows}
+</table>
+</body></html>"""
+
+
+def render_profile(roll_number: str, with_photo: bool = True) -> str:
+    record = student_record(roll_number)
+    # Primary fields before their "Alternative ..." twins (the label XPaths use contains())
+    fields = ''.join(
+        f"<div class=\"form-group\"><label>{label}</label>"
+        f"<input type=\"text\" value=\"{html.escape(record['profile'][key])}\"></div>"
+        for key, label in PROFILE_FIELDS.items())
+    photo = f'<img src="/uploads/{roll_number}.jpg" class="profile-photo">' if with_photo else ''
+    return f"""<!DOCTYPE html>
+<html><head><title>KIT Portal - Profile</title></head>
+<body>
+{MENU.format(profile_path=PROFILE_PATH, logout_path=LOGOUT_PATH)}
+<h2>Edit User</h2>
+{photo}
+<form>{fields}</form>
+</body></html>"""
+
+
+def render_photo(roll_number: str) -> bytes:
+    """Small deterministic JPEG per student"""
+    rng = random.Random(roll_number)
+    img = Image.new('RGB', (120, 150), tuple(rng.randint(120, 230) for _ in range(3)))
+    draw = ImageDraw.Draw(img)
+    draw.ellipse((30, 20, 90, 80), fill=tuple(rng.randint(60, 200) for _ in range(3)))
+    draw.rectangle((20, 90, 100, 150), fill=tuple(rng.randint(30, 150) for _ in range(3)))
+    buffer = io.BytesIO()
+    img.save(buffer, format='JPEG', quality=85)
+    return buffer.getvalue()
+
+
+class MockKITPortal:
+    """
+    Minimal KIT portal server (same paths as the real one)
+
+        GET  /index.php/Login          login form (username, password1, captcha) + captcha_images img
+        POST /index.php/Login          302 to Results, or the form again with an error
+        GET  /captcha_images/<id>.png  CAPTCHA issued to the session
+        GET  /index.php/Results        Results page (login required)
+        GET  /index.php/Usersprofile   Edit User form with photo (login required)
+        GET  /uploads/<roll>.jpg       student photo (ETag / If-None-Match, login required)
+        GET  /index.php/Login/logout   end session, 302 to Login
+
+    Every GET of the login form issues a new CAPTCHA for the session, like the
+    real portal. `answers` maps the SHA-256 of each CAPTCHA (raw and
+    preprocessed) to its text, for MockVisionServer(answers=portal.answers).
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, password: str = "password",
+                 latency: Union[float, Dict[str, float]] = 0.0, error_rate: float = 0.0,
+                 captcha_reject_rate: float = 0.0, invalid_rate: float = 0.0,
+                 missing_photo_rate: float = 0.0, seed: int = 0):
+        """
+        Args:
+            host: Interface to bind
+            port: Port to bind (0 picks a free port)
+            password: Password accepted for every student
+            latency: Seconds added to every request, or per route kind
+                ('login', 'login_post', 'captcha', 'results', 'profile', 'photo',
+                'logout', 'default')
+            error_rate: Fraction of requests answered with HTTP 500
+            captcha_reject_rate: Fraction of correct CAPTCHA answers rejected anyway
+            invalid_rate: Fraction of roll numbers (chosen deterministically) that never log in
+            missing_photo_rate: Fraction of students (chosen deterministically) without a photo
+            seed: Seed for CAPTCHA text and injected failures
+        """
+        self.password = password
+        self.latency = latency
+        self.error_rate = error_rate
+        self.captcha_reject_rate = captcha_reject_rate
+        self.invalid_rate = invalid_rate
+        self.missing_photo_rate = missing_photo_rate
+        self.answers: Dict[str, str] = {}
+
+        self.stats = {route: {'requests': 0, 'seconds': 0.0} for route in ROUTES}
+        self.logins = 0
+        self.rejected_captchas = 0
+        self.injected_rejections = 0
+        self.injected_errors = 0
+
+        self._rng = random.Random(seed)
+        self._sessions: Dict[str, Dict] = {}
+        self._captchas: Dict[str, bytes] = {}
+        self._photos: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def root_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'MockKITPortal':
+        """Serve in a background thread"""
+        self._thread = threading.Thread(target=self._server.serve_forever, name="mock-portal", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """Serve in the calling thread until interrupted (Ctrl+C), then close the socket"""
+        try:
+            self._server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._server.server_close()
+
+    def stop(self):
+        """Shut the server down"""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _chance(self, rate: float) -> bool:
+        with self._lock:
+            return rate > 0 and self._rng.random() < rate
+
+    @staticmethod
+    def _selected(roll_number: str, salt: str, rate: float) -> bool:
+        """Deterministic per-student choice, stable across runs"""
+        digest = hashlib.sha256(f"{salt}:{roll_number}".encode()).digest()
+        return int.from_bytes(digest[:4], 'big') / 2 ** 32 < rate
+
+    def _delay(self, route: str):
+        latency = self.latency
+        if isinstance(latency, dict):
+            latency = latency.get(route, latency.get('default', 0.0))
+        if latency:
+            time.sleep(latency)
+
+    def issue_captcha(self, session: Dict) -> str:
+        """New CAPTCHA for a session; returns its image src"""
+        with self._lock:
+            text = random_text(self._rng)
+            seed = self._rng.getrandbits(32)
+        image = render_captcha(text, seed=seed)
+        captcha_id = secrets.token_hex(8)
+        with self._lock:
+            self._captchas.pop(session.get('captcha_id'), None)
+            self._captchas[captcha_id] = image
+            session['captcha_id'] = captcha_id
+            session['captcha'] = text
+            for variant in (image, preprocess(image)):
+                self.answers[hashlib.sha256(variant).hexdigest()] = text
+        return f"/captcha_images/{captcha_id}.png"
+
+    def photo(self, roll_number: str) -> bytes:
+        with self._lock:
+            if roll_number not in self._photos:
+                self._photos[roll_number] = render_photo(roll_number)
+            return self._photos[roll_number]
+
+    def log_report(self):
+        """Log per-route request counts and server time"""
+        logger.info(f"🏫 Mock portal: {self.logins} logins, {self.rejected_captchas} CAPTCHA rejections "
+                    f"({self.injected_rejections} injected), {self.injected_errors} injected errors")
+        for route, entry in self.stats.items():
+            if entry['requests']:
+                logger.info(f"   {route:<11}{entry['requests']:>6} requests"
+                            f"{entry['seconds'] * 1000 / entry['requests']:>9.1f} ms avg")
+
+    def _make_handler(self):
+        portal = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _session(self, create: bool = False) -> Optional[Dict]:
+                cookie = SimpleCookie(self.headers.get('Cookie', ''))
+                token = cookie['ci_session'].value if 'ci_session' in cookie else None
+                with portal._lock:
+                    session = portal._sessions.get(token)
+                    if session is None and create:
+                        token = secrets.token_hex(16)
+                        session = {'token': token, 'csrf': secrets.token_hex(8), 'new': True}
+                        portal._sessions[token] = session
+                return session
+
+            def _send(self, status: int, body: bytes = b'', content_type: str = 'text/html; charset=utf-8',
+                      headers: Optional[Dict[str, str]] = None, session: Optional[Dict] = None):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                if session is not None and session.pop('new', False):
+                    self.send_header('Set-Cookie', f"ci_session={session['token']}; Path=/; HttpOnly")
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                if self.command != 'HEAD':
+                    self.wfile.write(body)
+
+            def _redirect(self, location: str, session: Optional[Dict] = None):
+                self._send(302, headers={'Location': location}, session=session)
+
+            def _login_page(self, session: Dict, error: str = ''):
+                page = LOGIN_PAGE.format(
+                    error=f'<div class="alert alert-danger">{html.escape(error)}</div>' if error else '',
+                    login_path=LOGIN_PATH,
+                    csrf=session['csrf'],
+                    captcha_src=portal.issue_captcha(session),
+                )
+                self._send(200, page.encode('utf-8'), session=session)
+
+            def _route(self, path: str) -> str:
+                if path.startswith('/captcha_images/'):
+                    return 'captcha'
+                if path.startswith('/uploads/'):
+                    return 'photo'
+                if path == LOGOUT_PATH:
+                    return 'logout'
+                if path == RESULTS_PATH:
+                    return 'results'
+                if path == PROFILE_PATH:
+                    return 'profile'
+                return 'login_post' if self.command == 'POST' else 'login'
+
+            def _handle(self):
+                path = urlparse(self.path).path
+                route = self._route(path)
+                start = time.monotonic()
+                try:
+                    portal._delay(route)
+                    if portal._chance(portal.error_rate):
+                        with portal._lock:
+                            portal.injected_errors += 1
+                        self._send(500, b'<h1>500 Internal Server Error</h1>')
+                    else:
+                        getattr(self, f"_{route}")(path)
+                finally:
+                    with portal._lock:
+                        portal.stats[route]['requests'] += 1
+                        portal.stats[route]['seconds'] += time.monotonic() - start
+
+            def do_GET(self):
+                self._handle()
+
+            def do_POST(self):
+                # Read the body up front so an injected error leaves the keep-alive connection clean
+                length = int(self.headers.get('Content-Length', 0))
+                self.body = self.rfile.read(length).decode('utf-8', errors='replace')
+                self._handle()
+
+            def _login(self, path):
+                session = self._session(create=True)
+                if session.get('user'):
+                    self._redirect(RESULTS_PATH, session)
+                    return
+                self._login_page(session)
+
+            def _login_post(self, path):
+                form = {key: values[0] for key, values in parse_qs(self.body).items()}
+                session = self._session(create=True)
+                roll_number = form.get('username', '').strip()
+
+                expected = session.get('captcha')
+                session['captcha'] = None  # A CAPTCHA is good for one attempt
+                if form.get('csrf_token') != session['csrf']:
+                    self._login_page(session, "Invalid request, please try again")
+                    return
+                if not expected or form.get('captcha', '').strip().upper() != expected:
+                    with portal._lock:
+                        portal.rejected_captchas += 1
+                    self._login_page(session, "Invalid Captcha")
+                    return
+                if portal._chance(portal.captcha_reject_rate):
+                    with portal._lock:
+                        portal.rejected_captchas += 1
+                        portal.injected_rejections += 1
+                    self._login_page(session, "Invalid Captcha")
+                    return
+                if form.get('password1') != portal.password or not roll_number or \
+                        MockKITPortal._selected(roll_number, 'invalid', portal.invalid_rate):
+                    self._login_page(session, "Invalid username or password")
+                    return
+
+                session['user'] = roll_number
+                with portal._lock:
+                    portal.logins += 1
+                self._redirect(RESULTS_PATH, session)
+
+            def _captcha(self, path):
+                captcha_id = path.rsplit('/', 1)[-1].split('.')[0]
+                with portal._lock:
+                    image = portal._captchas.get(captcha_id)
+                if image is None:
+                    self._send(404, b'Not Found', 'text/plain')
+                    return
+                self._send(200, image, 'image/png', headers={'Cache-Control': 'no-store'})
+
+            def _results(self, path):
+                session = self._session()
+                if not session or not session.get('user'):
+                    self._redirect(LOGIN_PATH)
+                    return
+                self._send(200, render_results(session['user']).encode('utf-8'))
+
+            def _profile(self, path):
+                session = self._session()
+                if not session or not session.get('user'):
+                    self._redirect(LOGIN_PATH)
+                    return
+                roll_number = session['user']
+                with_photo = not MockKITPortal._selected(roll_number, 'photo', portal.missing_photo_rate)
+                self._send(200, render_profile(roll_number, with_photo).encode('utf-8'))
+
+            def _photo(self, path):
+                session = self._session()
+                if not session or not session.get('user'):
+                    self._send(403, b'Forbidden', 'text/plain')
+                    return
+                roll_number = path.rsplit('/', 1)[-1].rsplit('.', 1)[0]
+                if MockKITPortal._selected(roll_number, 'photo', portal.missing_photo_rate):
+                    self._send(404, b'Not Found', 'text/plain')
+                    return
+                image = portal.photo(roll_number)
+                etag = f'"{hashlib.sha256(image).hexdigest()[:16]}"'
+                if self.headers.get('If-None-Match') == etag:
+                    self._send(304, headers={'ETag': etag})
+                    return
+                self._send(200, image, 'image/jpeg', headers={'ETag': etag})
+
+            def _logout(self, path):
+                session = self._session()
+                if session:
+                    session['user'] = None
+                self._redirect(LOGIN_PATH)
+
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+
+        return Handler
+
+
+if __name__ == "__main__":
+    # Usage: python mock_kit_portal.py [port] [latency_ms]
+    logging.basicConfig(level=logging.INFO)
+
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8091
+    latency = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.0
+    portal = MockKITPortal(port=port, latency=latency)
+    print(f"Mock KIT portal listening on {portal.root_url} (password: {portal.password})")
+    print("Point config.json portal.root_url at it")
+    portal.serve_forever()
+    portal.log_report()
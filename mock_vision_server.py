@@ -0,0 +1,151 @@
+"""
+Local Stand-in for the Google Vision images:annotate API
+Lets the CAPTCHA solver be exercised offline (no API key, no network)
+"""
+
+import sys
+import json
+import time
+import base64
+import hashlib
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class MockVisionServer:
+    """
+    Minimal images:annotate server
+
+    Answers each image by:
+      1. Looking up its SHA-256 in `answers` (labelled datasets)
+      2. Otherwise, if the image bytes are plain ASCII text, echoing them back
+         (so b"AB12C" "reads" as AB12C)
+      3. Otherwise returning no textAnnotations
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0,
+                 answers: Optional[Dict[str, str]] = None, latency: float = 0.0):
+        """
+        Args:
+            host: Interface to bind
+            port: Port to bind (0 picks a free port)
+            answers: Map of image SHA-256 hex digest -> answer text
+            latency: Seconds added to every request (simulates API round trip)
+        """
+        self.answers = answers if answers is not None else {}  # Shared dicts may start empty
+        self.latency = latency
+        self.request_count = 0
+        self.image_count = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        """Base URL the server listens on"""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def endpoint(self) -> str:
+        """images:annotate URL to pass to GoogleVisionCaptchaSolver(endpoint=...)"""
+        return f"{self.url}/v1/images:annotate"
+
+    def start(self) -> 'MockVisionServer':
+        """Serve in a background thread"""
+        self._thread = threading.Thread(target=self._server.serve_forever, name="mock-vision", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """Serve in the calling thread until interrupted (Ctrl+C), then close the socket"""
+        try:
+            self._server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._server.server_close()
+
+    def stop(self):
+        """Shut the server down"""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def annotate(self, image_bytes: bytes) -> Dict:
+        """Build one annotate response entry for an image"""
+        answer = self.answers.get(hashlib.sha256(image_bytes).hexdigest())
+        if answer is None:
+            try:
+                text = image_bytes.decode('ascii')
+                if text.isprintable():
+                    answer = text
+            except UnicodeDecodeError:
+                pass
+
+        if not answer:
+            return {}
+        return {"textAnnotations": [{"locale": "en", "description": answer + "\n"}]}
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                try:
+                    body = json.loads(self.rfile.read(length))
+                    requests_list = body['requests']
+                except (ValueError, KeyError):
+                    self._send(400, {"error": {"code": 400, "message": "Invalid JSON payload"}})
+                    return
+
+                if server.latency:
+                    time.sleep(server.latency)
+
+                with server._lock:
+                    server.request_count += 1
+                    server.image_count += len(requests_list)
+
+                responses = []
+                for entry in requests_list:
+                    try:
+                        image_bytes = base64.b64decode(entry['image']['content'])
+                    except (KeyError, ValueError):
+                        responses.append({"error": {"code": 400, "message": "Bad image data"}})
+                        continue
+                    responses.append(server.annotate(image_bytes))
+
+                self._send(200, {"responses": responses})
+
+            def _send(self, status: int, payload: Dict):
+                data = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+
+        return Handler
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8090
+    server = MockVisionServer(port=port)
+    print(f"Mock Vision API listening on {server.endpoint}")
+    print("Use it with: GoogleVisionCaptchaSolver(api_key, endpoint=...)")
+    server.serve_forever()
@@ -0,0 +1,111 @@
+"""
+Page Archive
+Stores raw Results/Usersprofile HTML per student and re-parses it in bulk
+without a browser or network access
+"""
+
+import sys
+import gzip
+import json
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+from portal_parser import build_student_record
+
+logger = logging.getLogger(__name__)
+
+PAGE_KINDS = ('results', 'profile')
+
+
+def parse_student_pages(roll_number: str, results_html: Optional[str],
+                        profile_html: Optional[str]) -> Dict:
+    """
+    Build a process_student record from raw page HTML
+
+    Args:
+        roll_number: Student roll number
+        results_html: Results page HTML (None if never reached)
+        profile_html: Usersprofile page HTML (None if never reached)
+    """
+    return build_student_record(roll_number, results_html, profile_html)
+
+
+def _reparse_files(roll_number: str, results_path: Optional[str], profile_path: Optional[str]) -> Dict:
+    """Process-pool entry point: read archived pages and parse them"""
+    def read(path):
+        if path is None:
+            return None
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            return f.read()
+    return parse_student_pages(roll_number, read(results_path), read(profile_path))
+
+
+class PageArchive:
+    """Gzipped HTML pages, one file per student and page: <roll>_<kind>.html.gz"""
+
+    def __init__(self, directory: Union[str, Path]):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def path(self, roll_number: str, kind: str) -> Path:
+        return self.directory / f"{roll_number}_{kind}.html.gz"
+
+    def save(self, roll_number: str, kind: str, page_html: str):
+        """Store one page (overwrites the previous copy)"""
+        with gzip.open(self.path(roll_number, kind), 'wt', encoding='utf-8') as f:
+            f.write(page_html)
+
+    def load(self, roll_number: str, kind: str) -> Optional[str]:
+        """Stored page HTML, or None"""
+        path = self.path(roll_number, kind)
+        if not path.exists():
+            return None
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            return f.read()
+
+    def roll_numbers(self) -> List[str]:
+        """Students with at least one stored page, sorted"""
+        rolls = set()
+        for kind in PAGE_KINDS:
+            suffix = f"_{kind}.html.gz"
+            rolls.update(p.name[:-len(suffix)] for p in self.directory.glob(f"*{suffix}"))
+        return sorted(rolls)
+
+    def reparse(self, roll_numbers: Optional[List[str]] = None, workers: Optional[int] = None) -> List[Dict]:
+        """
+        Re-parse stored pages in a process pool
+
+        Args:
+            roll_numbers: Students to re-parse (default: everything in the archive)
+            workers: Parser processes (default: CPU count)
+
+        Returns:
+            process_student records in roll-number order
+        """
+        roll_numbers = roll_numbers if roll_numbers is not None else self.roll_numbers()
+        jobs = []
+        for roll in roll_numbers:
+            paths = [self.path(roll, kind) for kind in PAGE_KINDS]
+            jobs.append([roll] + [str(p) if p.exists() else None for p in paths])
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(_reparse_files, *zip(*jobs), chunksize=16)) if jobs else []
+
+
+if __name__ == "__main__":
+    # Usage: python page_archive.py output_data/pages reparsed.jsonl
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if len(sys.argv) < 3:
+        print("Usage: python page_archive.py <pages_dir> <output.jsonl>")
+        sys.exit(1)
+
+    archive = PageArchive(sys.argv[1])
+    records = archive.reparse()
+    with open(sys.argv[2], 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+    success = sum(1 for r in records if r.get('status') == 'Success')
+    logger.info(f"✓ Re-parsed {len(records)} students ({success} complete) into {sys.argv[2]}")
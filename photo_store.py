@@ -0,0 +1,318 @@
+"""
+Photo Download Stage
+Concurrent conditional (ETag/Last-Modified) photo downloads into a
+content-addressed store, off the per-student critical path
+"""
+
+import os
+import time
+import shutil
+import sqlite3
+import hashlib
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set, Tuple, Union
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+
+class PhotoStore:
+    """
+    Content-addressed photo files plus a per-URL validator index
+
+    Each distinct image is stored once as store/<sha256>.jpg; photos/<roll>.jpg
+    is a hard link to it (a copy where links aren't supported). The index keeps
+    the ETag/Last-Modified of every student's photo URL so the next run can ask
+    the portal whether anything changed (keyed per student as well, in case the
+    portal serves photos from one session-dependent URL).
+    """
+
+    def __init__(self, photos_dir: Union[str, Path]):
+        self.photos_dir = Path(photos_dir)
+        self.store_dir = self.photos_dir / "store"
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.photos_dir / "photo_index.sqlite"),
+                                   check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS photos (
+                roll_number TEXT NOT NULL,
+                url TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                hash TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                updated REAL NOT NULL,
+                PRIMARY KEY (roll_number, url)
+            )
+        """)
+        self._db.commit()
+
+    def object_path(self, digest: str) -> Path:
+        return self.store_dir / f"{digest}.jpg"
+
+    def validators(self, roll_number: str, url: str) -> Optional[Dict]:
+        """Stored ETag/Last-Modified/hash for a student's photo, if its object still exists"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT etag, last_modified, hash, size FROM photos WHERE roll_number = ? AND url = ?",
+                (roll_number, url)).fetchone()
+        if row is None or not self.object_path(row[2]).exists():
+            return None
+        return {'etag': row[0], 'last_modified': row[1], 'hash': row[2], 'size': row[3]}
+
+    def put(self, roll_number: str, url: str, content: bytes,
+            etag: Optional[str], last_modified: Optional[str]) -> Tuple[str, bool]:
+        """
+        Store downloaded bytes
+
+        Returns:
+            (digest, deduplicated) - deduplicated is True if the image was already stored
+        """
+        digest = hashlib.sha256(content).hexdigest()
+        path = self.object_path(digest)
+        deduplicated = path.exists()
+        if not deduplicated:
+            tmp_path = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+            tmp_path.write_bytes(content)
+            os.replace(tmp_path, path)
+
+        with self._lock:
+            self._db.execute("""
+                INSERT INTO photos (roll_number, url, etag, last_modified, hash, size, updated)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(roll_number, url) DO UPDATE SET
+                    etag = excluded.etag, last_modified = excluded.last_modified,
+                    hash = excluded.hash, size = excluded.size, updated = excluded.updated
+            """, (roll_number, url, etag, last_modified, digest, len(content), time.time()))
+            self._db.commit()
+        return digest, deduplicated
+
+    def link(self, roll_number: str, digest: str) -> str:
+        """Point photos/<roll>.jpg at a stored object"""
+        target = self.object_path(digest)
+        named = self.photos_dir / f"{roll_number}.jpg"
+        try:
+            if named.exists() and os.path.samefile(named, target):
+                return str(named)
+            if named.exists():
+                named.unlink()
+            os.link(target, named)
+        except OSError:
+            shutil.copyfile(target, named)
+        return str(named)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class PhotoDownloader:
+    """
+    Background photo downloads shared by every engine and worker
+
+    submit() returns immediately so the student flow moves on to the next
+    login while the photo downloads on a small thread pool. Downloads ride on
+    the student's portal session, so given a `logout_url` the background stage
+    ends that session itself (download -> logout, with the same cookies) and
+    the caller just drops its copy of the session.
+    """
+
+    def __init__(self, store: PhotoStore, http_pool, workers: int = 4, timeout: float = 10):
+        """
+        Args:
+            store: PhotoStore to write into
+            http_pool: HTTPSessionPool (downloads ride on its keep-alive connections)
+            workers: Concurrent downloads
+            timeout: Per-request timeout (seconds)
+        """
+        self.store = store
+        self.http_pool = http_pool
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='photo')
+        self._futures: Dict[str, Future] = {}
+        self._cookies: Dict[str, Dict[str, str]] = {}
+        self._logged_out: Set[str] = set()
+        self._lock = threading.Lock()
+        self.on_photo: Optional[Callable[[str], None]] = None  # Called with each photo path as it lands
+
+        self.downloaded = 0
+        self.not_modified = 0
+        self.deduplicated = 0
+        self.failed = 0
+        self.bytes_downloaded = 0
+        self.bytes_saved = 0
+
+    def submit(self, roll_number: str, photo_url: str, cookies: Optional[Dict[str, str]] = None,
+               logout_url: Optional[str] = None) -> Future:
+        """
+        Queue a photo download
+
+        Args:
+            roll_number: Student the photo belongs to
+            photo_url: Absolute photo URL
+            cookies: Portal session cookies to send with the request
+            logout_url: GET with the same cookies once the download is done (retried
+                once first if it failed), ending the portal session in the background
+        """
+        cookies = dict(cookies or {})
+        future = self._executor.submit(self._download_stage, roll_number, photo_url, cookies, logout_url)
+        with self._lock:
+            self._futures[roll_number] = future
+            self._logged_out.discard(roll_number)
+            if cookies:
+                self._cookies[roll_number] = cookies  # Reused if the download is retried
+        return future
+
+    def wait(self, roll_number: str) -> Optional[str]:
+        """
+        Block until a student's queued download (and background logout) finishes
+
+        Returns:
+            photos/<roll>.jpg or None (no download queued, or it failed)
+        """
+        with self._lock:
+            future = self._futures.get(roll_number)
+        return future.result() if future is not None else None
+
+    def _count(self, **deltas):
+        with self._lock:
+            for name, delta in deltas.items():
+                setattr(self, name, getattr(self, name) + delta)
+
+    def _download_stage(self, roll_number: str, photo_url: str, cookies: Dict[str, str],
+                        logout_url: Optional[str]) -> Optional[str]:
+        """Download, then (given logout_url) log the session out; never raises"""
+        photo_path = self._download_logged(roll_number, photo_url, cookies)
+        if logout_url:
+            if photo_path is None:
+                # Last chance while the session is still valid
+                photo_path = self._download_logged(roll_number, photo_url, cookies)
+            session = self.http_pool.new_session()
+            session.cookies.update(cookies)
+            try:
+                session.get(logout_url, timeout=self.timeout)
+            except requests.exceptions.RequestException as e:
+                logger.warning(f"Logout error for {roll_number}: {e}")
+            with self._lock:
+                self._cookies.pop(roll_number, None)
+                self._logged_out.add(roll_number)
+        if photo_path and self.on_photo:
+            try:
+                self.on_photo(photo_path)
+            except Exception as e:
+                logger.warning(f"Photo callback failed for {roll_number}: {e}")
+        return photo_path
+
+    def _download_logged(self, roll_number: str, photo_url: str, cookies: Dict[str, str]) -> Optional[str]:
+        """_download that counts and logs unexpected errors instead of raising"""
+        try:
+            return self._download(roll_number, photo_url, cookies)
+        except Exception as e:
+            self._count(failed=1)
+            logger.warning(f"Photo download failed for {roll_number}: {e}")
+            return None
+
+    def _download(self, roll_number: str, photo_url: str, cookies: Dict[str, str]) -> Optional[str]:
+        """Conditional GET; returns photos/<roll>.jpg or None"""
+        known = self.store.validators(roll_number, photo_url)
+        headers = {}
+        if known:
+            if known['etag']:
+                headers['If-None-Match'] = known['etag']
+            if known['last_modified']:
+                headers['If-Modified-Since'] = known['last_modified']
+
+        # Cookie-isolated session on the shared pools (never close() it)
+        session = self.http_pool.new_session()
+        session.cookies.update(cookies)
+        try:
+            response = session.get(photo_url, headers=headers, timeout=self.timeout)
+        except requests.exceptions.RequestException as e:
+            self._count(failed=1)
+            logger.warning(f"Photo download failed for {roll_number}: {e}")
+            return None
+
+        if response.status_code == 304 and known:
+            self._count(not_modified=1, bytes_saved=known['size'])
+            return self.store.link(roll_number, known['hash'])
+
+        if response.status_code != 200 or not response.content:
+            self._count(failed=1)
+            logger.warning(f"Photo download failed for {roll_number}: HTTP {response.status_code}")
+            return None
+
+        content = response.content
+        digest, deduplicated = self.store.put(roll_number, photo_url, content,
+                                              response.headers.get('ETag'),
+                                              response.headers.get('Last-Modified'))
+        self._count(downloaded=1, bytes_downloaded=len(content))
+        if deduplicated:
+            self._count(deduplicated=1, bytes_saved=len(content))
+        return self.store.link(roll_number, digest)
+
+    def collect(self, records: List[Dict]) -> List[Dict]:
+        """
+        Wait for downloads and fill in photo_path
+
+        Successful records that have a photo_url but no photo (e.g. from a
+        crashed earlier run, or a download that failed) are queued once more
+        with the cookies of their original download - unless the background
+        stage already retried it and logged that session out.
+
+        Returns:
+            Records whose photo_path changed
+        """
+        retry = []
+        for record in records:
+            roll = record.get('roll_number')
+            with self._lock:
+                future = self._futures.get(roll)
+            if not record.get('photo_url'):
+                continue
+            if future is not None and future.result() is None:
+                with self._lock:
+                    logged_out = roll in self._logged_out
+                if not logged_out:
+                    retry.append(record)
+            elif future is None and not record.get('photo_path'):
+                retry.append(record)
+        for record in retry:
+            roll = record['roll_number']
+            with self._lock:
+                cookies = self._cookies.get(roll)
+            self.submit(roll, record['photo_url'], cookies)
+
+        updated = []
+        for record in records:
+            with self._lock:
+                future = self._futures.pop(record.get('roll_number'), None)
+                self._cookies.pop(record.get('roll_number'), None)
+                self._logged_out.discard(record.get('roll_number'))
+            if future is None:
+                continue
+            photo_path = future.result()
+            if photo_path and photo_path != record.get('photo_path'):
+                record['photo_path'] = photo_path
+                updated.append(record)
+        return updated
+
+    def close(self):
+        """Finish queued downloads, stop the threads and close the store index"""
+        self._executor.shutdown(wait=True)
+        self.store.close()
+
+    def log_report(self):
+        """Log download, revalidation and dedup counters"""
+        total = self.downloaded + self.not_modified + self.failed
+        if not total:
+            return
+        logger.info(f"📷 Photos: {self.downloaded} downloaded ({self.bytes_downloaded / 1024:.0f} KB), "
+                    f"{self.not_modified} not modified, {self.deduplicated} duplicates, {self.failed} failed; "
+                    f"{self.bytes_saved / 1024:.0f} KB saved")
@@ -0,0 +1,302 @@
+"""
+End-to-End Portal Benchmark
+Runs KITPortalAutomation against the local MockKITPortal (with MockVisionServer
+for CAPTCHAs) and reports students per minute, per-phase timings and memory
+for each engine
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import tempfile
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from mock_kit_portal import MockKITPortal
+from mock_vision_server import MockVisionServer
+
+try:
+    import psutil  # Optional: child process memory on every platform
+except ImportError:
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+
+class PhaseTimer:
+    """Thread-safe call count and total seconds per phase"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.phases: Dict[str, Dict] = {}
+
+    def add(self, name: str, seconds: float):
+        with self._lock:
+            entry = self.phases.setdefault(name, {'calls': 0, 'seconds': 0.0})
+            entry['calls'] += 1
+            entry['seconds'] += seconds
+
+    def wrap(self, obj, attribute: str, name: str, on_start: Optional[Callable] = None):
+        """Time every call of obj.attribute (instance attribute, so only this object is affected)"""
+        original = getattr(obj, attribute)
+
+        def _timed(*args, **kwargs):
+            if on_start:
+                on_start(*args, **kwargs)
+            start = time.monotonic()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                self.add(name, time.monotonic() - start)
+
+        setattr(obj, attribute, _timed)
+
+
+def _proc_descendants(pid: int) -> List[int]:
+    """All descendant pids of pid, from the parent pid in each /proc/<pid>/stat (Linux)"""
+    children: Dict[int, List[int]] = {}
+    for stat in Path('/proc').glob('[0-9]*/stat'):
+        try:
+            # Fields after the parenthesised command name: state, ppid, ...
+            ppid = int(stat.read_text().rsplit(')', 1)[1].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        children.setdefault(ppid, []).append(int(stat.parent.name))
+
+    descendants, stack = [], [pid]
+    while stack:
+        found = children.get(stack.pop(), [])
+        descendants.extend(found)
+        stack.extend(found)
+    return descendants
+
+
+def _proc_rss(pid: int) -> int:
+    """Resident set size of pid in bytes from /proc (0 if it has exited)"""
+    try:
+        with open(f'/proc/{pid}/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+class MemorySampler:
+    """
+    Peak resident memory of this process and its children (Chrome, thumbnail
+    pool) while running
+
+    Uses psutil when installed, else /proc on Linux. Without either, only this
+    process' high-water mark is available (Unix), or nothing at all (Windows).
+    Shared pages count once per process, so child totals run high.
+    """
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.baseline = self.current()
+        self.peak = self.baseline
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, name='memory-sampler', daemon=True)
+
+    @staticmethod
+    def current() -> float:
+        """Resident set size in MB, child processes included"""
+        if psutil is not None:
+            process = psutil.Process()
+            total = process.memory_info().rss
+            for child in process.children(recursive=True):
+                try:
+                    total += child.memory_info().rss
+                except psutil.Error:  # Exited while sampling
+                    pass
+            return total / 2 ** 20
+
+        if os.path.exists('/proc/self/statm'):
+            pid = os.getpid()
+            return sum(_proc_rss(p) for p in [pid] + _proc_descendants(pid)) / 2 ** 20
+
+        try:
+            import resource
+        except ImportError:
+            return 0.0
+        # macOS reports bytes, Linux kilobytes
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maxrss / 2 ** 20 if sys.platform == 'darwin' else maxrss / 2 ** 10
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, self.current())
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self.current())
+
+
+def benchmark_config(engine: str, students: int, root_url: str, password: str, vision_endpoint: str,
+                     output_dir: Path, options: Dict) -> Dict:
+    """config.json for one benchmark run against the stand-ins"""
+    captcha = {
+        'google_vision_api_key': 'benchmark',
+        'vision_endpoint': vision_endpoint,
+        'easyocr': options.get('easyocr', False),
+    }
+    if options.get('model'):
+        captcha['local_model'] = options['model']
+    return {
+        'engine': engine,
+        'portal': {'root_url': root_url, 'password': password},
+        'departments': {'bench': {'prefix': 'BENCH', 'start': 1, 'end': students}},
+        'output': {'directory': str(output_dir)},
+        'captcha': captcha,
+        'parallel': {
+            'workers': options.get('workers', 1),
+            'concurrency': options.get('concurrency', 50),
+            'fetch_workers': options.get('fetch_workers', 4),
+        },
+        'ocr': {'warmup': 'lazy'},
+        'waits': {'between_students': 0},
+    }
+
+
+def run_engine(engine: str, students: int, workdir: Path, portal_options: Dict,
+               vision_latency: float = 0.3, options: Optional[Dict] = None) -> Dict:
+    """
+    One full KITPortalAutomation.run() against fresh stand-ins
+
+    Returns:
+        students, successes, students_per_minute, seconds, phases, memory and
+        the portal's per-route stats
+    """
+    from automation import KITPortalAutomation
+
+    options = options or {}
+    run_dir = workdir / engine
+    run_dir.mkdir(parents=True, exist_ok=True)
+
+    with MockKITPortal(**portal_options) as portal, \
+            MockVisionServer(answers=portal.answers, latency=vision_latency) as vision:
+        config_path = run_dir / "config.json"
+        with open(config_path, 'w') as f:
+            json.dump(benchmark_config(engine, students, portal.root_url, portal.password,
+                                       vision.endpoint, run_dir / "output", options), f, indent=2)
+
+        timer = PhaseTimer()
+        marks: Dict[str, float] = {}
+        records: List[Dict] = []
+
+        with MemorySampler() as memory:
+            start = time.monotonic()
+            automation = KITPortalAutomation(str(config_path))
+            timer.add('startup', time.monotonic() - start)
+
+            timer.wrap(automation, 'solve_captcha_image', 'captcha_solve')
+            timer.wrap(automation.photos, 'collect', 'photo_wait',
+                       on_start=lambda *args: marks.setdefault('scraped', time.monotonic()))
+            timer.wrap(automation, 'save_to_excel', 'excel',
+                       on_start=lambda all_data, *args: records.extend(all_data))
+
+            run_start = time.monotonic()
+            automation.run('bench')
+            end = time.monotonic()
+
+        timer.add('scrape', marks.get('scraped', end) - run_start)
+        if automation.driver:
+            automation.driver.quit()
+
+    seconds = end - start
+    successes = sum(1 for record in records if record.get('status') == 'Success')
+    return {
+        'engine': engine,
+        'students': students,
+        'successes': successes,
+        'seconds': seconds,
+        'students_per_minute': successes / seconds * 60 if seconds else 0.0,
+        'phases': timer.phases,
+        'memory_peak_mb': memory.peak,
+        'memory_delta_mb': memory.peak - memory.baseline,
+        'portal': {route: dict(entry) for route, entry in portal.stats.items() if entry['requests']},
+        'captcha_rejections': portal.rejected_captchas,
+    }
+
+
+def log_results(results: List[Dict]):
+    """Log a comparison table plus per-phase and per-route detail for each engine"""
+    logger.info("🏁 Portal benchmark")
+    logger.info(f"   {'engine':<10}{'ok':>6}{'total s':>10}{'students/min':>14}{'peak MB':>10}{'+MB':>8}")
+    for result in results:
+        logger.info(f"   {result['engine']:<10}{result['successes']:>3}/{result['students']:<3}"
+                    f"{result['seconds']:>9.1f}{result['students_per_minute']:>14.1f}"
+                    f"{result['memory_peak_mb']:>10.0f}{result['memory_delta_mb']:>8.0f}")
+
+    for result in results:
+        logger.info(f"⏱️ {result['engine']} phases:")
+        for name, entry in result['phases'].items():
+            mean = entry['seconds'] / entry['calls'] * 1000
+            logger.info(f"   {name:<14}{entry['seconds']:>8.2f}s total{entry['calls']:>6} calls"
+                        f"{mean:>10.1f} ms avg")
+        routes = ', '.join(f"{route} {entry['requests']}×{entry['seconds'] * 1000 / entry['requests']:.0f}ms"
+                           for route, entry in result['portal'].items())
+        logger.info(f"   portal: {routes}; {result['captcha_rejections']} CAPTCHA rejections")
+
+
+def _option(name: str, default: Optional[str] = None) -> Optional[str]:
+    """Value following --name on the command line"""
+    if name in sys.argv:
+        index = sys.argv.index(name)
+        if index + 1 < len(sys.argv):
+            return sys.argv[index + 1]
+    return default
+
+
+if __name__ == "__main__":
+    # Usage: python portal_benchmark.py [--engines http,async] [--students 30] [--latency-ms 50]
+    #            [--vision-latency-ms 300] [--error-rate 0.0] [--captcha-reject-rate 0.0]
+    #            [--workers 1] [--concurrency 50] [--model captcha_model.npz] [--easyocr]
+    #            [--json results.json] [--verbose]
+    from automation import configure_logging
+
+    configure_logging()
+    if '--verbose' not in sys.argv:
+        logging.getLogger().setLevel(logging.WARNING)
+    logger.setLevel(logging.INFO)
+
+    engines = _option('--engines', 'http,async').split(',')
+    students = int(_option('--students', '30'))
+    portal_options = {
+        'latency': float(_option('--latency-ms', '50')) / 1000,
+        'error_rate': float(_option('--error-rate', '0')),
+        'captcha_reject_rate': float(_option('--captcha-reject-rate', '0')),
+    }
+    options = {
+        'workers': int(_option('--workers', '1')),
+        'concurrency': int(_option('--concurrency', '50')),
+        'fetch_workers': int(_option('--fetch-workers', '4')),
+        'model': _option('--model'),
+        'easyocr': '--easyocr' in sys.argv,
+    }
+    vision_latency = float(_option('--vision-latency-ms', '300')) / 1000
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix='kit-bench-') as workdir:
+        for engine in engines:
+            logger.info(f"▶️ {engine}: {students} students")
+            results.append(run_engine(engine, students, Path(workdir), portal_options,
+                                      vision_latency, options))
+
+    log_results(results)
+    if _option('--json'):
+        with open(_option('--json'), 'w') as f:
+            json.dump(results, f, indent=2)
+
+    # Without injected failures every student must make it
+    incomplete = [result['engine'] for result in results if result['successes'] < result['students']]
+    if incomplete and not portal_options['error_rate'] and not portal_options['captcha_reject_rate']:
+        logger.error(f"❌ Not every student succeeded with no injected failures: {', '.join(incomplete)}")
+        sys.exit(1)
@@ -0,0 +1,237 @@
+"""
+KIT Portal HTML Parser
+Parses Results and Usersprofile pages with lxml (no browser needed)
+"""
+
+import logging
+from typing import Dict, List, Optional
+
+from lxml import etree, html as lxml_html
+
+logger = logging.getLogger(__name__)
+
+
+# Header fields on the Results page: data key -> label cell text
+MARKSHEET_FIELDS = {
+    'name': "Name",
+    'register_number': "Register Number",
+    'regulation': "Regulation",
+    'gender': "Gender",
+    'dob': "Date of Birth",
+    'branch': "Branch",
+}
+
+# Form fields on the Usersprofile page: data key -> input label text
+PROFILE_FIELDS = {
+    'first_name': "First Name",
+    'last_name': "Last Name",
+    'blood_group': "Blood Group",
+    'mobile': "Mobile Number",
+    'email': "Email",
+    'alternative_mobile': "Alternative Mobile Number",
+    'alternative_email': "Alternative Email",
+    'community': "Community",
+    'caste': "Caste",
+    'religion': "Religion",
+    'nationality': "Nationality",
+}
+
+# Words that tell a CAPTCHA error message from a username/password one
+CAPTCHA_ERROR_WORDS = ('captcha', 'security code', 'verification code')
+CREDENTIAL_ERROR_WORDS = ('password', 'username', 'user name', 'register number', 'credential')
+
+# Course table columns, in page order
+COURSE_COLUMNS = ['semester', 'course_code', 'course_name', 'grade', 'gp', 'result']
+
+# Precompiled XPath expressions (same selectors as the Selenium path)
+_MARKSHEET_XPATHS = {
+    key: etree.XPath(f"//td[contains(text(), '{label}')]/following-sibling::td")
+    for key, label in MARKSHEET_FIELDS.items()
+}
+_PROFILE_XPATHS = {
+    key: etree.XPath(f"//input[preceding-sibling::label[contains(text(), '{label}')]]/@value")
+    for key, label in PROFILE_FIELDS.items()
+}
+_COURSE_TABLE_XPATH = etree.XPath(
+    "//table[.//th[contains(text(), 'COURSE NAME') or contains(text(), 'Course Name')]]")
+_ROW_XPATH = etree.XPath(".//tr")
+_CELL_XPATH = etree.XPath(".//td")
+_PHOTO_XPATH = etree.XPath("//img[contains(@src, 'upload') or contains(@class, 'profile')]/@src")
+_CAPTCHA_XPATH = etree.XPath("//img[contains(@src, 'captcha_images')]/@src")
+_LOGIN_FORM_XPATH = etree.XPath("//form[.//input[@id='username' or @name='username']]")
+_HIDDEN_INPUTS_XPATH = etree.XPath(".//input[@type='hidden'][@name]")
+# Same message text as waits.LOGIN_ERROR_XPATH
+_LOGIN_ERROR_XPATH = etree.XPath("//*[contains(text(), 'Invalid') or contains(text(), 'incorrect') "
+                                 "or contains(text(), 'wrong')]")
+
+
+def _text(element) -> str:
+    """Return element text with whitespace collapsed, like WebElement.text"""
+    return ' '.join(element.text_content().split())
+
+
+def parse_document(page_html: str):
+    """Parse an HTML string into an lxml document"""
+    return lxml_html.fromstring(page_html)
+
+
+def parse_marksheet_html(page_html: str) -> Dict:
+    """
+    Parse the Results page
+
+    Args:
+        page_html: Raw HTML of the Results page
+
+    Returns:
+        Dict with header fields and a 'courses' list, same shape as extract_marksheet_data
+    """
+    doc = parse_document(page_html)
+    data = {}
+
+    for key, xpath in _MARKSHEET_XPATHS.items():
+        matches = xpath(doc)
+        data[key] = _text(matches[0]) if matches else ''
+
+    courses: List[Dict] = []
+    tables = _COURSE_TABLE_XPATH(doc)
+    if tables:
+        for row in _ROW_XPATH(tables[0])[1:]:
+            cols = [_text(cell) for cell in _CELL_XPATH(row)]
+            if len(cols) >= 4:
+                course_data = {
+                    column: cols[idx] if len(cols) > idx else ''
+                    for idx, column in enumerate(COURSE_COLUMNS)
+                }
+                if course_data['course_name']:
+                    courses.append(course_data)
+
+    data['courses'] = courses
+    return data
+
+
+def parse_profile_html(page_html: str) -> Dict:
+    """
+    Parse the Usersprofile page
+
+    Args:
+        page_html: Raw HTML of the Usersprofile page
+
+    Returns:
+        Dict with profile form fields and 'photo_url' (relative or absolute, or None)
+    """
+    doc = parse_document(page_html)
+    data = {}
+
+    photo = _PHOTO_XPATH(doc)
+    data['photo_url'] = photo[0] if photo else None
+
+    for key, xpath in _PROFILE_XPATHS.items():
+        values = xpath(doc)
+        data[key] = values[0].strip() if values else ''
+
+    return data
+
+
+def is_results_page(page_html: str) -> bool:
+    """Check whether HTML is the Results page shown after a successful login"""
+    doc = parse_document(page_html)
+    return bool(_MARKSHEET_XPATHS['register_number'](doc))
+
+
+def is_profile_page(page_html: str) -> bool:
+    """Check whether HTML is the Edit User profile form"""
+    return "Edit User" in page_html
+
+
+def profile_belongs_to(page_html: str, roll_number: str) -> bool:
+    """Check whether a profile page shows roll_number (photo path, e-mail or other form values)"""
+    return roll_number.lower() in page_html.lower()
+
+
+def login_error_text(page_html: str) -> str:
+    """Error message shown on a login page ('' if there is none)"""
+    errors = _LOGIN_ERROR_XPATH(parse_document(page_html))
+    return _text(errors[0]) if errors else ''
+
+
+def login_error_kind(error_text: str) -> Optional[str]:
+    """
+    Classify a login error message
+
+    Returns:
+        'captcha' (wrong CAPTCHA answer), 'credentials' (wrong username or
+        password) or None if the message doesn't say
+    """
+    text = (error_text or '').lower()
+    if any(word in text for word in CAPTCHA_ERROR_WORDS):
+        return 'captcha'
+    if any(word in text for word in CREDENTIAL_ERROR_WORDS):
+        return 'credentials'
+    return None
+
+
+def parse_login_form(page_html: str) -> Dict:
+    """
+    Parse the login page
+
+    Returns:
+        Dict with 'action' (form action or None), 'hidden' (hidden input values)
+        and 'captcha_src' (CAPTCHA image src or None)
+    """
+    doc = parse_document(page_html)
+    form_info: Dict = {'action': None, 'hidden': {}, 'captcha_src': None}
+
+    forms = _LOGIN_FORM_XPATH(doc)
+    if forms:
+        form = forms[0]
+        form_info['action'] = form.get('action') or None
+        for hidden in _HIDDEN_INPUTS_XPATH(form):
+            form_info['hidden'][hidden.get('name')] = hidden.get('value', '')
+
+    captcha = _CAPTCHA_XPATH(doc)
+    form_info['captcha_src'] = captcha[0] if captcha else None
+    return form_info
+
+
+def absolute_url(root_url: str, src: Optional[str]) -> Optional[str]:
+    """Turn a page-relative src into an absolute URL on the portal"""
+    if not src:
+        return None
+    if src.startswith('http'):
+        return src
+    return root_url.rstrip('/') + ('/' if not src.startswith('/') else '') + src
+
+
+def build_student_record(roll_number: str, results_html: Optional[str], profile_html: Optional[str],
+                         root_url: Optional[str] = None, no_results_status: str = 'Login Failed') -> Dict:
+    """
+    Build a process_student record from the Results and Usersprofile page HTML
+
+    Args:
+        roll_number: Student roll number
+        results_html: Results page HTML (None if it was never reached)
+        profile_html: Usersprofile page HTML (None if never reached; anything but
+            the Edit User form counts as not reached)
+        root_url: Portal root used to make photo_url absolute (left as found if None)
+        no_results_status: Status recorded when there is no Results page
+
+    Returns:
+        Record with the marksheet and profile fields and a status: 'Success',
+        'Profile Navigation Failed' or no_results_status
+    """
+    student_data = {'roll_number': roll_number}
+    if results_html is None:
+        student_data['status'] = no_results_status
+        return student_data
+
+    student_data.update(parse_marksheet_html(results_html))
+    if not profile_html or not is_profile_page(profile_html):
+        student_data['status'] = 'Profile Navigation Failed'
+        return student_data
+
+    profile_data = parse_profile_html(profile_html)
+    if root_url:
+        profile_data['photo_url'] = absolute_url(root_url, profile_data['photo_url'])
+    student_data.update(profile_data)
+    student_data['status'] = 'Success'
+    return student_data
@@ -0,0 +1,69 @@
+"""
+Progress Journal
+Append-only JSONL record of every processed student, for crash-safe resume
+"""
+
+import os
+import json
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Set, Union
+
+logger = logging.getLogger(__name__)
+
+
+class ProgressJournal:
+    """Durable per-department log of process_student results"""
+
+    def __init__(self, path: Union[str, Path], resume: bool = True):
+        """
+        Args:
+            path: Journal file (one JSON record per line)
+            resume: Keep existing entries; otherwise archive the old journal and start fresh
+        """
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+        if not resume and self.path.exists():
+            archived = self.path.with_name(
+                f"{self.path.stem}_{datetime.now().strftime('%Y%m%d_%H%M%S')}{self.path.suffix}")
+            self.path.rename(archived)
+            logger.info(f"📒 Previous journal archived to {archived}")
+
+    def append(self, student_data: Dict):
+        """Write one record and flush it to disk before returning"""
+        line = json.dumps(student_data, ensure_ascii=False, default=str)
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+
+    def __iter__(self) -> Iterator[Dict]:
+        """Yield every record in write order (a torn last line from a crash is skipped)"""
+        if not self.path.exists():
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"⚠️ Skipping unreadable journal line {line_number}")
+
+    def latest(self) -> Dict[str, Dict]:
+        """Latest record per roll number (retries supersede earlier failures)"""
+        return {record['roll_number']: record for record in self if 'roll_number' in record}
+
+    def completed(self) -> Set[str]:
+        """Roll numbers already processed successfully"""
+        return {roll for roll, record in self.latest().items() if record.get('status') == 'Success'}
+
+    def records(self, roll_numbers: List[str]) -> List[Dict]:
+        """Final record for each roll number, in roll-number order"""
+        latest = self.latest()
+        return [latest.get(roll, {'roll_number': roll, 'status': 'Not Processed'}) for roll in roll_numbers]
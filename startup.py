@@ -0,0 +1,117 @@
+"""
+Startup Helpers
+Lazy/background EasyOCR loading and a timing report for overlapped startup steps
+"""
+
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class LazyEasyOCRReader:
+    """
+    EasyOCR reader that loads on first use (or in a background thread)
+
+    The model load takes seconds and hundreds of MB, so it is skipped entirely
+    when Google Vision answers every CAPTCHA.
+    """
+
+    def __init__(self, languages: Optional[List[str]] = None, gpu: bool = False):
+        self.languages = languages or ['en']
+        self.gpu = gpu
+        self.load_seconds: Optional[float] = None
+        self._reader = None
+        self._load_lock = threading.Lock()
+        self._read_lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        """True once the model is in memory"""
+        return self._reader is not None
+
+    def load(self):
+        """Load the model now (no-op if already loaded or loading elsewhere)"""
+        with self._load_lock:
+            if self._reader is not None:
+                return self._reader
+
+            logger.info("⏳ Loading EasyOCR model...")
+            start = time.monotonic()
+            import easyocr
+            self._reader = easyocr.Reader(self.languages, gpu=self.gpu)
+            self.load_seconds = time.monotonic() - start
+            logger.info(f"✓ EasyOCR model loaded in {self.load_seconds:.1f}s")
+            return self._reader
+
+    def readtext(self, image, **kwargs):
+        """Same as easyocr.Reader.readtext; loads the model on first call"""
+        reader = self.load()
+        with self._read_lock:
+            return reader.readtext(image, **kwargs)
+
+
+class StartupReport:
+    """Times startup phases that run sequentially or overlapped in background threads"""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.ready_at: Optional[float] = None
+        self._phases: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name: str, background: bool = False):
+        """Time a phase on the calling thread"""
+        start = time.monotonic()
+        with self._lock:
+            self._phases[name] = {'start': start, 'end': None, 'background': background}
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._phases[name]['end'] = time.monotonic()
+
+    def run_in_background(self, name: str, func: Callable) -> threading.Thread:
+        """Run a phase in a daemon thread so it overlaps the remaining startup"""
+        def _target():
+            try:
+                with self.phase(name, background=True):
+                    func()
+            except Exception as e:
+                logger.warning(f"⚠️ Background startup step '{name}' failed: {e}")
+
+        thread = threading.Thread(target=_target, name=f"startup-{name}", daemon=True)
+        thread.start()
+        return thread
+
+    def mark_ready(self):
+        """Record the moment the first student can start"""
+        if self.ready_at is None:
+            self.ready_at = time.monotonic()
+
+    def log_report(self):
+        """Log each phase, and the saving versus running them one after another"""
+        with self._lock:
+            phases = {name: dict(info) for name, info in self._phases.items()}
+        if not phases:
+            return
+
+        now = time.monotonic()
+        logger.info("🚀 Startup timing:")
+        sequential = 0.0
+        for name, info in sorted(phases.items(), key=lambda item: item[1]['start']):
+            end = info['end']
+            duration = (end if end is not None else now) - info['start']
+            sequential += duration
+            mode = "background" if info['background'] else "foreground"
+            state = "" if end is not None else " (still running)"
+            logger.info(f"   {name:<20}{duration:>8.2f}s  {mode}{state}")
+
+        if self.ready_at is not None:
+            ready = self.ready_at - self.started
+            logger.info(f"   Ready after {ready:.2f}s (one-after-another: {sequential:.2f}s, "
+                        f"saved {max(0.0, sequential - ready):.2f}s)")
@@ -5,7 +5,9 @@ Run this first to verify everything works
 
 import sys
 import logging
-from google_vision_captcha import GoogleVisionCaptchaSolver
+import threading
+from google_vision_captcha import GoogleVisionCaptchaSolver, VisionBatchCollector
+from mock_vision_server import MockVisionServer
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -121,9 +123,67 @@ def test_with_sample_captcha():
         return False
 
 
+def test_batching_with_local_server():
+    """Test solve_many and the micro-batching collector against the local stand-in"""
+    print("\n" + "="*70)
+    print(" 📦 TESTING BATCHED SOLVES (local stand-in, no network)")
+    print("="*70)
+    
+    with MockVisionServer(latency=0.05) as server:
+        solver = GoogleVisionCaptchaSolver("local-test-key", endpoint=server.endpoint)
+        
+        # solve_many: 20 images -> 2 calls (16 + 4)
+        images = [f"AB{i:03d}".encode() for i in range(20)]
+        results = solver.solve_many(images)
+        expected = [image.decode() for image in images]
+        if results != expected or server.request_count != 2:
+            print(f"\n❌ solve_many mismatch: {results} ({server.request_count} calls)")
+            return False
+        print(f"\n✅ solve_many: 20 images in {server.request_count} calls")
+        
+        # Collector: 12 concurrent callers should share a handful of POSTs
+        server.request_count = 0
+        collector = VisionBatchCollector(solver, window=0.1)
+        answers = {}
+        
+        def caller(idx):
+            answers[idx] = collector.solve_captcha(f"CD{idx:03d}".encode())
+        
+        threads = [threading.Thread(target=caller, args=(i,)) for i in range(12)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        collector.close()
+        
+        if any(answers[i] != f"CD{i:03d}" for i in range(12)):
+            print(f"\n❌ Collector returned wrong answers: {answers}")
+            return False
+        if server.request_count >= 12:
+            print(f"\n❌ Collector did not batch: {server.request_count} calls for 12 images")
+            return False
+        
+        print(f"✅ Collector: 12 concurrent solves in {server.request_count} call(s)")
+
+        # After close() nothing flushes the queue - calls must go straight to the API
+        result = [None]
+        late = threading.Thread(target=lambda: result.__setitem__(0, collector.solve_captcha(b"EF001")))
+        late.start()
+        late.join(timeout=5)
+        if late.is_alive() or result[0] != "EF001":
+            print(f"\n❌ Solve after close() {'hung' if late.is_alive() else f'returned {result[0]}'}")
+            return False
+        print("✅ Collector: solve after close() goes straight to the API")
+        return True
+
+
 if __name__ == "__main__":
     print("\n🚀 GOOGLE VISION API TESTER")
     
+    # Offline check: python test_google_vision.py --local
+    if '--local' in sys.argv:
+        sys.exit(0 if test_batching_with_local_server() else 1)
+    
     # Test 1: API Key
     if not test_api_key():
         print("\n❌ API key test failed!")
@@ -48,6 +48,7 @@ def test_single_student():
         print("\n🚀 Starting test...")
         print("="*70)
         student_data = automation.process_student(test_roll)
+        automation.photos.collect([student_data])  # wait for the background photo download
         
         # Display results
         print("\n" + "="*70)
@@ -140,7 +141,7 @@ def test_single_student():
                 print("   The profile selectors might need adjustment.")
             
             print("\n📋 Common Issues:")
-            print("   • CAPTCHA misread - Check captcha_temp.png")
+            print("   • CAPTCHA misread - Set captcha.save_debug_images and check captcha_temp.png")
             print("   • Wrong password - Verify in config.json")
             print("   • Network timeout - Check internet connection")
             print("   • Portal structure changed - Run diagnose_login.py")
@@ -173,6 +174,33 @@ def test_single_student():
             print("\n🔒 Browser closed")
 
 
+def test_extraction_timing(test_roll: str = "711524BAD001", repeats: int = 3):
+    """Compare script vs element-by-element marksheet extraction on a live Results page"""
+    
+    print("\n" + "="*70)
+    print(" ⏱️  TIMING MODE - Marksheet Extraction")
+    print("="*70)
+    
+    automation = KITPortalAutomation("config.json")
+    try:
+        automation.setup_driver()
+        if not automation.login(test_roll):
+            print("\n❌ Login failed - cannot time extraction")
+            return
+        
+        automation.waits.element_present('results_page',
+            ("xpath", "//td[contains(text(), 'Register Number')]"))
+        timings = automation.compare_marksheet_extraction(repeats)
+        
+        print(f"\n   Element-by-element: {timings['elements'] * 1000:.0f} ms")
+        print(f"   Single script:      {timings['script'] * 1000:.0f} ms")
+        
+        automation.logout()
+    finally:
+        if automation.driver:
+            automation.driver.quit()
+
+
 def test_config():
     """Test if configuration is valid"""
     print("\n" + "="*70)
@@ -236,6 +264,53 @@ def test_config():
         return False
 
 
+def test_back_to_back_runs():
+    """Two departments on one instance (http engine against the local stand-ins, no Chrome)"""
+    import tempfile
+    from pathlib import Path
+    from mock_kit_portal import MockKITPortal
+    from mock_vision_server import MockVisionServer
+    from progress_journal import ProgressJournal
+    
+    print("\n" + "="*70)
+    print(" 🔁 TESTING BACK-TO-BACK RUNS (local stand-ins, no network)")
+    print("="*70)
+    
+    with tempfile.TemporaryDirectory(prefix='kit-test-') as workdir, \
+            MockKITPortal() as portal, \
+            MockVisionServer(answers=portal.answers) as vision:
+        output_dir = Path(workdir) / "output"
+        config_path = Path(workdir) / "config.json"
+        with open(config_path, 'w') as f:
+            json.dump({
+                'engine': 'http',
+                'portal': {'root_url': portal.root_url, 'password': portal.password},
+                'departments': {
+                    'first': {'prefix': 'FIRST', 'start': 1, 'end': 3},
+                    'second': {'prefix': 'SECOND', 'start': 1, 'end': 3},
+                },
+                'output': {'directory': str(output_dir)},
+                'captcha': {'google_vision_api_key': 'test', 'vision_endpoint': vision.endpoint,
+                            'easyocr': False, 'batch_window_ms': 20},
+                'ocr': {'warmup': 'lazy'},
+            }, f)
+        
+        automation = KITPortalAutomation(str(config_path))
+        for department in ('first', 'second'):
+            automation.run(department)
+            records = ProgressJournal(output_dir / f"{department}_progress.jsonl").records(
+                automation.generate_roll_numbers(automation.config['departments'][department]))
+            failed = [r for r in records if r.get('status') != 'Success' or not r.get('photo_path')]
+            workbooks = list(output_dir.glob(f"{department}_*.xlsx"))
+            if failed or len(records) != 3 or len(workbooks) != 1:
+                print(f"\n❌ Run '{department}': {len(records) - len(failed)}/3 succeeded, "
+                      f"{len(workbooks)} workbook(s); failed: {failed}")
+                return False
+            print(f"✅ Run '{department}': 3/3 students with photos, workbook written")
+        automation.close()  # Already closed by run() - must be a no-op
+    return True
+
+
 def check_dependencies():
     """Check if all required packages are installed"""
     print("\n" + "="*70)
@@ -245,7 +320,6 @@ def check_dependencies():
     required = {
         'selenium': 'selenium',
         'easyocr': 'easyocr',
-        'pandas': 'pandas',
         'openpyxl': 'openpyxl',
         'PIL': 'Pillow',
         'requests': 'requests'
@@ -276,6 +350,10 @@ if __name__ == "__main__":
     print("\n🧪 KIT PORTAL AUTOMATION - TEST MODE")
     print("="*70)
     
+    # Offline check: python test_single.py --local
+    if "--local" in sys.argv:
+        sys.exit(0 if test_back_to_back_runs() else 1)
+    
     # Step 1: Check dependencies
     if not check_dependencies():
         print("\n❌ Install missing dependencies first!")
@@ -286,5 +364,8 @@ if __name__ == "__main__":
         print("\n❌ Fix config.json first!")
         exit(1)
     
-    # Step 3: Test single student
-    test_single_student()
\ No newline at end of file
+    # Step 3: Test single student (or time extraction modes with --timing)
+    if "--timing" in sys.argv:
+        test_extraction_timing()
+    else:
+        test_single_student()
\ No newline at end of file
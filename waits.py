@@ -0,0 +1,266 @@
+"""
+Event-Driven Wait Engine
+Waits on concrete page conditions instead of fixed sleeps and records how long each wait took
+"""
+
+import time
+import logging
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+
+logger = logging.getLogger(__name__)
+
+
+# Default per-step timeouts in seconds (override in config.json "waits")
+DEFAULT_TIMEOUTS = {
+    'login_form': 15,
+    'captcha_image': 5,
+    'login_result': 15,
+    'results_page': 10,
+    'profile_menu': 10,
+    'profile_page': 10,
+    'logout': 5,
+}
+
+
+class WaitStats:
+    """Thread-safe record of how long each wait step actually took"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._steps: Dict[str, Dict] = {}
+        self._missing: Dict[str, Dict] = {}
+
+    def record(self, step: str, elapsed: float, timed_out: bool):
+        """Record one wait"""
+        with self._lock:
+            entry = self._steps.setdefault(step, {'count': 0, 'total': 0.0, 'max': 0.0, 'timeouts': 0})
+            entry['count'] += 1
+            entry['total'] += elapsed
+            entry['max'] = max(entry['max'], elapsed)
+            if timed_out:
+                entry['timeouts'] += 1
+
+    def record_missing(self, what: str, elapsed: float):
+        """Record a lookup for an element that never appeared"""
+        with self._lock:
+            entry = self._missing.setdefault(what, {'count': 0, 'total': 0.0})
+            entry['count'] += 1
+            entry['total'] += elapsed
+
+    def missing_summary(self) -> Dict[str, Dict]:
+        """Per-element count and seconds lost to lookups that found nothing"""
+        with self._lock:
+            return {what: dict(entry) for what, entry in self._missing.items()}
+
+    def summary(self) -> Dict[str, Dict]:
+        """Copy of per-step stats, with average added"""
+        with self._lock:
+            summary = {}
+            for step, entry in self._steps.items():
+                summary[step] = dict(entry, avg=entry['total'] / entry['count'])
+            return summary
+
+    def log_report(self):
+        """Log where wait time went, slowest steps first"""
+        summary = self.summary()
+        missing = self.missing_summary()
+        if missing:
+            total = sum(entry['total'] for entry in missing.values())
+            count = sum(entry['count'] for entry in missing.values())
+            worst = max(missing.items(), key=lambda item: item[1]['total'])
+            logger.info(f"🕳️ {total:.2f}s spent on {count} lookups for elements that never appeared "
+                        f"(most: '{worst[0]}' {worst[1]['total']:.2f}s)")
+        if not summary:
+            return
+        logger.info("⏱️ Wait time by step:")
+        logger.info(f"   {'step':<16}{'count':>7}{'total s':>10}{'avg s':>8}{'max s':>8}{'timeouts':>10}")
+        for step, entry in sorted(summary.items(), key=lambda item: item[1]['total'], reverse=True):
+            logger.info(f"   {step:<16}{entry['count']:>7}{entry['total']:>10.2f}"
+                        f"{entry['avg']:>8.2f}{entry['max']:>8.2f}{entry['timeouts']:>10}")
+
+
+def document_ready(driver) -> bool:
+    """Condition: document.readyState is complete"""
+    return driver.execute_script("return document.readyState") == 'complete'
+
+
+def url_changed(old_url: str) -> Callable:
+    """Condition: current URL differs from old_url"""
+    def _condition(driver):
+        return driver.current_url != old_url
+    return _condition
+
+
+def image_loaded(locator: Tuple[str, str]) -> Callable:
+    """Condition: image element is present and has finished loading; returns the element"""
+    def _condition(driver):
+        elements = driver.find_elements(*locator)
+        if elements and driver.execute_script(
+                "return arguments[0].complete && arguments[0].naturalWidth > 0;", elements[0]):
+            return elements[0]
+        return False
+    return _condition
+
+
+# Text of the portal's wrong-password / wrong-CAPTCHA message
+LOGIN_ERROR_XPATH = ("//*[contains(text(), 'Invalid') or contains(text(), 'incorrect') "
+                     "or contains(text(), 'wrong')]")
+
+
+class login_outcome:
+    """
+    Condition: whichever login outcome shows up first, in one round trip per poll
+
+    Returns 'results_url' (URL moved to Results), 'results_page' (Register
+    Number cell rendered), 'error' (error message appeared) or 'login_form'
+    (login page reloaded without a message). Call arm() just before clicking
+    Login so a reload and pre-existing error text can be told apart.
+    """
+
+    ARM_SCRIPT = """
+window.__kitLoginPending = true;
+return document.evaluate(`count(${arguments[0]})`, document, null,
+    XPathResult.NUMBER_TYPE, null).numberValue;
+"""
+
+    STATE_SCRIPT = """
+const errorXpath = arguments[0];
+function count(xpath) {
+    return document.evaluate(`count(${xpath})`, document, null,
+        XPathResult.NUMBER_TYPE, null).numberValue;
+}
+const error = document.evaluate(errorXpath, document, null,
+    XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+return {
+    url: location.href,
+    reloaded: !window.__kitLoginPending,
+    ready: document.readyState === 'complete',
+    register: count("//td[contains(text(), 'Register Number')]") > 0,
+    errors: count(errorXpath),
+    error_text: error ? (error.innerText || '').trim() : '',
+    login_form: !!document.getElementById('username')
+};
+"""
+
+    def __init__(self, results_fragment: str = "Results", error_xpath: str = LOGIN_ERROR_XPATH):
+        self.results_fragment = results_fragment
+        self.error_xpath = error_xpath
+        self.baseline_errors = 0
+        self.error_text = ''
+
+    def arm(self, driver):
+        """Mark the current document and count error-like text already on it"""
+        self.baseline_errors = driver.execute_script(self.ARM_SCRIPT, self.error_xpath)
+
+    def __call__(self, driver):
+        try:
+            state = driver.execute_script(self.STATE_SCRIPT, self.error_xpath)
+        except WebDriverException:
+            return False  # mid-navigation
+        if not state:
+            return False
+
+        if self.results_fragment in state['url']:
+            return 'results_url'
+        if state['register']:
+            return 'results_page'
+
+        # Same document: only a newly shown message counts; new document: wait until loaded
+        if (not state['reloaded'] and state['errors'] > self.baseline_errors) or \
+                (state['reloaded'] and state['ready'] and state['errors']):
+            self.error_text = state['error_text']
+            return 'error'
+        if state['reloaded'] and state['ready'] and state['login_form']:
+            return 'login_form'
+        return False
+
+
+def any_of(*conditions: Callable) -> Callable:
+    """Condition: first of several conditions that returns a truthy value"""
+    def _condition(driver):
+        for condition in conditions:
+            result = condition(driver)
+            if result:
+                return result
+        return False
+    return _condition
+
+
+class WaitEngine:
+    """Wait on page conditions with per-step timeouts from config"""
+
+    def __init__(self, driver, timeouts: Optional[Dict] = None,
+                 stats: Optional[WaitStats] = None, poll_frequency: float = 0.1):
+        """
+        Initialize wait engine
+
+        Args:
+            driver: Selenium WebDriver
+            timeouts: Per-step timeout overrides (seconds)
+            stats: Shared WaitStats (one per run, shared across workers)
+            poll_frequency: Seconds between condition checks
+        """
+        self.driver = driver
+        self.timeouts = dict(DEFAULT_TIMEOUTS)
+        self.timeouts.update(timeouts or {})
+        self.stats = stats or WaitStats()
+        self.poll_frequency = poll_frequency
+
+    def until(self, step: str, condition: Callable, timeout: Optional[float] = None):
+        """
+        Wait for condition; never raises on timeout
+
+        Returns:
+            Condition result, or False if the step timed out
+        """
+        timeout = self.timeouts.get(step, 10) if timeout is None else timeout
+        start = time.monotonic()
+        try:
+            result = WebDriverWait(self.driver, timeout, poll_frequency=self.poll_frequency).until(condition)
+            self.stats.record(step, time.monotonic() - start, timed_out=False)
+            return result
+        except TimeoutException:
+            elapsed = time.monotonic() - start
+            self.stats.record(step, elapsed, timed_out=True)
+            logger.warning(f"⏱️ Wait '{step}' timed out after {elapsed:.1f}s")
+            return False
+
+    def find_optional(self, what: str, locator: Tuple[str, str]):
+        """
+        Look up an element that may legitimately be absent
+
+        Returns immediately with zero implicit wait; otherwise the implicit
+        wait is paid in full when the element is missing, and that time is
+        recorded in WaitStats.
+
+        Returns:
+            First matching element or None
+        """
+        start = time.monotonic()
+        elements = self.driver.find_elements(*locator)
+        if not elements:
+            self.stats.record_missing(what, time.monotonic() - start)
+            return None
+        return elements[0]
+
+    def element_present(self, step: str, locator: Tuple[str, str], timeout: Optional[float] = None):
+        """Wait for element presence; returns the element or False"""
+        return self.until(step, EC.presence_of_element_located(locator), timeout)
+
+    def element_clickable(self, step: str, locator: Tuple[str, str], timeout: Optional[float] = None):
+        """Wait for element to be clickable; returns the element or False"""
+        return self.until(step, EC.element_to_be_clickable(locator), timeout)
+
+    def url_changes(self, step: str, old_url: str, timeout: Optional[float] = None) -> bool:
+        """Wait for the URL to change from old_url"""
+        return bool(self.until(step, url_changed(old_url), timeout))
+
+    def document_ready(self, step: str, timeout: Optional[float] = None) -> bool:
+        """Wait for document.readyState == 'complete'"""
+        return bool(self.until(step, document_ready, timeout))
+
@@ -0,0 +1,107 @@
+"""
+Parallel Browser Worker Pool
+Runs N independent Chrome workers that pull roll numbers from a shared queue
+"""
+
+import time
+import logging
+import threading
+from queue import Queue, Empty
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class BrowserWorkerPool:
+    """Process students with several independent Chrome workers"""
+
+    def __init__(self, automation, workers: int = 2, delay_between_students: float = 2.0):
+        """
+        Initialize pool
+
+        Args:
+            automation: Configured KITPortalAutomation used as the template for each worker
+            workers: Number of Chrome workers to launch
+            delay_between_students: Pause each worker takes after a student
+        """
+        self.automation = automation
+        self.workers = max(1, int(workers))
+        self.delay_between_students = delay_between_students
+        self._lock = threading.Lock()
+
+    def run(self, roll_numbers: List[str],
+            on_result: Optional[Callable[[Dict], None]] = None) -> List[Dict]:
+        """
+        Process all roll numbers and return results in roll-number order
+
+        Args:
+            roll_numbers: Roll numbers to process
+            on_result: Optional callback invoked with each finished student record
+
+        Returns:
+            One record per roll number, in the same order as roll_numbers
+        """
+        queue = Queue()
+        for roll_number in roll_numbers:
+            queue.put(roll_number)
+
+        results: Dict[str, Dict] = {}
+        worker_count = min(self.workers, len(roll_numbers)) or 1
+        logger.info(f"🚀 Starting {worker_count} browser workers for {len(roll_numbers)} students")
+
+        threads = []
+        for worker_id in range(1, worker_count + 1):
+            thread = threading.Thread(
+                target=self._worker_loop,
+                args=(worker_id, queue, results, len(roll_numbers), on_result),
+                name=f"worker-{worker_id}",
+                daemon=True
+            )
+            thread.start()
+            threads.append(thread)
+
+        for thread in threads:
+            thread.join()
+
+        # Merge back in roll-number order
+        ordered = []
+        for roll_number in roll_numbers:
+            student_data = results.get(roll_number)
+            if student_data is None:
+                student_data = {'roll_number': roll_number, 'status': 'Error: No worker available'}
+            ordered.append(student_data)
+        return ordered
+
+    def _worker_loop(self, worker_id: int, queue: Queue, results: Dict[str, Dict],
+                     total: int, on_result: Optional[Callable[[Dict], None]]):
+        """Launch one Chrome worker and drain the shared queue"""
+        worker = self.automation.spawn_worker(worker_id)
+
+        try:
+            worker.setup_driver()
+        except Exception as e:
+            logger.error(f"❌ [worker {worker_id}] Could not start browser: {e}")
+            return
+
+        try:
+            while True:
+                try:
+                    roll_number = queue.get_nowait()
+                except Empty:
+                    break
+
+                student_data = worker.process_student(roll_number)
+
+                with self._lock:
+                    results[roll_number] = student_data
+                    done = len(results)
+                logger.info(f"[worker {worker_id}] Progress: {done}/{total} ({roll_number}: {student_data.get('status')})")
+
+                if on_result:
+                    on_result(student_data)
+
+                time.sleep(self.delay_between_students)
+        finally:
+            if worker.driver:
+                worker.driver.quit()
+                logger.info(f"[worker {worker_id}] Browser closed")